@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark das funções de classificação executadas a cada frame
+
+Gera mãos sintéticas (a partir de synthetic_data.py) e mede a latência
+por chamada (p50/p95/p99) e chamadas por segundo de cada função. O resultado
+pode ser gravado em JSON para comparar versões:
+
+    python benchmark.py --saida bench_atual.json
+    python benchmark.py --comparar bench_anterior.json --tolerancia 20
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+import numpy as np
+from gestures import (
+    HandLandmarks,
+    TemplateIndex,
+    classify_static_batch,
+    detect_h_movement,
+    detect_j_movement,
+    detect_letra,
+    detect_x_movement,
+    detect_z_movement,
+    get_hand_shape_for_movement,
+    hand_shape_batch,
+    normalize_batch,
+    normalize_landmarks,
+)
+from configuracao_avancada import get_runtime_config
+from dynamic_gestures import DTWMatcher
+from hand_tracking import HandTracker
+from movement_stream import MovementStream
+from recording import SessionRecorder, replay
+from synthetic_data import create_mock_landmarks, gesture, gesture_templates
+
+TEMPLATE_COUNTS = (10, 1000, 100000)
+DTW_TEMPLATES_PER_LETTER = 75
+LETTERS = "ABCDEFGHI"
+
+def synthetic_hand(rng, noise=0.02):
+    """Mão sintética: pontos ao redor do centro com ruído gaussiano"""
+    base = create_mock_landmarks({
+        i: [0.5 + 0.1 * np.cos(i), 0.5 + 0.1 * np.sin(i), 0.0] for i in range(21)
+    })
+    return (np.asarray(base) + rng.normal(0, noise, (21, 3))).tolist()
+
+def synthetic_sequence(rng, length=15):
+    """Sequência sintética de uma mão se deslocando para a esquerda"""
+    start = np.asarray(synthetic_hand(rng))
+    return [(start - [0.01 * i, 0.0, 0.0]).tolist() for i in range(length)]
+
+def synthetic_index(rng, count):
+    """Índice com count amostras (até 1000 distintas, repetidas até completar)"""
+    distinct = min(count, 1000)
+    templates = np.array([normalize_landmarks(synthetic_hand(rng, 0.05)) for _ in range(distinct)])
+    labels = [LETTERS[i % len(LETTERS)] for i in range(count)]
+    return TemplateIndex(labels, np.resize(templates, (count, 21, 2)))
+
+def track(config, hands, index):
+    """Passa uma mão por frame por um HandTracker novo, a 30 fps"""
+    tracker = HandTracker(config=config)
+    for i, hand in enumerate(hands):
+        tracker.update([hand], ['Right'], index, i / 30)
+
+def measure(func, args_list, min_time=0.5, max_calls=100000):
+    """Chama func repetidamente e retorna as estatísticas de latência"""
+    times = []
+    total = 0.0
+    i = 0
+    while (total < min_time or len(times) < 10) and len(times) < max_calls:
+        args = args_list[i % len(args_list)]
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+        i += 1
+    times_us = np.array(times) * 1e6
+    return {
+        'calls': len(times),
+        'p50_us': float(np.percentile(times_us, 50)),
+        'p95_us': float(np.percentile(times_us, 95)),
+        'p99_us': float(np.percentile(times_us, 99)),
+        'mean_us': float(times_us.mean()),
+        'calls_per_second': float(len(times) / total) if total > 0 else 0.0,
+    }
+
+def run_benchmarks(min_time=0.5, template_counts=TEMPLATE_COUNTS, seed=0):
+    rng = np.random.default_rng(seed)
+    hands = [synthetic_hand(rng) for _ in range(64)]
+    hand_objects = [(HandLandmarks(hand),) for hand in hands]
+    batch = np.array(hands)
+    sequences = [(synthetic_sequence(rng),) for _ in range(16)]
+
+    results = {
+        'normalize_landmarks': measure(normalize_landmarks, [(hand,) for hand in hands], min_time),
+        'get_hand_shape_for_movement': measure(get_hand_shape_for_movement, hand_objects, min_time),
+        f'normalize_batch[{len(hands)}]': measure(normalize_batch, [(batch,)], min_time),
+        f'hand_shape_batch[{len(hands)}]': measure(hand_shape_batch, [(batch,)], min_time),
+    }
+    for count in template_counts:
+        index = synthetic_index(rng, count)
+        results[f'detect_letra[{count}]'] = measure(
+            lambda hand: detect_letra(hand, index=index), hand_objects, min_time)
+        if count == 1000:
+            results[f'classify_static_batch[{len(hands)}x{count}]'] = measure(
+                classify_static_batch, [(batch, index)], min_time)
+            # Lote grande (ex.: um vídeo inteiro): a memória não cresce com o número de mãos
+            large_batch = np.array([synthetic_hand(rng) for _ in range(3000)])
+            results[f'classify_static_batch[{len(large_batch)}x{count}]'] = measure(
+                classify_static_batch, [(large_batch, index)], min_time)
+    for name, func in [('detect_j_movement', detect_j_movement),
+                       ('detect_h_movement', detect_h_movement),
+                       ('detect_z_movement', detect_z_movement),
+                       ('detect_x_movement', detect_x_movement)]:
+        results[name] = measure(func, sequences, min_time)
+    stream = MovementStream()
+    frames = [(frame,) for sequence, in sequences for frame in sequence]
+    results['MovementStream.update'] = measure(stream.update, frames, min_time)
+
+    matcher = DTWMatcher(gesture_templates(rng, DTW_TEMPLATES_PER_LETTER))
+    queries = [(gesture(letra, 30, rng, 0.005),) for letra in "HJXZ"]
+    results[f'DTWMatcher.match[{len(matcher)}]'] = measure(matcher.match, queries, min_time)
+
+    # Sessão gravada inteira passando pelo HandTracker, como em offline.py sessao.lbs
+    index = synthetic_index(rng, 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        session = os.path.join(tmp, "sessao.lbs")
+        with SessionRecorder(session) as recorder:
+            for i, (frame,) in enumerate(frames):
+                recorder.write(i, i / 30, [frame], ['Right'])
+        results[f'replay[{len(frames)} frames]'] = measure(
+            lambda: sum(1 for _ in replay(session, index)), [()], min_time)
+
+    # Mão parada (só o ruído do MediaPipe), com e sem o portão de movimento
+    still = np.array(synthetic_hand(rng))
+    steady = [HandLandmarks((still + rng.normal(0, 0.001, still.shape)).tolist()) for _ in range(240)]
+    for name, gate in [('portao', True), ('sem_portao', False)]:
+        config = {**get_runtime_config(), 'motion_gate': gate}
+        results[f'tracker_parado_{name}[{len(steady)} frames]'] = measure(
+            track, [(config, steady, index)], min_time)
+    return results
+
+def compare(current, previous, tolerance=None):
+    """Imprime a variação do p50 de cada benchmark em relação a outra execução
+
+    Retorna os nomes dos benchmarks que ficaram mais lentos que a tolerância
+    (em %), se ela for informada.
+    """
+    regressions = []
+    for name, stats in current.items():
+        before = previous.get(name)
+        if not before:
+            print(f"  {name}: novo")
+            continue
+        change = (stats['p50_us'] / before['p50_us'] - 1) * 100 if before['p50_us'] > 0 else 0.0
+        flag = ""
+        if tolerance is not None and change > tolerance:
+            regressions.append(name)
+            flag = "  <-- REGRESSÃO"
+        print(f"  {name}: {before['p50_us']:.1f} -> {stats['p50_us']:.1f} us ({change:+.1f}%){flag}")
+    return regressions
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark da classificação por frame")
+    parser.add_argument('--saida', help="Grava o resultado em JSON")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--tolerancia', type=float,
+                        help="Com --comparar, sai com erro se algum p50 piorar mais que esta %%")
+    parser.add_argument('--tempo', type=float, default=0.5, help="Tempo mínimo por benchmark (s)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.tempo)
+    print("=== BENCHMARK DA CLASSIFICAÇÃO ===\n")
+    for name, stats in results.items():
+        print(f"{name:32s} p50 {stats['p50_us']:9.1f} us  p95 {stats['p95_us']:9.1f} us  "
+              f"p99 {stats['p99_us']:9.1f} us  {stats['calls_per_second']:10.0f} chamadas/s")
+
+    regressions = []
+    if args.comparar:
+        with open(args.comparar) as f:
+            previous = json.load(f)
+        print(f"\nComparação com {args.comparar}:")
+        regressions = compare(results, previous.get('results', previous), args.tolerancia)
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump({
+                'timestamp': time.time(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResultado salvo em {args.saida}")
+
+    if regressions:
+        raise SystemExit(f"Regressões acima de {args.tolerancia}%: {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,29 @@ import cv2
 import mediapipe as mp
 import json
 import os
-from gestures import detect_letra, get_hand_shape_for_movement, detect_movement_letter
+import queue
+import threading
+from configuracao_avancada import (
+    DEFAULT_STATIC_CALIBRATION_FILE,
+    PROFILES,
+    PerformanceMonitor,
+    load_runtime_config,
+    load_static_calibration,
+)
+from landmark_store import DEFAULT_JSON_FILE, SampleStore
+from gestures import DEFAULT_LANDMARKS_FILE, get_template_index, notify_sample_saved
+from dynamic_gestures import DTWMatcher, save_movement_template
+from governor import FrameGovernor
+from partial_search import PartialDistanceIndex
+from prototypes import PrototypeIndex
+from spatial_index import KDTreeTemplateIndex
+from pipeline import CaptureThread, InferenceThread, raise_worker_error, stop_workers
+from recording import SessionRecorder
 
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,      
-    max_num_hands=2,              
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5 
-)
 
-cap = cv2.VideoCapture(0)
+PERFORMANCE_LOG_FILE = "performance.jsonl"
+PERFORMANCE_DUMP_INTERVAL = 10.0
 
 def save_landmarks(landmarks, filename):
     data = [[lm.x, lm.y, lm.z] for lm in landmarks.landmark]
@@ -20,106 +32,163 @@ def save_landmarks(landmarks, filename):
         json.dump(data, f)
     print(f"Landmarks salvos em {filename}")
 
-def save_landmarks_to_single_file(landmarks, letra, filename="landmarks/all_landmarks.json"):
+def save_landmarks_to_single_file(landmarks, letra, filename=DEFAULT_LANDMARKS_FILE):
     data = [[lm.x, lm.y, lm.z] for lm in landmarks.landmark]
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            all_data = json.load(f)
-    else:
-        all_data = {}
-    if letra not in all_data:
-        all_data[letra] = []
-    all_data[letra].append(data)
-    with open(filename, 'w') as f:
-        json.dump(all_data, f, indent=2)
+    SampleStore(filename).append(letra, data)
+    notify_sample_saved(letra, data, filename)
     print(f"Amostra salva para a letra {letra} em {filename}")
 
-def load_all_landmarks(filename="landmarks/all_landmarks.json"):
+def save_movement_sample(state, letra, config, matcher=None):
+    """Grava a sequência recente de uma mão como modelo de movimento da letra"""
+    if state.last_timestamp is None:
+        window = state.landmarks_sequence.last(state.sequence_length)
+    else:
+        window = state.landmarks_sequence.since(state.last_timestamp - config['sequence_duration'])
+    save_movement_template(letra, window.frames, window.timestamps)
+    if matcher is not None:
+        matcher.add_template(letra, window.frames, window.timestamps)
+    print(f"Movimento de {len(window)} frames salvo para a letra {letra}")
+
+def load_all_landmarks(filename=DEFAULT_JSON_FILE):
     if not os.path.exists(filename) or os.path.getsize(filename) == 0:
         return {}
     with open(filename, 'r') as f:
         return json.load(f)
 
-if not os.path.exists("landmarks"):
-    os.makedirs("landmarks")
-
-landmarks_sequence = []
-SEQUENCE_LENGTH = 15
-movement_detected = False
-movement_letter = None
-movement_counter = 0
-MOVEMENT_CONFIRMATION_FRAMES = 5
-
-while cap.isOpened():
-    success, frame = cap.read()
-    if not success:
-        continue
-
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_frame)
-
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            current_landmarks = [[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark]
-            landmarks_sequence.append(current_landmarks)
-            if len(landmarks_sequence) > SEQUENCE_LENGTH:
-                landmarks_sequence.pop(0)
-            
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame,
-                hand_landmarks,
-                mp_hands.HAND_CONNECTIONS,
-                mp.solutions.drawing_styles.get_default_hand_landmarks_style(),
-                mp.solutions.drawing_styles.get_default_hand_connections_style()
-            )
-            
-
-            detected_letter = None
-            hand_shape = get_hand_shape_for_movement(hand_landmarks)      
-            if hand_shape and len(landmarks_sequence) >= 5:
-                if detect_movement_letter(landmarks_sequence, hand_shape):
-                    if movement_letter == hand_shape:
-                        movement_counter += 1
-                    else:
-                        movement_letter = hand_shape
-                        movement_counter = 1
-
-                    if movement_counter >= MOVEMENT_CONFIRMATION_FRAMES:
-                        detected_letter = hand_shape
-                        movement_detected = True
-                else:
-                    if movement_letter == hand_shape:
-                        movement_counter = max(0, movement_counter - 1)
-            else:
-                movement_counter = max(0, movement_counter - 1)
-            if not detected_letter:
-                detected_letter = detect_letra(hand_landmarks)
-                movement_detected = False
-            
-            color = (0, 255, 0) if movement_detected else (255, 0, 0)
-            status = " (movimento)" if movement_detected else " (estático)"
-            
-            cv2.putText(frame, detected_letter + status, (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-
-            if hand_shape:
-                cv2.putText(frame, f"Forma: {hand_shape}", (10, 70), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                cv2.putText(frame, f"Contador: {movement_counter}", (10, 100), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-
-            if cv2.waitKey(1) & 0xFF == ord('s'):
+def draw_results(frame, classified):
+    for i, (key, hand_landmarks, result) in enumerate(classified):
+        mp.solutions.drawing_utils.draw_landmarks(
+            frame,
+            hand_landmarks,
+            mp_hands.HAND_CONNECTIONS,
+            mp.solutions.drawing_styles.get_default_hand_landmarks_style(),
+            mp.solutions.drawing_styles.get_default_hand_connections_style()
+        )
+
+        top = 30 + i * 110
+        color = (0, 255, 0) if result.movement_detected else (255, 0, 0)
+        status = " (movimento)" if result.movement_detected else " (estático)"
+
+        cv2.putText(frame, f"{key}: {result.letra}{status}", (10, top),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+        if result.hand_shape:
+            cv2.putText(frame, f"Forma: {result.hand_shape}", (10, top + 40),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            cv2.putText(frame, f"Contador: {result.movement_counter}", (10, top + 70),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+def draw_performance(frame, monitor):
+    bottom = frame.shape[0] - 10
+    for i, line in enumerate(reversed(monitor.overlay_lines())):
+        cv2.putText(frame, line, (10, bottom - i * 20),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+def draw_text(frame, text):
+    cv2.putText(frame, f"Texto: {text}", (max(10, frame.shape[1] - 360), frame.shape[0] - 10),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+def draw_governor(frame, governor):
+    cv2.putText(frame, governor.status(), (max(10, frame.shape[1] - 360), 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 255), 1)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconhecimento de Libras em tempo real")
+    parser.add_argument('--perfil', choices=list(PROFILES),
+                        help="Perfil de configuração (padrão: variável LIBRAS_PERFIL ou 'padrao')")
+    parser.add_argument('--kdtree', action='store_true',
+                        help="Usa KD-tree (scipy) na busca de letras estáticas")
+    parser.add_argument('--prototipos', type=int, default=0,
+                        help="Compara primeiro com N protótipos por letra (0 = desligado)")
+    parser.add_argument('--busca-parcial', action='store_true',
+                        help="Busca estática por distâncias parciais, com saída antecipada")
+    parser.add_argument('--limiares-por-letra', nargs='?', const=DEFAULT_STATIC_CALIBRATION_FILE,
+                        help="Usa os limiares por letra calibrados (evaluation.py --gravar-limiares)")
+    parser.add_argument('--dtw', action='store_true',
+                        help="Compara os movimentos com os modelos gravados (tecla 'm') por DTW")
+    parser.add_argument('--fps-alvo', type=float, default=0,
+                        help="Ativa o governador adaptativo para manter este FPS (0 = desligado)")
+    parser.add_argument('--gravar', help="Grava as detecções de cada frame em uma sessão (.lbs)")
+    args = parser.parse_args()
+    governor = FrameGovernor(args.fps_alvo) if args.fps_alvo > 0 else None
+    config = load_runtime_config(governor.profile if governor else args.perfil)
+    if args.limiares_por_letra:
+        config['static_thresholds'] = load_static_calibration(args.limiares_por_letra).get('static_thresholds')
+    print(f"Perfil de configuração: {config['profile']}")
+
+    if not os.path.exists("landmarks"):
+        os.makedirs("landmarks")
+
+    template_index = get_template_index(DEFAULT_LANDMARKS_FILE)
+    if args.prototipos > 0:
+        template_index = PrototypeIndex(template_index, args.prototipos,
+                                        cache_file=DEFAULT_LANDMARKS_FILE + ".prototipos")
+    elif args.busca_parcial:
+        template_index = PartialDistanceIndex(template_index, DEFAULT_LANDMARKS_FILE + ".parcial")
+    elif args.kdtree:
+        template_index = KDTreeTemplateIndex(template_index, DEFAULT_LANDMARKS_FILE + ".kdtree")
+    movement_matcher = DTWMatcher.load() if args.dtw else None
+    template_lock = threading.Lock()
+    monitor = PerformanceMonitor()
+    recorder = SessionRecorder(args.gravar) if args.gravar else None
+
+    cap = cv2.VideoCapture(0)
+    frames = queue.Queue(maxsize=1)
+    results = queue.Queue(maxsize=2)
+    stop_event = threading.Event()
+    workers = [
+        CaptureThread(cap, frames, stop_event, monitor),
+        InferenceThread(frames, results, stop_event, template_index, template_lock, monitor, config,
+                        governor, movement_matcher, recorder),
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        while not stop_event.is_set():
+            try:
+                frame_id, captured_at, frame, classified, text = results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            with monitor.stage('drawing'):
+                draw_results(frame, classified)
+                draw_text(frame, text)
+                if monitor.show_overlay:
+                    draw_performance(frame, monitor)
+                if governor is not None:
+                    draw_governor(frame, governor)
+            cv2.imshow('Detecção de Libras', frame)
+            monitor.maybe_dump(PERFORMANCE_LOG_FILE, PERFORMANCE_DUMP_INTERVAL)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            if key == ord('p'):
+                monitor.show_overlay = not monitor.show_overlay
+            if key == ord('s') and classified:
                 letra = input("Digite a letra para salvar: ").upper()
-                save_landmarks_to_single_file(hand_landmarks, letra)
-    else:
-        movement_counter = max(0, movement_counter - 1)
-        movement_detected = False
-
-    cv2.imshow('Detecção de Libras', frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-hands.close()
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+                with template_lock:
+                    save_landmarks_to_single_file(classified[0][1], letra)
+            if key == ord('m') and classified:
+                letra = input("Digite a letra do movimento: ").upper()
+                with template_lock:
+                    state = workers[1].tracker.states.get(classified[0][0])
+                    if state is not None:
+                        save_movement_sample(state, letra, workers[1].config, movement_matcher)
+    finally:
+        if stop_workers(stop_event, workers):
+            cap.release()
+            if recorder is not None:
+                recorder.close()
+        else:
+            # A câmera e a gravação ainda estão em uso; o frame incompleto da
+            # sessão é descartado na próxima abertura (SessionRecorder)
+            print("Aviso: as threads de captura/inferência não terminaram a tempo")
+        cv2.destroyAllWindows()
+    raise_worker_error(workers)
+
+if __name__ == "__main__":
+    main()
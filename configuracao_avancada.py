@@ -4,6 +4,11 @@ Configurações avançadas para o sistema de detecção de movimentos em Libras
 Este arquivo contém parâmetros ajustáveis e funções de otimização
 """
 
+import json
+import os
+import threading
+import time
+
 # =============================================================================
 # PARÂMETROS DE CONFIGURAÇÃO
 # =============================================================================
@@ -11,6 +16,7 @@ Este arquivo contém parâmetros ajustáveis e funções de otimização
 # Parâmetros de movimento para letra J
 J_MOVEMENT_CONFIG = {
     'min_sequence_length': 5,
+    'min_duration': 0.13,        # Duração mínima (s) quando há timestamps
     'down_threshold': 0.05,      # Movimento mínimo para baixo
     'left_threshold': 0.02,      # Movimento mínimo para esquerda
     'landmark_index': 20         # Dedo mindinho
@@ -19,6 +25,7 @@ J_MOVEMENT_CONFIG = {
 # Parâmetros de movimento para letra H
 H_MOVEMENT_CONFIG = {
     'min_sequence_length': 5,
+    'min_duration': 0.13,          # Duração mínima (s) quando há timestamps
     'horizontal_threshold': 0.08,  # Movimento horizontal mínimo
     'vertical_stability': 0.05,    # Tolerância para estabilidade vertical
     'landmark_indices': [8, 12]    # Indicador e médio
@@ -27,6 +34,7 @@ H_MOVEMENT_CONFIG = {
 # Parâmetros de movimento para letra Z
 Z_MOVEMENT_CONFIG = {
     'min_sequence_length': 8,
+    'min_duration': 0.23,          # Duração mínima (s) quando há timestamps
     'diagonal_threshold': 0.03,    # Movimento diagonal mínimo
     'horizontal_threshold': 0.05,  # Movimento horizontal mínimo
     'vertical_tolerance': 0.03,    # Tolerância para movimento horizontal
@@ -36,6 +44,7 @@ Z_MOVEMENT_CONFIG = {
 # Parâmetros de movimento para letra X
 X_MOVEMENT_CONFIG = {
     'min_sequence_length': 4,
+    'min_duration': 0.1,           # Duração mínima (s) quando há timestamps
     'down_threshold': 0.02,        # Movimento para baixo
     'up_threshold': 0.01,          # Movimento para cima
     'horizontal_tolerance': 0.03,  # Tolerância horizontal
@@ -48,7 +57,37 @@ SYSTEM_CONFIG = {
     'movement_confirmation_frames': 5,        # Frames para confirmar
     'detection_confidence': 0.7,              # Confiança do MediaPipe
     'tracking_confidence': 0.5,               # Rastreamento do MediaPipe
-    'static_detection_threshold': 1.2         # Limiar para detecção estática
+    'static_detection_threshold': 1.2,        # Limiar para detecção estática
+    'max_num_hands': 2,                       # Mãos detectadas por frame
+    'min_movement_frames': 5,                 # Frames antes de tentar detectar movimento
+    'streaming_movements': False,             # Detectores incrementais (movement_stream.py), para janelas longas
+    'movement_reset_frames': 5,               # Frames sem a mão antes de descartar os gestos em andamento
+    'movement_window_frames': 30,             # Duração máxima de um movimento nos detectores incrementais
+    # Janelas por tempo, usadas quando os frames chegam com timestamp de captura
+    'max_sequence_frames': 60,                # Capacidade do buffer da sequência
+    'sequence_duration': 0.5,                 # Segundos para análise
+    'movement_confirmation_time': 0.16,       # Segundos para confirmar
+    'min_movement_time': 0.13,                # Segundos antes de tentar detectar movimento
+    'movement_window_duration': 1.0,          # Duração máxima (s) de um movimento nos detectores incrementais
+    # Modelos de movimento gravados (dynamic_gestures.py)
+    'dtw_length': 32,                         # Passos de cada sequência após reamostrar
+    'dtw_band': 0.1,                          # Faixa Sakoe-Chiba (fração do comprimento)
+    'dtw_pose_weight': 0.5,                   # Peso da forma da mão em relação à trajetória
+    'dynamic_detection_threshold': 0.5,       # Distância DTW máxima (RMS por passo)
+    # Saída de letras estável (letter_stream.py)
+    'letter_events': True,                    # Um LetterDebouncer por mão
+    'letter_stable_time': 0.3,                # Segundos com a mesma letra antes de emiti-la
+    'letter_hold_time': 0.2,                  # Falhas/trocas toleradas (s) sem encerrar a letra
+    'letter_repeat_time': 0.0,                # Repete a letra mantida a cada N s (0 = não repete)
+    'letter_min_confidence': 0.6,             # Fração mínima dos frames com a letra
+    'letter_stable_frames': 9,                # Equivalentes em frames, sem timestamps
+    'letter_hold_frames': 6,
+    'letter_repeat_frames': 0,
+    # Portão de movimento (hand_tracking.py)
+    'motion_gate': True,                      # Reaproveita a classificação estática com a mão parada
+    'motion_gate_tolerance': 0.012,           # Deslocamento máximo de um ponto (fração da imagem)
+    'motion_gate_max_reuse': 30,              # Frames seguidos reaproveitados antes de reclassificar
+    'movement_energy_threshold': 0.015        # Extensão mínima da trajetória para procurar movimento
 }
 
 # =============================================================================
@@ -90,8 +129,12 @@ def optimize_for_performance():
     return {
         'sequence_length': 10,                # Reduzido para menos processamento
         'movement_confirmation_frames': 3,    # Resposta mais rápida
+        'sequence_duration': 0.33,
+        'movement_confirmation_time': 0.09,
         'detection_confidence': 0.6,          # Menos rigoroso
         'tracking_confidence': 0.4,           # Menos rigoroso
+        'motion_gate_tolerance': 0.02,        # Reaproveita a letra com mais oscilação
+        'motion_gate_max_reuse': 60,
     }
 
 def optimize_for_accuracy():
@@ -101,8 +144,12 @@ def optimize_for_accuracy():
     return {
         'sequence_length': 20,                # Mais frames para análise
         'movement_confirmation_frames': 8,    # Mais confirmação
+        'sequence_duration': 0.67,
+        'movement_confirmation_time': 0.26,
         'detection_confidence': 0.8,          # Mais rigoroso
         'tracking_confidence': 0.7,           # Mais rigoroso
+        'motion_gate_tolerance': 0.008,       # Reclassifica com menos deslocamento
+        'motion_gate_max_reuse': 15,
     }
 
 def optimize_for_lighting_conditions(lighting='normal'):
@@ -127,6 +174,65 @@ def optimize_for_lighting_conditions(lighting='normal'):
     else:  # normal
         return SYSTEM_CONFIG
 
+# =============================================================================
+# CONFIGURAÇÃO EM TEMPO DE EXECUÇÃO
+# =============================================================================
+
+PROFILES = {
+    'padrao': dict,
+    'performance': optimize_for_performance,
+    'precisao': optimize_for_accuracy,
+}
+
+PROFILE_ENV_VAR = 'LIBRAS_PERFIL'
+
+_runtime_config = None
+
+def load_runtime_config(profile=None):
+    """
+    Monta a configuração usada por todo o pipeline e a torna a padrão
+
+    Args:
+        profile: 'padrao', 'performance' ou 'precisao'. Se None, usa a
+            variável de ambiente LIBRAS_PERFIL (ou 'padrao').
+
+    Returns:
+        SYSTEM_CONFIG com o perfil aplicado, mais 'profile' e 'movements'
+        (cópias dos *_MOVEMENT_CONFIG por letra)
+    """
+    global _runtime_config
+
+    profile = profile or os.environ.get(PROFILE_ENV_VAR, 'padrao')
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil desconhecido: {profile} (opções: {', '.join(PROFILES)})")
+
+    config = {**SYSTEM_CONFIG, **PROFILES[profile]()}
+    config['profile'] = profile
+    config['movements'] = {
+        'J': J_MOVEMENT_CONFIG.copy(),
+        'H': H_MOVEMENT_CONFIG.copy(),
+        'Z': Z_MOVEMENT_CONFIG.copy(),
+        'X': X_MOVEMENT_CONFIG.copy(),
+    }
+    _runtime_config = config
+    return config
+
+def get_runtime_config():
+    """Retorna a configuração carregada por load_runtime_config (carrega se preciso)"""
+    if _runtime_config is None:
+        return load_runtime_config()
+    return _runtime_config
+
+def configure_hands_from_config(config=None, static_image_mode=False):
+    """Cria o MediaPipe Hands com os parâmetros da configuração em tempo de execução"""
+    config = config or get_runtime_config()
+    return configure_mediapipe_hands(
+        detection_confidence=config['detection_confidence'],
+        tracking_confidence=config['tracking_confidence'],
+        max_num_hands=config['max_num_hands'],
+        static_image_mode=static_image_mode
+    )
+
 # =============================================================================
 # FUNÇÕES DE CALIBRAÇÃO
 # =============================================================================
@@ -156,17 +262,94 @@ def calibrate_movement_thresholds(hand_size='medium'):
     
     return calibrated_config
 
-def auto_calibrate_from_landmarks(landmarks_history):
+DEFAULT_STATIC_CALIBRATION_FILE = "landmarks/static_thresholds.json"
+
+def _nearest_by_letter(labels, templates, chunk_size=32):
+    """Distância de cada amostra até a mais próxima da mesma letra (sem ela) e de outra letra"""
+    import numpy as np
+    from gestures import template_distances
+
+    labels = np.asarray(labels, dtype=object)
+    same = np.full(len(labels), np.inf)
+    other = np.full(len(labels), np.inf)
+    for start in range(0, len(labels), chunk_size):
+        rows = slice(start, start + chunk_size)
+        dists = template_distances(templates[rows], templates)
+        dists[np.arange(dists.shape[0]), np.arange(start, start + dists.shape[0])] = np.inf
+        is_same = labels[rows, None] == labels[None, :]
+        same[rows] = np.where(is_same, dists, np.inf).min(axis=1)
+        other[rows] = np.where(is_same, np.inf, dists).min(axis=1)
+    return same, other
+
+def calibrate_static_thresholds(labels, templates, quantile=0.95, slack=0.1,
+                                default=SYSTEM_CONFIG['static_detection_threshold']):
+    """
+    Limiares de rejeição por letra a partir das amostras estáticas
+
+    Para cada amostra, a distância até a amostra mais próxima da mesma letra
+    mede o quanto a letra varia entre exemplos. O limiar da letra é o
+    quantil dessas distâncias mais a folga, limitado a 0.5x-2x do limiar
+    global (como o fator de auto_calibrate_from_landmarks); letras com uma
+    só amostra ficam com o limiar global.
+
+    Também calcula o raio de saída de cada letra: metade da menor distância
+    entre uma amostra dela e uma de outra letra. Uma mão mais perto que isso
+    de uma amostra da letra tem, pela desigualdade triangular, essa letra
+    como a mais próxima (usado por PartialDistanceIndex para encerrar a
+    busca antes).
+
+    Args:
+        labels: Letra de cada amostra (N)
+        templates: Amostras normalizadas (N x 21 x 2)
+
+    Returns:
+        {'static_thresholds': {letra: limiar}, 'static_exit_radius': {letra: raio}}
+    """
+    import numpy as np
+
+    labels = np.asarray(labels, dtype=object)
+    templates = np.asarray(templates, dtype=np.float64).reshape(-1, 21, 2)
+    same, other = _nearest_by_letter(labels, templates)
+    thresholds = {}
+    radius = {}
+    for letra in dict.fromkeys(labels):
+        rows = labels == letra
+        spread = same[rows][np.isfinite(same[rows])]
+        limiar = float(np.quantile(spread, quantile)) * (1 + slack) if len(spread) else default
+        thresholds[letra] = max(0.5 * default, min(2.0 * default, limiar))
+        separation = float(other[rows].min())
+        radius[letra] = separation / 2 if np.isfinite(separation) else 0.0
+    return {'static_thresholds': thresholds, 'static_exit_radius': radius}
+
+def save_static_calibration(calibration, filename=DEFAULT_STATIC_CALIBRATION_FILE):
+    """Grava o resultado de calibrate_static_thresholds (gravação atômica)"""
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(calibration, f, indent=2)
+    os.replace(tmp_filename, filename)
+
+def load_static_calibration(filename=DEFAULT_STATIC_CALIBRATION_FILE):
+    """Lê a calibração gravada por save_static_calibration ({} se não existir)"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+def auto_calibrate_from_landmarks(landmarks_history, static_samples=None):
     """
     Calibração automática baseada no histórico de landmarks
     
     Args:
         landmarks_history: Lista de sequências de landmarks
+        static_samples: (letras, amostras normalizadas N x 21 x 2); se
+            informado, o resultado inclui também os limiares por letra das
+            letras estáticas (calibrate_static_thresholds)
     """
     import numpy as np
     
+    static = calibrate_static_thresholds(*static_samples) if static_samples is not None else {}
     if not landmarks_history:
-        return SYSTEM_CONFIG
+        return {**SYSTEM_CONFIG, **static} if static else SYSTEM_CONFIG
     
     variations = []
     for sequence in landmarks_history:
@@ -187,28 +370,93 @@ def auto_calibrate_from_landmarks(landmarks_history):
             'h_horizontal_threshold': H_MOVEMENT_CONFIG['horizontal_threshold'] * adjustment_factor,
             'z_diagonal_threshold': Z_MOVEMENT_CONFIG['diagonal_threshold'] * adjustment_factor,
             'x_down_threshold': X_MOVEMENT_CONFIG['down_threshold'] * adjustment_factor,
+            **static,
         }
     
-    return {}
+    return static
 
 # =============================================================================
 # FUNÇÕES DE MONITORAMENTO
 # =============================================================================
 
+class TimingRing:
+    """Janela de tamanho fixo com as últimas medições de tempo (ms)"""
+
+    def __init__(self, size=300):
+        import numpy as np
+
+        self.values = np.zeros(size, dtype=np.float64)
+        self.next = 0
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.next] = value
+        self.next = (self.next + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+
+    def ordered(self):
+        """Medições em ordem cronológica"""
+        import numpy as np
+
+        if self.count < len(self.values):
+            return self.values[:self.count].copy()
+        return np.concatenate([self.values[self.next:], self.values[:self.next]])
+
+    def stats(self):
+        import numpy as np
+
+        if self.count == 0:
+            return {}
+        window = self.values[:self.count]
+        p50, p95, p99 = np.percentile(window, [50, 95, 99])
+        return {
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'mean_ms': float(window.mean()),
+            'max_ms': float(window.max()),
+            'count': self.count,
+        }
+
 class PerformanceMonitor:
-    """Monitora performance do sistema de detecção"""
+    """Monitora performance do sistema de detecção
+
+    Além do tempo total de detecção, registra o tempo de cada etapa do loop
+    (captura, conversão de cor, MediaPipe, classificação, desenho...) em
+    janelas circulares de tamanho fixo, com p50/p95/p99 móveis.
+    """
     
-    def __init__(self):
-        self.detection_times = []
+    def __init__(self, window_size=300):
+        self.window_size = window_size
+        self._detection = TimingRing(100)
+        self.stage_times = {}
         self.false_positives = 0
         self.true_positives = 0
         self.frame_count = 0
+        self.show_overlay = False
+        self._lock = threading.Lock()
+        self._last_dump = None
+
+    @property
+    def detection_times(self):
+        return self._detection.ordered().tolist()
     
     def record_detection_time(self, time_ms):
         """Registra tempo de detecção"""
-        self.detection_times.append(time_ms)
-        if len(self.detection_times) > 100:
-            self.detection_times.pop(0)
+        with self._lock:
+            self._detection.add(time_ms)
+
+    def record_stage_time(self, stage, time_ms):
+        """Registra o tempo de uma etapa do loop"""
+        with self._lock:
+            ring = self.stage_times.get(stage)
+            if ring is None:
+                ring = self.stage_times[stage] = TimingRing(self.window_size)
+            ring.add(time_ms)
+
+    def stage(self, name):
+        """Context manager que mede o bloco e registra como a etapa name"""
+        return _StageTimer(self, name)
     
     def record_detection_result(self, is_correct):
         """Registra resultado da detecção"""
@@ -219,14 +467,15 @@ class PerformanceMonitor:
     
     def get_stats(self):
         """Retorna estatísticas de performance"""
-        if not self.detection_times:
+        if not self._detection.count:
             return {}
         
         import numpy as np
         
-        avg_time = np.mean(self.detection_times)
-        max_time = np.max(self.detection_times)
-        min_time = np.min(self.detection_times)
+        detection_times = self._detection.ordered()
+        avg_time = np.mean(detection_times)
+        max_time = np.max(detection_times)
+        min_time = np.min(detection_times)
         
         total_detections = self.true_positives + self.false_positives
         accuracy = (self.true_positives / total_detections * 100) if total_detections > 0 else 0
@@ -240,6 +489,48 @@ class PerformanceMonitor:
             'fps_estimate': 1000 / avg_time if avg_time > 0 else 0
         }
 
+    def get_stage_stats(self):
+        """Retorna p50/p95/p99 móveis de cada etapa registrada"""
+        with self._lock:
+            return {stage: ring.stats() for stage, ring in self.stage_times.items()}
+
+    def overlay_lines(self):
+        """Linhas de texto para exibir os tempos por etapa sobre o vídeo"""
+        return [
+            f"{stage}: p50 {stats['p50_ms']:.1f} p95 {stats['p95_ms']:.1f} p99 {stats['p99_ms']:.1f} ms"
+            for stage, stats in self.get_stage_stats().items()
+        ]
+
+    def dump_jsonl(self, filename):
+        """Acrescenta uma linha JSON com as estatísticas atuais ao arquivo"""
+        with open(filename, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': time.time(),
+                'frame_count': self.frame_count,
+                'stages': self.get_stage_stats(),
+            }) + '\n')
+
+    def maybe_dump(self, filename, interval=10.0):
+        """Chama dump_jsonl se já passaram interval segundos desde o último"""
+        now = time.monotonic()
+        if self._last_dump is None:
+            self._last_dump = now
+        elif now - self._last_dump >= interval:
+            self._last_dump = now
+            self.dump_jsonl(filename)
+
+class _StageTimer:
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor.record_stage_time(self.name, (time.perf_counter() - self.start) * 1000)
+
 # =============================================================================
 # FUNÇÕES DE DEBUG
 # =============================================================================
@@ -0,0 +1,235 @@
+"""
+Reconhecimento de letras com movimento por DTW sobre modelos gravados
+
+Em vez de uma regra escrita à mão para cada letra (detect_*_movement), cada
+letra com movimento tem sequências de exemplo gravadas em
+landmarks/movement_templates.json (ao lado do all_landmarks.json). A
+sequência ao vivo é comparada com todas por DTW (dynamic time warping):
+
+- cada frame vira um vetor com a forma da mão (normalize_batch) e a posição
+  de alguns pontos em relação ao centro da trajetória, em unidades do
+  tamanho da mão;
+- as sequências são reamostradas para o mesmo número de passos (por tempo,
+  se houver timestamps) e o alinhamento fica restrito a uma faixa
+  Sakoe-Chiba em torno da diagonal;
+- o limite inferior LB_Keogh de todos os modelos é calculado de uma vez e
+  os modelos são avaliados do menor limite para o maior, parando quando o
+  limite já passa da melhor distância; cada DTW também é abandonado assim
+  que uma linha inteira passa dela.
+
+Nova letra com movimento = gravar exemplos ('m' em camera.py), sem código.
+"""
+
+import json
+import os
+import numpy as np
+from configuracao_avancada import SYSTEM_CONFIG
+from gestures import TemplateMatch, normalize_batch
+
+DEFAULT_MOVEMENT_TEMPLATES_FILE = "landmarks/movement_templates.json"
+
+# Pontos cuja trajetória entra no vetor de cada frame: punho, indicador, médio e mindinho
+MOTION_LANDMARKS = [0, 8, 12, 20]
+
+def load_movement_templates(filename=DEFAULT_MOVEMENT_TEMPLATES_FILE):
+    """Lê {letra: [{'landmarks': T x 21 x 3, 'timestamps': T ou None}]}"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+def save_movement_template(letra, landmarks, timestamps=None, filename=DEFAULT_MOVEMENT_TEMPLATES_FILE):
+    """Acrescenta uma sequência de exemplo para a letra (gravação atômica)"""
+    templates = load_movement_templates(filename)
+    templates.setdefault(letra, []).append({
+        'landmarks': np.asarray(landmarks, dtype=np.float64).tolist(),
+        'timestamps': None if timestamps is None else [float(t) for t in timestamps],
+    })
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(templates, f)
+    os.replace(tmp_filename, filename)
+    return templates
+
+def resample(values, length, timestamps=None):
+    """Reamostra T x D valores para length passos por interpolação linear
+
+    Com timestamps os passos são igualmente espaçados no tempo, então a
+    mesma sequência capturada a FPS diferentes (ou com frames pulados) dá o
+    mesmo resultado.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 1:
+        return np.repeat(values, length, axis=0)
+    if timestamps is None or np.isnan(timestamps).any():
+        positions = np.arange(len(values), dtype=np.float64)
+    else:
+        positions = np.asarray(timestamps, dtype=np.float64)
+    targets = np.linspace(positions[0], positions[-1], length)
+    right = np.clip(np.searchsorted(positions, targets, side='right'), 1, len(values) - 1)
+    left = right - 1
+    span = positions[right] - positions[left]
+    weight = np.where(span > 0, (targets - positions[left]) / np.where(span > 0, span, 1.0), 0.0)
+    weight = np.clip(weight, 0.0, 1.0)[:, None]
+    return values[left] * (1 - weight) + values[right] * weight
+
+def sequence_features(landmarks, length=SYSTEM_CONFIG['dtw_length'], timestamps=None,
+                      pose_weight=SYSTEM_CONFIG['dtw_pose_weight']):
+    """Vetores por passo (length x D) de uma sequência T x 21 x 3"""
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    pose = normalize_batch(landmarks).reshape(len(landmarks), 42) * pose_weight
+
+    xy = landmarks[:, :, :2]
+    first = xy[0] - xy[0].mean(axis=0)
+    scale = np.linalg.norm(first, axis=1).max()
+    scale = scale if scale > 0 else 1.0
+    motion = xy[:, MOTION_LANDMARKS]
+    motion = ((motion - motion.mean(axis=0)) / scale).reshape(len(landmarks), -1)
+
+    return resample(np.hstack([pose, motion]), length, timestamps)
+
+def envelope(features, radius):
+    """Envelopes superior e inferior (LB_Keogh) de K x L x D vetores na faixa radius"""
+    length = features.shape[1]
+    upper = np.empty_like(features)
+    lower = np.empty_like(features)
+    for i in range(length):
+        window = features[:, max(0, i - radius):i + radius + 1]
+        upper[:, i] = window.max(axis=1)
+        lower[:, i] = window.min(axis=1)
+    return upper, lower
+
+def lb_keogh(query, upper, lower):
+    """Limite inferior do DTW (custo quadrático) da consulta L x D contra K envelopes"""
+    query = np.asarray(query, dtype=upper.dtype)
+    diff = np.minimum(np.maximum(query, lower), upper)
+    np.subtract(query, diff, out=diff)
+    return np.einsum('kld,kld->k', diff, diff)
+
+def dtw_distances(query, templates, radius, best_so_far=float('inf')):
+    """DTW (custo quadrático, faixa Sakoe-Chiba) da consulta L x D contra K modelos
+
+    Os K modelos avançam juntos, célula a célula da faixa, em operações
+    vetorizadas. Um modelo é abandonado (distância inf) assim que todas as
+    células de uma linha passam de best_so_far.
+    """
+    count, length, _ = templates.shape
+    result = np.full(count, np.inf)
+    if count == 0:
+        return result
+    cost = ((query ** 2).sum(axis=1)[None, :, None] + (templates ** 2).sum(axis=2)[:, None, :]
+            - 2 * np.einsum('id,kjd->kij', query, templates))
+    np.maximum(cost, 0.0, out=cost)
+
+    alive = np.arange(count)
+    # Uma coluna inf à esquerda evita o caso especial de j = 0
+    previous = np.full((count, length + 1), np.inf)
+    previous[:, 0] = 0.0
+    for i in range(length):
+        lo, hi = max(0, i - radius), min(length, i + radius + 1)
+        current = np.full((len(alive), length + 1), np.inf)
+        # Vindo da linha anterior (diagonal ou vertical) dá para calcular a faixa de uma vez;
+        # só o passo horizontal depende da célula à esquerda
+        vertical = cost[:, i, lo:hi] + np.minimum(previous[:, lo:hi], previous[:, lo + 1:hi + 1])
+        current[:, lo + 1] = vertical[:, 0]
+        for j in range(lo + 1, hi):
+            current[:, j + 1] = np.minimum(vertical[:, j - lo], cost[:, i, j] + current[:, j])
+        keep = current.min(axis=1) <= best_so_far
+        if not keep.all():
+            alive, cost, current = alive[keep], cost[keep], current[keep]
+            if len(alive) == 0:
+                return result
+        previous = current
+    result[alive] = previous[:, length]
+    return result
+
+class DTWMatcher:
+    """Compara sequências ao vivo com os modelos de movimento gravados
+
+    Args:
+        templates: {letra: [{'landmarks', 'timestamps'}]} (load_movement_templates)
+        length: Passos após a reamostragem
+        band: Largura da faixa Sakoe-Chiba, como fração de length
+        batch_size: Modelos avaliados no primeiro lote (os seguintes dobram)
+    """
+
+    def __init__(self, templates, length=SYSTEM_CONFIG['dtw_length'], band=SYSTEM_CONFIG['dtw_band'],
+                 pose_weight=SYSTEM_CONFIG['dtw_pose_weight'], batch_size=8):
+        self.length = length
+        self.batch_size = batch_size
+        self.radius = max(1, int(round(band * length)))
+        self.pose_weight = pose_weight
+        self.labels = np.zeros(0, dtype=object)
+        self.features = np.zeros((0, length, 42 + 2 * len(MOTION_LANDMARKS)))
+        self.upper = self.lower = self.features.astype(np.float32)
+        labels = [letra for letra, samples in templates.items() for _ in samples]
+        features = [sequence_features(sample['landmarks'], length, sample.get('timestamps'), pose_weight)
+                    for samples in templates.values() for sample in samples]
+        if labels:
+            self._extend(labels, np.array(features))
+
+    def add_template(self, letra, landmarks, timestamps=None):
+        """Acrescenta um modelo (ex.: logo após gravá-lo) sem recalcular os demais"""
+        self._extend([letra], sequence_features(landmarks, self.length, timestamps, self.pose_weight)[None])
+
+    def _extend(self, labels, features):
+        upper, lower = envelope(features, self.radius)
+        self.labels = np.concatenate([self.labels, np.array(labels, dtype=object)])
+        self.features = np.concatenate([self.features, features])
+        # Os envelopes em float32 reduzem pela metade a memória lida pelo LB_Keogh
+        self.upper = np.concatenate([self.upper, upper.astype(np.float32)])
+        self.lower = np.concatenate([self.lower, lower.astype(np.float32)])
+
+    @classmethod
+    def load(cls, filename=DEFAULT_MOVEMENT_TEMPLATES_FILE, **options):
+        return cls(load_movement_templates(filename), **options)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def match(self, sequence, limiar=SYSTEM_CONFIG['dynamic_detection_threshold'], timestamps=None):
+        """Modelo mais próximo da sequência (T x 21 x 3 ou um LandmarkWindow)
+
+        Retorna um TemplateMatch com a distância RMS por passo. Para os
+        modelos descartados pelos limites a margem usa o próprio limite, então
+        é um limite inferior da margem real.
+        """
+        if timestamps is None:
+            timestamps = getattr(sequence, 'timestamps', None)
+        frames = getattr(sequence, 'frames', sequence)
+        if len(self) == 0 or len(frames) < 2:
+            return TemplateMatch('?', float('inf'), float('inf'))
+
+        query = sequence_features(frames, self.length, timestamps, self.pose_weight)
+        # Folga relativa para o arredondamento do float32 não descartar o melhor modelo
+        bounds = lb_keogh(query, self.upper, self.lower) * (1 - 1e-5)
+        # Limite inferior conhecido da distância de cada modelo (a exata, se avaliado)
+        lower = bounds.astype(np.float64)
+        order = np.argsort(bounds)
+        best, best_row = float('inf'), None
+        start, batch = 0, self.batch_size
+        while start < len(order):
+            candidates = order[start:start + batch]
+            candidates = candidates[bounds[candidates] < best]
+            if len(candidates) == 0:
+                break
+            dists = dtw_distances(query, self.features[candidates], self.radius, best)
+            # Um modelo abandonado passou de best: seu limite fica estritamente acima dele
+            abandoned = np.maximum(bounds[candidates], np.nextafter(best, np.inf))
+            lower[candidates] = np.where(np.isfinite(dists), dists, abandoned)
+            nearest = int(np.argmin(dists))
+            if dists[nearest] < best:
+                best, best_row = float(dists[nearest]), int(candidates[nearest])
+            start += batch
+            batch *= 2
+
+        if best_row is None:
+            return TemplateMatch('?', float('inf'), float('inf'))
+        best_label = self.labels[best_row]
+        # Nenhum modelo fica abaixo do melhor (a folga dos limites não vale como margem negativa)
+        np.maximum(lower, best, out=lower)
+        distancia = float(np.sqrt(best / self.length))
+        others = lower[self.labels != best_label]
+        margem = float(np.sqrt(others.min() / self.length)) - distancia if len(others) else float('inf')
+        letra = best_label if distancia < limiar else '?'
+        return TemplateMatch(letra, distancia, margem)
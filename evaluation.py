@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Avaliação de precisão x latência das configurações de classificação
+
+Roda validação cruzada (leave-one-out ou k-fold estratificado por letra)
+sobre as amostras rotuladas (padrão: landmarks/samples.lbr, ou .json/.lbm) e, se
+houver, sobre as sequências de movimento gravadas (movement_templates.json).
+Para cada configuração (índice de busca e limiar, global ou por letra
+calibrado nos folds de treino) reporta a acurácia, a
+precisão e o recall de cada letra, a matriz de confusão e a latência de
+cada classificação, e indica a configuração mais rápida que não perde
+acurácia em relação à melhor.
+
+Cada classificação também alimenta um PerformanceMonitor
+(record_detection_time e record_detection_result), como no loop da câmera.
+
+Uso:
+    python evaluation.py
+    python evaluation.py --folds 5 --limiares 1.0 1.2 1.5 --indices completo kdtree prototipos:2
+    python evaluation.py --movimentos landmarks/movement_templates.json --saida avaliacao.json
+    python evaluation.py --por-letra --indices completo parcial --gravar-limiares
+"""
+
+import time
+import numpy as np
+from configuracao_avancada import SYSTEM_CONFIG, PerformanceMonitor, calibrate_static_thresholds
+from dynamic_gestures import DTWMatcher
+from gestures import (
+    DEFAULT_LANDMARKS_FILE,
+    LandmarkWindow,
+    TemplateIndex,
+    detect_movement_letter,
+    hand_shape_batch,
+    match_templates,
+    normalize_batch,
+)
+
+# Letra prevista quando nada fica abaixo do limiar
+REJECTED = '?'
+
+INDEX_KINDS = ('completo', 'kdtree', 'prototipos', 'parcial')
+
+# Limiar calibrado por letra (calibrate_static_thresholds) nas amostras de treino de cada fold
+PER_LETTER = 'por-letra'
+
+class Evaluation:
+    """Acumula (letra real, letra prevista, latência) e calcula as métricas"""
+
+    def __init__(self, name=''):
+        self.name = name
+        self.expected = []
+        self.predicted = []
+        self.latencies_ms = []
+
+    def add(self, expected, predicted, elapsed_ms):
+        self.expected.append(expected)
+        self.predicted.append(predicted)
+        self.latencies_ms.append(elapsed_ms)
+
+    def __len__(self):
+        return len(self.expected)
+
+    @property
+    def letters(self):
+        return sorted(set(self.expected) | (set(self.predicted) - {REJECTED}))
+
+    @property
+    def accuracy(self):
+        if not self.expected:
+            return 0.0
+        return float(np.mean([e == p for e, p in zip(self.expected, self.predicted)]))
+
+    @property
+    def rejected(self):
+        """Fração das classificações sem letra ('?')"""
+        if not self.predicted:
+            return 0.0
+        return self.predicted.count(REJECTED) / len(self.predicted)
+
+    def confusion_matrix(self):
+        """(letras, matriz): linhas = letra real, colunas = letras previstas + '?'"""
+        letters = self.letters
+        position = {letra: i for i, letra in enumerate(letters + [REJECTED])}
+        matrix = np.zeros((len(letters), len(letters) + 1), dtype=np.int64)
+        for expected, predicted in zip(self.expected, self.predicted):
+            matrix[position[expected], position[predicted]] += 1
+        return letters, matrix
+
+    def per_letter(self):
+        """{letra: {'precision', 'recall', 'support'}}
+
+        Classificações rejeitadas ('?') contam contra o recall da letra real,
+        mas não contra a precisão de nenhuma letra.
+        """
+        letters, matrix = self.confusion_matrix()
+        metrics = {}
+        for i, letra in enumerate(letters):
+            predicted = matrix[:, i].sum()
+            support = matrix[i].sum()
+            metrics[letra] = {
+                'precision': float(matrix[i, i] / predicted) if predicted else 0.0,
+                'recall': float(matrix[i, i] / support) if support else 0.0,
+                'support': int(support),
+            }
+        return metrics
+
+    def latency(self):
+        """p50/p95/p99 e média da latência por classificação, em microssegundos"""
+        if not self.latencies_ms:
+            return {}
+        times_us = np.array(self.latencies_ms) * 1000
+        return {
+            'p50_us': float(np.percentile(times_us, 50)),
+            'p95_us': float(np.percentile(times_us, 95)),
+            'p99_us': float(np.percentile(times_us, 99)),
+            'mean_us': float(times_us.mean()),
+        }
+
+    def to_dict(self):
+        letters, matrix = self.confusion_matrix()
+        return {
+            'name': self.name,
+            'count': len(self),
+            'accuracy': self.accuracy,
+            'rejected': self.rejected,
+            'latency': self.latency(),
+            'per_letter': self.per_letter(),
+            'confusion': {'letters': letters, 'columns': letters + [REJECTED], 'matrix': matrix.tolist()},
+        }
+
+def fold_indices(labels, folds=0, seed=0):
+    """Divide as posições em folds de teste, cada letra espalhada entre eles
+
+    folds <= 0 (ou >= número de amostras) é leave-one-out.
+    """
+    labels = np.asarray(labels, dtype=object)
+    if folds <= 0 or folds >= len(labels):
+        return [np.array([i]) for i in range(len(labels))]
+    rng = np.random.default_rng(seed)
+    assignment = np.empty(len(labels), dtype=np.intp)
+    offset = 0
+    for letra in dict.fromkeys(labels):
+        rows = rng.permutation(np.flatnonzero(labels == letra))
+        assignment[rows] = (np.arange(len(rows)) + offset) % folds
+        offset += len(rows)
+    return [np.flatnonzero(assignment == fold) for fold in range(folds) if (assignment == fold).any()]
+
+def make_index(kind, template_index, seed=0):
+    """Monta o índice de busca de uma configuração ('completo', 'kdtree', 'prototipos:N' ou 'parcial')"""
+    name, _, option = kind.partition(':')
+    if name == 'completo':
+        return template_index
+    if name == 'kdtree':
+        from spatial_index import KDTreeTemplateIndex
+        return KDTreeTemplateIndex(template_index)
+    if name == 'prototipos':
+        from prototypes import PrototypeIndex
+        return PrototypeIndex(template_index, int(option or 3), seed=seed)
+    if name == 'parcial':
+        from partial_search import PartialDistanceIndex
+        return PartialDistanceIndex(template_index)
+    raise ValueError(f"Índice desconhecido: {kind} (use {', '.join(INDEX_KINDS)})")
+
+def evaluate_static(labels, landmarks, kind='completo', limiar=SYSTEM_CONFIG['static_detection_threshold'],
+                    folds=0, seed=0, monitor=None):
+    """Validação cruzada da classificação estática
+
+    Cada amostra de teste é classificada sozinha (normalização + busca), como
+    detect_letra faz a cada frame, e a latência medida é a dessa chamada.
+
+    Args:
+        labels: Letra de cada amostra (N)
+        landmarks: Amostras cruas (N x 21 x 3)
+        kind: Índice de busca (ver make_index)
+        limiar: Número, dict {letra: limiar} ou PER_LETTER
+        folds: Número de folds (0 = leave-one-out)
+        monitor: PerformanceMonitor alimentado com cada classificação
+    """
+    labels = np.asarray(labels, dtype=object)
+    landmarks = np.asarray(landmarks, dtype=np.float64).reshape(-1, 21, 3)
+    normalized = normalize_batch(landmarks)
+    name = limiar if isinstance(limiar, str) else 'dict' if isinstance(limiar, dict) else f"{limiar:g}"
+    evaluation = Evaluation(f"{kind} limiar={name}")
+    for test in fold_indices(labels, folds, seed):
+        train = np.setdiff1d(np.arange(len(labels)), test)
+        index = make_index(kind, TemplateIndex(labels[train], normalized[train]), seed)
+        fold_limiar = limiar
+        if limiar == PER_LETTER:
+            fold_limiar = calibrate_static_thresholds(labels[train], normalized[train])['static_thresholds']
+        # Uma classificação fora da medição, para a montagem do fold não pesar na primeira latência
+        match_templates(normalized[test[0]], index, fold_limiar)
+        for row in test:
+            start = time.perf_counter()
+            letra = match_templates(normalize_batch(landmarks[row]), index, fold_limiar).letra
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            evaluation.add(labels[row], letra, elapsed_ms)
+            if monitor is not None:
+                monitor.record_detection_time(elapsed_ms)
+                monitor.record_detection_result(letra == labels[row])
+    return evaluation
+
+def _sequences(templates):
+    labels = [letra for letra, samples in templates.items() for _ in samples]
+    windows = [LandmarkWindow(np.asarray(sample['landmarks'], dtype=np.float64), sample.get('timestamps'))
+               for samples in templates.values() for sample in samples]
+    return np.array(labels, dtype=object), windows
+
+def evaluate_movements(templates, method='dtw', limiar=SYSTEM_CONFIG['dynamic_detection_threshold'],
+                       folds=0, seed=0, config=None, monitor=None):
+    """Validação cruzada das letras com movimento sobre sequências rotuladas
+
+    Args:
+        templates: {letra: [{'landmarks', 'timestamps'}]} (load_movement_templates)
+        method: 'dtw' (DTWMatcher treinado nos outros folds) ou 'regras'
+            (forma da mão no último frame + detect_movement_letter, como no
+            HandState; não usa treino)
+        config: Configuração em tempo de execução ('movements' e parâmetros do DTW)
+    """
+    config = config or SYSTEM_CONFIG
+    labels, windows = _sequences(templates)
+    evaluation = Evaluation(f"{method} limiar={limiar:g}" if method == 'dtw' else method)
+    test_folds = fold_indices(labels, folds, seed) if method == 'dtw' else [np.arange(len(labels))]
+    for test in test_folds:
+        matcher = None
+        if method == 'dtw':
+            train = set(range(len(labels))) - set(test.tolist())
+            training = {}
+            for row in sorted(train):
+                training.setdefault(labels[row], []).append(
+                    {'landmarks': windows[row].frames, 'timestamps': windows[row].timestamps})
+            matcher = DTWMatcher(training, config.get('dtw_length', SYSTEM_CONFIG['dtw_length']),
+                                 config.get('dtw_band', SYSTEM_CONFIG['dtw_band']),
+                                 config.get('dtw_pose_weight', SYSTEM_CONFIG['dtw_pose_weight']))
+        elif method != 'regras':
+            raise ValueError(f"Método desconhecido: {method} (use 'dtw' ou 'regras')")
+        for row in test:
+            window = windows[row]
+            start = time.perf_counter()
+            if matcher is not None:
+                letra = matcher.match(window, limiar).letra
+            else:
+                shape = hand_shape_batch(window.frames[-1])[0]
+                moved = shape is not None and detect_movement_letter(window, shape, config.get('movements'))
+                letra = shape if moved else REJECTED
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            evaluation.add(labels[row], letra, elapsed_ms)
+            if monitor is not None:
+                monitor.record_detection_time(elapsed_ms)
+                monitor.record_detection_result(letra == labels[row])
+    return evaluation
+
+def fastest_without_loss(evaluations, tolerance=0.0):
+    """A avaliação de menor latência p50 cuja acurácia fica a até tolerance da melhor"""
+    if not evaluations:
+        return None
+    best = max(evaluation.accuracy for evaluation in evaluations)
+    eligible = [evaluation for evaluation in evaluations if evaluation.accuracy >= best - tolerance - 1e-12]
+    return min(eligible, key=lambda evaluation: evaluation.latency().get('p50_us', float('inf')))
+
+def format_confusion(evaluation):
+    letters, matrix = evaluation.confusion_matrix()
+    columns = letters + [REJECTED]
+    lines = ["      " + "".join(f"{letra:>5s}" for letra in columns)]
+    for letra, row in zip(letters, matrix):
+        lines.append(f"{letra:>5s} " + "".join(f"{count:5d}" for count in row))
+    return "\n".join(lines)
+
+def print_report(title, evaluations, tolerance=0.0, show_matrix=False):
+    print(f"=== {title} ===\n")
+    for evaluation in evaluations:
+        latency = evaluation.latency()
+        print(f"{evaluation.name:32s} acurácia {evaluation.accuracy * 100:6.1f}%  "
+              f"rejeitadas {evaluation.rejected * 100:5.1f}%  "
+              f"p50 {latency.get('p50_us', 0):9.1f} us  p95 {latency.get('p95_us', 0):9.1f} us")
+    chosen = fastest_without_loss(evaluations, tolerance)
+    if chosen is None:
+        return None
+    print(f"\nMais rápida sem perder acurácia: {chosen.name}\n")
+    for letra, metrics in chosen.per_letter().items():
+        print(f"  {letra}: precisão {metrics['precision'] * 100:5.1f}%  recall {metrics['recall'] * 100:5.1f}%  "
+              f"({metrics['support']} amostras)")
+    for evaluation in (evaluations if show_matrix else [chosen]):
+        print(f"\nMatriz de confusão ({evaluation.name}; linhas = letra real):")
+        print(format_confusion(evaluation))
+    print()
+    return chosen
+
+def main():
+    import argparse
+    import json
+    from configuracao_avancada import (
+        DEFAULT_STATIC_CALIBRATION_FILE,
+        PROFILES,
+        load_runtime_config,
+        save_static_calibration,
+    )
+    from dynamic_gestures import load_movement_templates
+    from landmark_store import load_raw
+
+    parser = argparse.ArgumentParser(description="Avalia precisão e latência das configurações de classificação")
+    parser.add_argument('--amostras', default=DEFAULT_LANDMARKS_FILE,
+                        help="Amostras rotuladas (.json, .lbr ou .lbm)")
+    parser.add_argument('--movimentos', help="Sequências de movimento rotuladas (movement_templates.json)")
+    parser.add_argument('--folds', type=int, default=0, help="Número de folds (0 = leave-one-out)")
+    parser.add_argument('--indices', nargs='+', default=['completo', 'kdtree', 'prototipos:2', 'parcial'],
+                        help="Índices avaliados: completo, kdtree, prototipos:N, parcial")
+    parser.add_argument('--limiares', type=float, nargs='+',
+                        help="Limiares estáticos avaliados (padrão: o do perfil)")
+    parser.add_argument('--por-letra', action='store_true',
+                        help="Avalia também limiares por letra calibrados nos folds de treino")
+    parser.add_argument('--gravar-limiares', nargs='?', const=DEFAULT_STATIC_CALIBRATION_FILE,
+                        help="Calibra os limiares por letra com todas as amostras e grava em JSON")
+    parser.add_argument('--limiares-dtw', type=float, nargs='+',
+                        help="Limiares do DTW avaliados (padrão: o do perfil)")
+    parser.add_argument('--tolerancia', type=float, default=0.0,
+                        help="Perda de acurácia aceita na escolha da configuração mais rápida (fração)")
+    parser.add_argument('--matriz', action='store_true', help="Mostra a matriz de confusão de todas as configurações")
+    parser.add_argument('--saida', help="Grava o relatório em JSON")
+    parser.add_argument('--perfil', choices=list(PROFILES),
+                        help="Perfil de configuração (padrão: variável LIBRAS_PERFIL ou 'padrao')")
+    args = parser.parse_args()
+    config = load_runtime_config(args.perfil)
+
+    labels, landmarks = load_raw(args.amostras)
+    report = {'static': [], 'movements': []}
+    evaluations = []
+    limiares = args.limiares or [config['static_detection_threshold']]
+    for kind in args.indices:
+        for limiar in limiares + ([PER_LETTER] if args.por_letra else []):
+            monitor = PerformanceMonitor()
+            evaluation = evaluate_static(labels, landmarks, kind, limiar, args.folds, monitor=monitor)
+            evaluations.append(evaluation)
+            report['static'].append({**evaluation.to_dict(), 'monitor': monitor.get_stats()})
+    chosen = print_report(f"LETRAS ESTÁTICAS ({len(labels)} amostras)", evaluations, args.tolerancia, args.matriz)
+    report['static_choice'] = chosen.name if chosen else None
+    if args.gravar_limiares:
+        calibration = calibrate_static_thresholds(labels, normalize_batch(landmarks))
+        save_static_calibration(calibration, args.gravar_limiares)
+        print(f"Limiares por letra gravados em {args.gravar_limiares}\n")
+
+    if args.movimentos:
+        templates = load_movement_templates(args.movimentos)
+        evaluations = [evaluate_movements(templates, 'regras', config=config)]
+        for limiar in args.limiares_dtw or [config['dynamic_detection_threshold']]:
+            evaluations.append(evaluate_movements(templates, 'dtw', limiar, args.folds, config=config))
+        report['movements'] = [evaluation.to_dict() for evaluation in evaluations]
+        total = sum(len(samples) for samples in templates.values())
+        chosen = print_report(f"LETRAS COM MOVIMENTO ({total} sequências)", evaluations, args.tolerancia,
+                              args.matriz)
+        report['movements_choice'] = chosen.name if chosen else None
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Relatório salvo em {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,53 @@
+import hashlib
 import json
 import math
 import numpy as np
 import os
+import time
+from collections import namedtuple
+from configuracao_avancada import (
+    H_MOVEMENT_CONFIG,
+    J_MOVEMENT_CONFIG,
+    SYSTEM_CONFIG,
+    X_MOVEMENT_CONFIG,
+    Z_MOVEMENT_CONFIG,
+)
+from landmark_store import (
+    DEFAULT_JSON_FILE,
+    DEFAULT_STORE_FILE,
+    SampleStore,
+    ensure_default_store,
+    is_binary_file,
+    is_store_file,
+    open_binary,
+    records_labels,
+)
 
 def load_landmarks(filename):
     with open(filename, 'r') as f:
         data = json.load(f)
     return data
 
-def load_all_landmarks(filename="landmarks/all_landmarks.json"):
+def load_all_landmarks(filename=DEFAULT_JSON_FILE):
     if not os.path.exists(filename) or os.path.getsize(filename) == 0:
         return {}
     with open(filename, 'r') as f:
         return json.load(f)
 
+class _Landmark:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+class HandLandmarks:
+    """Equivalente mínimo do hand_landmarks do MediaPipe a partir de 21 x 3 pontos"""
+
+    __slots__ = ('landmark',)
+
+    def __init__(self, points):
+        self.landmark = [_Landmark(x, y, z) for x, y, z in points]
+
 def extract_landmarks(hand_landmarks):
     return [[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark]
 
@@ -32,98 +66,559 @@ def normalize_landmarks(landmarks):
         arr /= scale
     return arr.tolist()
 
-def detect_letra(hand_landmarks, filename="landmarks/all_landmarks.json"):
+def extract_landmarks_batch(multi_hand_landmarks):
+    """Landmarks de várias mãos do MediaPipe como um array N x 21 x 3"""
+    hands = list(multi_hand_landmarks or [])
+    if not hands:
+        return np.zeros((0, 21, 3))
+    return np.array([extract_landmarks(hand) for hand in hands], dtype=np.float64)
+
+def normalize_batch(landmarks):
+    """normalize_landmarks para um array (... x 21 x 3), sem passar por listas
+
+    Aceita uma mão (21 x 3), várias (N x 21 x 3) ou sequências de várias
+    mãos (T x N x 21 x 3) e retorna o mesmo formato com 2 coordenadas (x, y).
+    """
+    arr = np.asarray(landmarks, dtype=np.float64)[..., :2]
+    arr = arr - arr.mean(axis=-2, keepdims=True)
+    scale = np.linalg.norm(arr, axis=-1).max(axis=-1)
+    scale = np.where(scale > 0, scale, 1.0)
+    return arr / scale[..., None, None]
+
+# Fonte de amostras padrão (criada a partir do all_landmarks.json na primeira vez)
+DEFAULT_LANDMARKS_FILE = DEFAULT_STORE_FILE
+
+def _file_signature(filename):
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class TemplateIndex:
+    """Amostras de referência já normalizadas, carregadas uma única vez
+
+    Guarda todas as amostras em um único array contíguo (K x 21 x 2) com
+    um array paralelo de rótulos, na mesma ordem do arquivo de origem
+    (all_landmarks.json, arquivo de amostras .lbr ou arquivo compacto .lbm,
+    que é usado via memmap sem cópia). Novas amostras são acrescentadas no
+    fim sem renormalizar as anteriores.
+
+    version muda a cada alteração (amostras acrescentadas ou arquivo
+    recarregado) e generation só quando o conteúdo é substituído por
+    inteiro, então índices derivados (KD-tree, protótipos, busca parcial)
+    sabem quando se refazer e se podem só acrescentar as amostras novas.
+    """
+
+    def __init__(self, labels, templates, filename=None, copy=True):
+        labels = np.asarray(labels, dtype=object)
+        self._count = len(labels)
+        self._store_count = len(labels)
+        self.version = 0
+        self.generation = 0
+        self.filename = filename
+        self.check_interval = 1.0
+        self._signature = _file_signature(filename) if filename else None
+        self._last_check = time.monotonic()
+        if not copy:
+            # Usa o array recebido (ex.: memmap) direto; a primeira amostra
+            # acrescentada depois disso leva tudo para um buffer em memória.
+            self._labels = labels
+            self._templates = templates
+            return
+        templates = np.asarray(templates, dtype=np.float64).reshape(-1, 21, 2)
+        capacity = max(16, len(labels))
+        self._labels = np.empty(capacity, dtype=object)
+        self._templates = np.empty((capacity, 21, 2), dtype=np.float64)
+        self._labels[:len(labels)] = labels
+        self._templates[:len(labels)] = templates
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def labels(self):
+        return self._labels[:self._count]
+
+    @property
+    def templates(self):
+        return self._templates[:self._count]
+
+    @classmethod
+    def from_dict(cls, all_landmarks, filename=None):
+        labels = []
+        templates = []
+        for letra, amostras in all_landmarks.items():
+            for ref in amostras:
+                labels.append(letra)
+                templates.append(normalize_landmarks(ref))
+        return cls(labels, templates, filename)
+
+    @classmethod
+    def from_store(cls, filename):
+        records = SampleStore(filename).load()
+        return cls(records_labels(records), normalize_batch(records['landmarks']), filename)
+
+    @classmethod
+    def from_binary(cls, filename):
+        labels, _, normalized = open_binary(filename)
+        return cls(labels, normalized, filename, copy=False)
+
+    @classmethod
+    def load(cls, filename=DEFAULT_LANDMARKS_FILE):
+        ensure_default_store(filename)
+        if is_binary_file(filename):
+            return cls.from_binary(filename)
+        if is_store_file(filename):
+            return cls.from_store(filename)
+        return cls.from_dict(load_all_landmarks(filename), filename)
+
+    def _extend(self, labels, templates):
+        needed = self._count + len(labels)
+        if needed > len(self._labels):
+            capacity = max(needed, 2 * len(self._labels))
+            new_labels = np.empty(capacity, dtype=object)
+            new_templates = np.empty((capacity, 21, 2), dtype=np.float64)
+            new_labels[:self._count] = self.labels
+            new_templates[:self._count] = self.templates
+            self._labels, self._templates = new_labels, new_templates
+        self._labels[self._count:needed] = labels
+        self._templates[self._count:needed] = templates
+        self._count = needed
+        self.version += 1
+
+    def add_sample(self, letra, landmarks):
+        """Acrescenta uma amostra crua (21 x 3) ao índice, normalizando só ela"""
+        self._extend([letra], [normalize_landmarks(landmarks)])
+        self._store_count += 1
+
+    def mark_synced(self):
+        """Registra o estado atual do arquivo como já refletido no índice"""
+        if self.filename:
+            self._signature = _file_signature(self.filename)
+
+    def _replace_with(self, fresh):
+        self._labels, self._templates, self._count = fresh._labels, fresh._templates, fresh._count
+        self._store_count = fresh._store_count
+        self._signature = fresh._signature
+        self.version += 1
+        self.generation += 1
+
+    def refresh(self, force=False):
+        """Recarrega o arquivo se ele mudou (mtime/tamanho) por fora do índice
+
+        A verificação é feita no máximo uma vez a cada check_interval
+        segundos, então pode ser chamada a cada frame. Em arquivos de
+        amostras (.lbr) só os registros novos do fim são lidos. Retorna
+        True se o índice foi atualizado.
+        """
+        if not self.filename:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        signature = _file_signature(self.filename)
+        if signature == self._signature:
+            return False
+
+        store = SampleStore(self.filename) if is_store_file(self.filename) else None
+        if store is not None and len(store) >= self._store_count:
+            records = store.load(offset=self._store_count)
+            self._extend(records_labels(records), normalize_batch(records['landmarks']))
+            self._store_count += len(records)
+            self._signature = signature
+        else:
+            self._replace_with(TemplateIndex.load(self.filename))
+        return True
+
+def template_fingerprint(template_index):
+    """Hash do conteúdo (amostras e rótulos) de um índice, para validar caches em disco"""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(template_index.templates, dtype=np.float64).tobytes())
+    digest.update('\0'.join(map(str, template_index.labels)).encode('utf-8'))
+    return digest.hexdigest()
+
+_template_indexes = {}
+
+def get_template_index(filename=DEFAULT_LANDMARKS_FILE):
+    """Retorna o índice de amostras do arquivo, carregando-o só na primeira vez
+
+    Nas chamadas seguintes o índice em memória é reaproveitado e só é
+    recarregado se o arquivo tiver sido alterado por outro processo.
+    """
+    index = _template_indexes.get(filename)
+    if index is None:
+        index = TemplateIndex.load(filename)
+        _template_indexes[filename] = index
+    else:
+        index.refresh()
+    return index
+
+def notify_sample_saved(letra, landmarks, filename=DEFAULT_LANDMARKS_FILE):
+    """Avisa o índice em cache de que uma amostra foi gravada no arquivo
+
+    A amostra é acrescentada direto na memória, sem reler o arquivo.
+    """
+    index = _template_indexes.get(filename)
+    if index is not None:
+        index.add_sample(letra, landmarks)
+        index.mark_synced()
+
+TemplateMatch = namedtuple('TemplateMatch', ['letra', 'distancia', 'margem'])
+
+# Pares (mão, amostra) por bloco em template_distances: as diferenças temporárias
+# (2 x pares x 21 float64) ficam em ~11 MB, qualquer que seja o número de mãos
+DISTANCE_BLOCK_PAIRS = 1 << 15
+# Distâncias (mãos x amostras) mantidas de uma vez em match_templates (~32 MB)
+MATCH_BLOCK_DISTANCES = 1 << 22
+
+def template_distances(queries, templates, block_pairs=DISTANCE_BLOCK_PAIRS):
+    """Distância (soma das distâncias x/y por ponto) de N mãos contra K amostras
+
+    Mesma métrica de compare_landmarks, calculada por broadcast em blocos de
+    até block_pairs pares (mão, amostra), divididos pelas amostras e, com
+    muitas mãos, também pelas mãos. As coordenadas x e y vão em planos
+    separados (N x 21), o que evita somar sobre um eixo de tamanho 2.
+    Retorna um array N x K.
+    """
+    queries = np.asarray(queries, dtype=np.float64).reshape(-1, 21, 2)
+    templates = np.asarray(templates).reshape(-1, 21, 2)
+    dists = np.empty((len(queries), len(templates)), dtype=np.float64)
+    query_block = max(1, min(len(queries), block_pairs))
+    template_block = max(1, block_pairs // query_block)
+    query_x, query_y = queries[:, None, :, 0], queries[:, None, :, 1]
+    for start in range(0, len(templates), template_block):
+        block = templates[start:start + template_block]
+        block_x = np.ascontiguousarray(block[:, :, 0], dtype=np.float64)[None]
+        block_y = np.ascontiguousarray(block[:, :, 1], dtype=np.float64)[None]
+        for q_start in range(0, len(queries), query_block):
+            rows = slice(q_start, q_start + query_block)
+            dx = query_x[rows] - block_x
+            dy = query_y[rows] - block_y
+            np.multiply(dx, dx, out=dx)
+            np.multiply(dy, dy, out=dy)
+            dx += dy
+            np.sqrt(dx, out=dx)
+            dists[rows, start:start + len(block)] = dx.sum(axis=2)
+    return dists
+
+def letter_threshold(limiar, letra):
+    """Limiar de rejeição da letra
+
+    limiar é um número (o mesmo para todas as letras) ou um dict {letra:
+    limiar} (ex.: 'static_thresholds' de calibrate_static_thresholds); letras
+    fora do dict usam static_detection_threshold.
+    """
+    if isinstance(limiar, dict):
+        return limiar.get(letra, SYSTEM_CONFIG['static_detection_threshold'])
+    return limiar
+
+def static_threshold(config):
+    """Limiar estático da configuração: o dict por letra, se calibrado, ou o global"""
+    return config.get('static_thresholds') or config['static_detection_threshold']
+
+def match_templates(current, index, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+    """Compara mãos normalizadas com todas as amostras do índice de uma vez
+
+    Aceita uma mão (21 x 2) ou várias (N x 21 x 2). Para cada mão retorna um
+    TemplateMatch com a letra ('?' se a menor distância não ficar abaixo do
+    limiar da letra, ver letter_threshold), a menor distância e a margem até
+    a amostra mais próxima de outra letra.
+
+    index pode ser um TemplateIndex ou qualquer objeto com um método
+    match(current, limiar) com o mesmo contrato (ex.: KDTreeTemplateIndex).
+    """
+    search = getattr(index, 'match', None)
+    if search is not None:
+        return search(current, limiar)
+
+    queries = np.asarray(current, dtype=np.float64)
+    single = queries.ndim == 2
+    queries = queries.reshape(-1, 21, 2)
+    if len(index) == 0:
+        results = [TemplateMatch('?', float('inf'), float('inf')) for _ in queries]
+        return results[0] if single else results
+
+    labels = index.labels
+    results = []
+    # Em blocos de mãos, para a matriz de distâncias não crescer com N x K
+    rows = max(1, MATCH_BLOCK_DISTANCES // len(index))
+    for start in range(0, len(queries), rows):
+        dists = template_distances(queries[start:start + rows], index.templates)
+        best = np.argmin(dists, axis=1)
+        min_dists = dists[np.arange(len(dists)), best]
+        margens = np.full(len(dists), np.inf)
+        # Margem: menor distância até outra letra, uma máscara por letra vencedora
+        best_labels = labels[best]
+        for letra in dict.fromkeys(best_labels):
+            winners = np.flatnonzero(best_labels == letra)
+            others = labels != letra
+            if others.any():
+                margens[winners] = np.where(others, dists[winners], np.inf).min(axis=1) - min_dists[winners]
+        for letra, min_dist, margem in zip(best_labels, min_dists, margens):
+            min_dist = float(min_dist)
+            results.append(TemplateMatch(letra if min_dist < letter_threshold(limiar, letra) else '?',
+                                         min_dist, float(margem)))
+    return results[0] if single else results
+
+def detect_letra_match(hand_landmarks, filename=DEFAULT_LANDMARKS_FILE, index=None,
+                       limiar=SYSTEM_CONFIG['static_detection_threshold']):
+    """Como detect_letra, mas retorna o TemplateMatch completo (letra, distância, margem)"""
     current = normalize_landmarks(extract_landmarks(hand_landmarks))
-    all_landmarks = load_all_landmarks(filename)
-    min_dist = float('inf')
-    letra_detectada = '?'
-    limiar = 1.2
-
-    for letra, amostras in all_landmarks.items():
-        for ref in amostras:
-            ref_norm = normalize_landmarks(ref)
-            dist = compare_landmarks(current, ref_norm)
-            if dist < min_dist and dist < limiar:
-                min_dist = dist
-                letra_detectada = letra
-    return letra_detectada
-
-def detect_j_movement(sequence):
+    if index is None:
+        index = get_template_index(filename)
+    return match_templates(current, index, limiar)
+
+def detect_letra(hand_landmarks, filename=DEFAULT_LANDMARKS_FILE, index=None,
+                 limiar=SYSTEM_CONFIG['static_detection_threshold']):
+    return detect_letra_match(hand_landmarks, filename, index, limiar).letra
+
+def classify_static_batch(landmarks, index=None, filename=DEFAULT_LANDMARKS_FILE,
+                          limiar=SYSTEM_CONFIG['static_detection_threshold']):
+    """detect_letra_match para várias mãos (N x 21 x 3) em uma única chamada
+
+    As mãos podem ser de frames diferentes (ex.: reprocessar um vídeo ou um
+    dataset inteiro). Retorna uma lista de TemplateMatch na ordem das mãos.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64).reshape(-1, 21, 3)
+    if len(landmarks) == 0:
+        return []
+    if index is None:
+        index = get_template_index(filename)
+    results = match_templates(normalize_batch(landmarks), index, limiar)
+    return list(results)
+
+class LandmarkWindow:
+    """Trecho da sequência de landmarks (frames e, se houver, seus timestamps)
+
+    Funciona como a lista de frames para os detectores de movimento e
+    expõe duration e index_at para que eles trabalhem por tempo em vez de
+    por número de frames.
+    """
+
+    def __init__(self, frames, timestamps=None):
+        self.frames = frames
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, item):
+        return self.frames[item]
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def trajectory(self, landmark_idx):
+        """Trajetória de um landmark ao longo dos frames (count x 3), sem cópia"""
+        return self.frames[:, landmark_idx]
+
+    @property
+    def duration(self):
+        """Segundos entre o primeiro e o último frame (None sem timestamps)"""
+        if self.timestamps is None or len(self.timestamps) == 0:
+            return None
+        return float(self.timestamps[-1] - self.timestamps[0])
+
+    def index_at(self, fraction):
+        """Índice do frame a esta fração do trecho (por tempo se houver timestamps)"""
+        if self.timestamps is None or len(self.frames) < 2:
+            return int(len(self.frames) * fraction)
+        target = self.timestamps[0] + fraction * (self.timestamps[-1] - self.timestamps[0])
+        return min(int(np.searchsorted(self.timestamps, target)), len(self.frames) - 1)
+
+class LandmarkRingBuffer:
+    """Buffer circular de capacidade fixa para a sequência de landmarks (N x 21 x 3)
+
+    Cada frame é gravado duas vezes (posição p e p + capacidade), então os
+    últimos frames estão sempre em um trecho contíguo do array: push é O(1)
+    e view()/trajectory() devolvem visões ordenadas sem cópia. Indexação e
+    iteração funcionam como em uma lista de frames, então os detectores de
+    movimento aceitam tanto listas quanto este buffer.
+
+    O timestamp de captura de cada frame é guardado junto (NaN se não for
+    informado); since() devolve só os frames de uma janela de tempo.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, 21, 3), dtype=np.float32)
+        self._times = np.full(2 * capacity, np.nan)
+        self._next = 0
+        self._count = 0
+
+    def push(self, landmarks, timestamp=None):
+        """Acrescenta um frame (21 x 3), descartando o mais antigo se estiver cheio"""
+        self._data[self._next] = landmarks
+        self._data[self._next + self.capacity] = self._data[self._next]
+        self._times[self._next] = self._times[self._next + self.capacity] = (
+            np.nan if timestamp is None else timestamp)
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def view(self):
+        """Frames em ordem cronológica (count x 21 x 3), sem cópia"""
+        start = self._next - self._count + self.capacity
+        return self._data[start:start + self._count]
+
+    def timestamps(self):
+        """Timestamps em ordem cronológica (count), sem cópia"""
+        start = self._next - self._count + self.capacity
+        return self._times[start:start + self._count]
+
+    def trajectory(self, landmark_idx):
+        """Trajetória de um landmark ao longo dos frames (count x 3), sem cópia"""
+        return self.view()[:, landmark_idx]
+
+    @property
+    def duration(self):
+        return self.last(self._count).duration
+
+    def index_at(self, fraction):
+        return self.last(self._count).index_at(fraction)
+
+    def last(self, count):
+        """Os últimos count frames como um LandmarkWindow"""
+        count = min(count, self._count)
+        times = self.timestamps()[self._count - count:]
+        return LandmarkWindow(self.view()[self._count - count:],
+                              None if count == 0 or np.isnan(times).any() else times)
+
+    def since(self, timestamp):
+        """Frames capturados a partir de timestamp, como um LandmarkWindow"""
+        times = self.timestamps()
+        start = int(np.searchsorted(times, timestamp)) if self._count else 0
+        return LandmarkWindow(self.view()[start:], times[start:])
+
+    def __getitem__(self, item):
+        return self.view()[item]
+
+    def __iter__(self):
+        return iter(self.view())
+
+def _trajectory(sequence, landmark_idx):
+    if isinstance(sequence, (LandmarkRingBuffer, LandmarkWindow)):
+        return sequence.trajectory(landmark_idx)
+    return [frame[landmark_idx] for frame in sequence]
+
+def _is_timed(sequence):
+    return getattr(sequence, 'duration', None) is not None
+
+def _long_enough(sequence, config):
+    """min_duration (segundos) se a sequência tiver timestamps, senão min_sequence_length (frames)"""
+    if _is_timed(sequence) and 'min_duration' in config:
+        return len(sequence) >= 2 and sequence.duration >= config['min_duration']
+    return len(sequence) >= config['min_sequence_length']
+
+def detect_j_movement(sequence, config=J_MOVEMENT_CONFIG):
     """Detecta movimento da letra J - movimento em gancho para baixo e esquerda"""
-    if len(sequence) < 5:
+    if not _long_enough(sequence, config):
         return False
 
-    start = sequence[0][20]
-    end = sequence[-1][20]
+    pinky = _trajectory(sequence, config['landmark_index'])
+    start = pinky[0]
+    end = pinky[-1]
 
-    moved_down = end[1] > start[1] + 0.05 
-    moved_left = end[0] < start[0] - 0.02
+    moved_down = end[1] > start[1] + config['down_threshold']
+    moved_left = end[0] < start[0] - config['left_threshold']
     
-    return moved_down and moved_left
+    return bool(moved_down and moved_left)
 
-def detect_h_movement(sequence):
+def detect_h_movement(sequence, config=H_MOVEMENT_CONFIG):
     """Detecta movimento da letra H - movimento horizontal da direita para esquerda"""
-    if len(sequence) < 5:
+    if not _long_enough(sequence, config):
         return False
-    start_index = sequence[0][8]
-    end_index = sequence[-1][8]
-    start_middle = sequence[0][12]
-    end_middle = sequence[-1][12]
-    index_moved_left = end_index[0] < start_index[0] - 0.08
-    middle_moved_left = end_middle[0] < start_middle[0] - 0.08
-    index_stable_y = abs(end_index[1] - start_index[1]) < 0.05
-    middle_stable_y = abs(end_middle[1] - start_middle[1]) < 0.05
+    index_idx, middle_idx = config['landmark_indices']
+    index = _trajectory(sequence, index_idx)
+    middle = _trajectory(sequence, middle_idx)
+    start_index = index[0]
+    end_index = index[-1]
+    start_middle = middle[0]
+    end_middle = middle[-1]
+    horizontal = config['horizontal_threshold']
+    stability = config['vertical_stability']
+    index_moved_left = end_index[0] < start_index[0] - horizontal
+    middle_moved_left = end_middle[0] < start_middle[0] - horizontal
+    index_stable_y = abs(end_index[1] - start_index[1]) < stability
+    middle_stable_y = abs(end_middle[1] - start_middle[1]) < stability
     
-    return index_moved_left and middle_moved_left and index_stable_y and middle_stable_y
+    return bool(index_moved_left and middle_moved_left and index_stable_y and middle_stable_y)
+
+def detect_z_movement(sequence, config=Z_MOVEMENT_CONFIG):
+    """Detecta movimento da letra Z - movimento em zigue-zague
 
-def detect_z_movement(sequence):
-    """Detecta movimento da letra Z - movimento em zigue-zague"""
-    if len(sequence) < 8:
+    Com timestamps, a sequência é dividida em terços de tempo em vez de
+    terços de frames.
+    """
+    if not _long_enough(sequence, config):
         return False
-    points = [frame[8] for frame in sequence]
-    third = len(points) // 3
-    
-    if third < 2:
+    points = _trajectory(sequence, config['landmark_index'])
+    if _is_timed(sequence):
+        third, two_thirds = sequence.index_at(1 / 3), sequence.index_at(2 / 3)
+    else:
+        third = len(points) // 3
+        two_thirds = 2 * third
+
+    if third < 2 or two_thirds <= third or two_thirds >= len(points) - 1:
         return False
 
+    diagonal = config['diagonal_threshold']
+    horizontal = config['horizontal_threshold']
+    tolerance = config['vertical_tolerance']
     start1 = points[0]
     end1 = points[third]
-    diagonal_down_right = (end1[0] > start1[0] + 0.03) and (end1[1] > start1[1] + 0.03)
+    diagonal_down_right = (end1[0] > start1[0] + diagonal) and (end1[1] > start1[1] + diagonal)
     start2 = points[third]
-    end2 = points[2 * third]
-    horizontal_left = (end2[0] < start2[0] - 0.05) and (abs(end2[1] - start2[1]) < 0.03)
-    start3 = points[2 * third]
+    end2 = points[two_thirds]
+    horizontal_left = (end2[0] < start2[0] - horizontal) and (abs(end2[1] - start2[1]) < tolerance)
+    start3 = points[two_thirds]
     end3 = points[-1]
-    diagonal_down_right2 = (end3[0] > start3[0] + 0.03) and (end3[1] > start3[1] + 0.03)
+    diagonal_down_right2 = (end3[0] > start3[0] + diagonal) and (end3[1] > start3[1] + diagonal)
     
-    return diagonal_down_right and horizontal_left and diagonal_down_right2
+    return bool(diagonal_down_right and horizontal_left and diagonal_down_right2)
 
-def detect_x_movement(sequence):
+def detect_x_movement(sequence, config=X_MOVEMENT_CONFIG):
     """Detecta movimento da letra X - movimento de gancho pequeno"""
-    if len(sequence) < 4:
+    if not _long_enough(sequence, config):
         return False
-    start = sequence[0][8]
-    end = sequence[-1][8]
-    middle_idx = len(sequence) // 2
-    middle = sequence[middle_idx][8]
-    moved_down = middle[1] > start[1] + 0.02
-    moved_up = end[1] < middle[1] - 0.01
-    horizontal_stable = abs(end[0] - start[0]) < 0.03
+    index = _trajectory(sequence, config['landmark_index'])
+    start = index[0]
+    end = index[-1]
+    middle_idx = sequence.index_at(1 / 2) if _is_timed(sequence) else len(sequence) // 2
+    middle = index[middle_idx]
+    moved_down = middle[1] > start[1] + config['down_threshold']
+    moved_up = end[1] < middle[1] - config['up_threshold']
+    horizontal_stable = abs(end[0] - start[0]) < config['horizontal_tolerance']
     
-    return moved_down and moved_up and horizontal_stable
-
-def detect_movement_letter(sequence, letter_type):
-    """Função principal para detectar letras que requerem movimento"""
-    if letter_type == 'J':
-        return detect_j_movement(sequence)
-    elif letter_type == 'H':
-        return detect_h_movement(sequence)
-    elif letter_type == 'Z':
-        return detect_z_movement(sequence)
-    elif letter_type == 'X':
-        return detect_x_movement(sequence)
-    else:
+    return bool(moved_down and moved_up and horizontal_stable)
+
+MOVEMENT_DETECTORS = {
+    'J': detect_j_movement,
+    'H': detect_h_movement,
+    'Z': detect_z_movement,
+    'X': detect_x_movement,
+}
+
+def detect_movement_letter(sequence, letter_type, movement_configs=None):
+    """Função principal para detectar letras que requerem movimento
+
+    movement_configs é o dicionário 'movements' da configuração em tempo de
+    execução; sem ele cada detector usa o seu *_MOVEMENT_CONFIG.
+    """
+    detector = MOVEMENT_DETECTORS.get(letter_type)
+    if detector is None:
         return False
+    if movement_configs and letter_type in movement_configs:
+        return detector(sequence, movement_configs[letter_type])
+    return detector(sequence)
 
 def get_hand_shape_for_movement(hand_landmarks):
     """Identifica a forma da mão para determinar qual movimento detectar"""
@@ -156,3 +651,21 @@ def get_hand_shape_for_movement(hand_landmarks):
         return 'Z'
     
     return None
+
+_HAND_SHAPES = np.array([None, 'J', 'H', 'Z'], dtype=object)
+
+def hand_shape_batch(landmarks):
+    """get_hand_shape_for_movement para várias mãos (N x 21 x 3)
+
+    Retorna um array de objetos com 'J', 'H', 'Z' ou None para cada mão.
+    """
+    y = np.asarray(landmarks, dtype=np.float64).reshape(-1, 21, 3)[:, :, 1]
+    index_extended = y[:, 8] < y[:, 6]
+    middle_extended = y[:, 12] < y[:, 10]
+    ring_closed = y[:, 16] > y[:, 14]
+    pinky_closed = y[:, 20] > y[:, 18]
+
+    j_shape = (y[:, 20] < y[:, 19]) & (y[:, 8] > y[:, 6]) & (y[:, 12] > y[:, 10]) & ring_closed
+    h_shape = index_extended & middle_extended & ring_closed & pinky_closed
+    z_shape = index_extended & (y[:, 12] > y[:, 10]) & ring_closed & pinky_closed
+    return _HAND_SHAPES[np.select([j_shape, h_shape, z_shape], [1, 2, 3], 0)]
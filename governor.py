@@ -0,0 +1,131 @@
+"""
+Governador adaptativo de qualidade para manter o FPS alvo
+
+Observa o tempo de processamento de cada frame e sobe ou desce um nível de
+degradação: reduz a resolução do frame entregue ao MediaPipe, processa só
+parte dos frames (os demais reaproveitam os últimos landmarks) e alterna entre
+os perfis 'precisao', 'padrao' e 'performance' de configuracao_avancada.
+
+As decisões dependem apenas da sequência de tempos informados a update(),
+sem relógio interno, então uma mesma sequência (ex.: tempos gravados de um
+vídeo reproduzido) sempre leva aos mesmos níveis.
+"""
+
+from collections import namedtuple
+
+GovernorLevel = namedtuple('GovernorLevel', ['scale', 'frame_step', 'profile'])
+
+DEFAULT_LEVELS = (
+    GovernorLevel(1.0, 1, 'precisao'),
+    GovernorLevel(1.0, 1, 'padrao'),
+    GovernorLevel(0.75, 1, 'performance'),
+    GovernorLevel(0.5, 1, 'performance'),
+    GovernorLevel(0.5, 2, 'performance'),
+    GovernorLevel(0.5, 3, 'performance'),
+)
+
+class FrameGovernor:
+    """Escolhe o nível de qualidade a partir do tempo de processamento por frame
+
+    Cada nível é julgado pelo custo médio por frame que teria: o tempo dos
+    frames que passaram pelo MediaPipe dividido pelo frame_step do nível (mais
+    o tempo dos frames reaproveitados), com o tempo de inferência ajustado pela
+    área do frame (escala ao quadrado). Assim um nível que pula frames não
+    parece barato o bastante para voltar ao anterior, que estouraria de novo o
+    orçamento.
+
+    Args:
+        target_fps: FPS que se quer manter
+        levels: Níveis do mais preciso ao mais leve
+        start_level: Nível inicial (padrão: o de perfil 'padrao')
+        window: Frames usados em cada média de tempo
+        upgrade_ratio: Só volta a um nível mais preciso se o custo previsto
+            para ele estiver abaixo desta fração do orçamento
+        min_windows: Janelas seguidas no nível antes de voltar a um mais
+            preciso; dobra (até max_windows) quando a volta precisa ser
+            desfeita na janela seguinte
+    """
+
+    def __init__(self, target_fps=30.0, levels=DEFAULT_LEVELS, start_level=1,
+                 window=15, upgrade_ratio=0.6, min_windows=2, max_windows=32):
+        self.budget_ms = 1000.0 / target_fps
+        self.levels = levels
+        self.level = start_level
+        self.window = window
+        self.upgrade_ratio = upgrade_ratio
+        self.min_windows = min_windows
+        self.max_windows = max_windows
+        self.upgrade_windows = min_windows
+        self._windows_at_level = 0
+        self._just_upgraded = False
+        self._inferred = []
+        self._skipped = []
+        self.frame_index = 0
+
+    @property
+    def current(self):
+        return self.levels[self.level]
+
+    @property
+    def scale(self):
+        return self.current.scale
+
+    @property
+    def profile(self):
+        return self.current.profile
+
+    def should_infer(self):
+        """True se o frame atual deve passar pelo MediaPipe (os outros reaproveitam o último)"""
+        return self.frame_index % self.current.frame_step == 0
+
+    def projected_ms(self, level):
+        """Custo médio por frame previsto para um nível, a partir da janela atual"""
+        if not self._inferred:
+            return 0.0
+        infer_ms = sum(self._inferred) / len(self._inferred)
+        skip_ms = sum(self._skipped) / len(self._skipped) if self._skipped else 0.0
+        target = self.levels[level]
+        infer_ms *= (target.scale / self.current.scale) ** 2
+        return (infer_ms + (target.frame_step - 1) * skip_ms) / target.frame_step
+
+    def update(self, frame_time_ms):
+        """Informa o tempo gasto no frame atual e avança para o próximo
+
+        frame_time_ms é o tempo do frame inteiro; should_infer() diz se ele
+        passou pelo MediaPipe ou reaproveitou o anterior. Retorna True se o
+        nível mudou.
+        """
+        (self._inferred if self.should_infer() else self._skipped).append(frame_time_ms)
+        self.frame_index += 1
+        if len(self._inferred) + len(self._skipped) < self.window:
+            return False
+
+        self._windows_at_level += 1
+        changed = False
+        if self.projected_ms(self.level) > self.budget_ms and self.level < len(self.levels) - 1:
+            if self._just_upgraded:
+                # A volta ao nível mais preciso não se sustentou: espera mais antes da próxima
+                self.upgrade_windows = min(2 * self.upgrade_windows, self.max_windows)
+            self.level += 1
+            self._just_upgraded = False
+            changed = True
+        elif (self.level > 0 and self._windows_at_level >= self.upgrade_windows
+              and self.projected_ms(self.level - 1) < self.budget_ms * self.upgrade_ratio):
+            self.level -= 1
+            self._just_upgraded = True
+            changed = True
+        else:
+            if self._just_upgraded:
+                self.upgrade_windows = self.min_windows
+            self._just_upgraded = False
+        if changed:
+            self._windows_at_level = 0
+        self._inferred = []
+        self._skipped = []
+        return changed
+
+    def status(self):
+        """Texto curto do nível atual para exibir na tela"""
+        level = self.current
+        return (f"Nivel {self.level}: escala {level.scale:.2f}, "
+                f"1/{level.frame_step} frames, {level.profile}")
@@ -0,0 +1,375 @@
+"""
+Estado de classificação de cada mão ao longo dos frames
+
+Reúne a sequência de landmarks, o contador de confirmação de movimento e a
+decisão entre letra com movimento e letra estática, para que o mesmo código
+rode no loop da câmera ou em um worker separado. HandTracker mantém um estado
+separado para cada mão, para que as trajetórias de duas mãos no mesmo frame
+não se misturem.
+"""
+
+from collections import namedtuple
+from contextlib import nullcontext
+import numpy as np
+from configuracao_avancada import get_runtime_config
+from gestures import (
+    LandmarkRingBuffer,
+    classify_static_batch,
+    detect_letra_match,
+    detect_movement_letter,
+    extract_landmarks,
+    extract_landmarks_batch,
+    get_hand_shape_for_movement,
+    static_threshold,
+)
+from letter_stream import LetterDebouncer
+from movement_stream import MovementStream
+
+HandResult = namedtuple('HandResult', ['letra', 'hand_shape', 'movement_detected', 'movement_counter', 'distancia'])
+
+def movement_points(movements):
+    """Punho e pontos seguidos pelos detectores de movimento"""
+    points = {0}
+    for movement in (movements or {}).values():
+        points.update(movement.get('landmark_indices', [movement.get('landmark_index', 0)]))
+    return sorted(points)
+
+def index_version(template_index):
+    """version do índice de amostras (muda a cada recarga, mesmo com o mesmo número de amostras)"""
+    return template_index.version if template_index is not None else None
+
+def trajectory_extent(window, points):
+    """Maior deslocamento (x ou y) de um dos pontos dentro da janela"""
+    if len(window) < 2:
+        return 0.0
+    return float(np.ptp(window.frames[:, points, :2], axis=0).max())
+
+class HandState:
+    """Sequência de landmarks e confirmação de movimento de uma mão
+
+    Com 'streaming_movements' na configuração, os movimentos vêm dos
+    detectores incrementais de MovementStream em vez de reavaliar a
+    sequência inteira; movement_events guarda os gestos encerrados no último
+    frame. Os gestos em andamento são descartados (e os detectados,
+    encerrados) quando a mão some por movement_reset_frames frames ou volta
+    depois de mais que sequence_duration, para que o começo de um J antes da
+    falha não se complete com o fim de outro gesto. Com um movement_matcher (DTWMatcher), a janela também é comparada
+    com os modelos de movimento gravados; como o DTW já compara o gesto
+    inteiro, uma letra encontrada por ele não espera a confirmação usada
+    pelas regras de J/H/Z/X.
+
+    Com 'letter_events', a letra de cada frame também passa por um
+    LetterDebouncer; letter_events guarda os LetterEvent emitidos no último
+    frame e letter_stream.letra é a letra estável atual.
+
+    Com 'motion_gate', uma mão cujos pontos se deslocaram no máximo
+    motion_gate_tolerance desde a última comparação estática reaproveita a
+    forma e a letra estática daquela comparação (até motion_gate_max_reuse
+    frames seguidos, ou até a version do índice de amostras mudar, o que
+    acontece a cada recarga ou amostra nova); static_reused conta esses
+    frames. A busca de movimento (regras, detectores incrementais ou
+    DTW) só roda quando algum ponto seguido se desloca na janela mais que
+    movement_energy_threshold; os detectores incrementais continuam
+    recebendo todos os frames.
+    """
+
+    def __init__(self, config=None, monitor=None, movement_matcher=None):
+        self.config = config or get_runtime_config()
+        self.movement_matcher = movement_matcher
+        self.sequence_length = self.config['sequence_length']
+        self.confirmation_frames = self.config['movement_confirmation_frames']
+        self.monitor = monitor
+        self.landmarks_sequence = LandmarkRingBuffer(
+            max(self.sequence_length, self.config['max_sequence_frames']))
+        self.movement_stream = None
+        if self.config.get('streaming_movements'):
+            self.movement_stream = MovementStream(self.config.get('movements'),
+                                                  self.config['movement_window_frames'],
+                                                  self.config['movement_window_duration'])
+        self.movement_events = []
+        self.letter_stream = LetterDebouncer.from_config(self.config) if self.config.get('letter_events') else None
+        self.letter_events = []
+        self.movement_detected = False
+        self.movement_letter = None
+        self.movement_counter = 0
+        self.movement_time = 0.0
+        self.last_timestamp = None
+        self.last_seen_time = None
+        self.last_letter = None
+        self.last_wrist = None
+        self.missing_frames = 0
+        self.motion_points = movement_points(self.config.get('movements'))
+        self.static_reused = 0
+        self._gate_landmarks = None
+        self._gate_shape = None
+        self._gate_match = None
+        self._gate_version = None
+        self._gate_reuse = 0
+
+    def _stage(self, name):
+        return self.monitor.stage(name) if self.monitor else nullcontext()
+
+    def steady(self, landmarks, template_index=None):
+        """Se a classificação estática anterior ainda vale para estes landmarks (21 x 3)"""
+        if not self.config.get('motion_gate') or self._gate_match is None:
+            return False
+        if self._gate_reuse >= self.config['motion_gate_max_reuse']:
+            return False
+        if self._gate_version != index_version(template_index):
+            return False
+        displacement = np.abs(np.asarray(landmarks)[:, :2] - self._gate_landmarks).max()
+        return displacement <= self.config['motion_gate_tolerance']
+
+    def _remember_static(self, landmarks, hand_shape, match, template_index):
+        self._gate_landmarks = np.array(landmarks)[:, :2]
+        self._gate_shape = hand_shape
+        self._gate_match = match
+        self._gate_version = index_version(template_index)
+        self._gate_reuse = 0
+
+    def update(self, hand_landmarks, template_index=None, static_match=None, timestamp=None):
+        """Acrescenta o frame atual à sequência e classifica a mão
+
+        Se houver um PerformanceMonitor, registra o tempo das etapas
+        shape_detection, movement_detection e static_matching. static_match
+        é o TemplateMatch já calculado para esta mão (ex.: em lote pelo
+        HandTracker); sem ele a comparação estática é feita aqui.
+
+        Com timestamp (segundos, ex.: momento da captura), a janela de
+        movimento e a confirmação são medidas em tempo (sequence_duration,
+        min_movement_time, movement_confirmation_time), então não mudam com o
+        FPS nem quando frames são pulados; sem ele são contadas em frames.
+
+        Se a mão estiver parada (steady), static_match é ignorado e a
+        classificação estática anterior é reaproveitada.
+        """
+        landmarks = extract_landmarks(hand_landmarks)
+        self.landmarks_sequence.push(landmarks, timestamp)
+        self.last_wrist = landmarks[0]
+        self.missing_frames = 0
+        elapsed = self._elapsed(timestamp)
+        steady = self.steady(landmarks, template_index)
+
+        detected_letter = None
+        distancia = None
+        if steady:
+            hand_shape = self._gate_shape
+        else:
+            with self._stage('shape_detection'):
+                hand_shape = get_hand_shape_for_movement(hand_landmarks)
+        if self.movement_stream:
+            with self._stage('movement_detection'):
+                events = self._reset_movements() if self._gap(timestamp) else []
+                self.movement_events = events + self.movement_stream.update(landmarks, timestamp)
+        self.last_seen_time = timestamp
+
+        if timestamp is None:
+            window = self.landmarks_sequence.last(self.sequence_length)
+            ready = len(window) >= self.config['min_movement_frames']
+        else:
+            window = self.landmarks_sequence.since(timestamp - self.config['sequence_duration'])
+            ready = window.duration >= self.config['min_movement_time']
+        if ready and self.config.get('motion_gate'):
+            ready = trajectory_extent(window, self.motion_points) >= self.config['movement_energy_threshold']
+        candidate, moved, dynamic = hand_shape, False, False
+        if ready and self.movement_matcher:
+            with self._stage('dynamic_matching'):
+                match = self.movement_matcher.match(window, self.config['dynamic_detection_threshold'])
+            if match.letra != '?':
+                candidate, moved, dynamic = match.letra, True, True
+        if candidate and ready:
+            if not moved:
+                if self.movement_stream:
+                    moved = self.movement_stream.detected(hand_shape)
+                else:
+                    with self._stage('movement_detection'):
+                        moved = detect_movement_letter(window, hand_shape, self.config['movements'])
+            if moved:
+                if self.movement_letter == candidate:
+                    self.movement_counter += 1
+                    self.movement_time += elapsed
+                else:
+                    self.movement_letter = candidate
+                    self.movement_counter = 1
+                    self.movement_time = elapsed
+
+                if dynamic or self._confirmed(timestamp):
+                    detected_letter = candidate
+                    self.movement_detected = True
+            else:
+                if self.movement_letter == candidate:
+                    self._decay(elapsed)
+        else:
+            self._decay(elapsed)
+        if not detected_letter:
+            if steady:
+                match = self._gate_match
+                self._gate_reuse += 1
+                self.static_reused += 1
+            else:
+                match = static_match
+                if match is None:
+                    with self._stage('static_matching'):
+                        match = detect_letra_match(hand_landmarks, index=template_index,
+                                                   limiar=static_threshold(self.config))
+                self._remember_static(landmarks, hand_shape, match, template_index)
+            detected_letter, distancia = match.letra, match.distancia
+            self.movement_detected = False
+
+        self.last_letter = detected_letter
+        if self.letter_stream:
+            self.letter_events = self.letter_stream.update(detected_letter, timestamp)
+        return HandResult(detected_letter, hand_shape, self.movement_detected,
+                          self.movement_counter, distancia)
+
+    def _elapsed(self, timestamp):
+        """Segundos desde o frame anterior desta mão (0 sem timestamps)"""
+        elapsed = 0.0
+        if timestamp is not None and self.last_timestamp is not None:
+            elapsed = max(0.0, timestamp - self.last_timestamp)
+        self.last_timestamp = timestamp
+        return elapsed
+
+    def _confirmed(self, timestamp):
+        if timestamp is None:
+            return self.movement_counter >= self.confirmation_frames
+        return self.movement_time >= self.config['movement_confirmation_time']
+
+    def _decay(self, elapsed):
+        self.movement_counter = max(0, self.movement_counter - 1)
+        self.movement_time = max(0.0, self.movement_time - elapsed)
+
+    def _gap(self, timestamp):
+        """Se passou mais que sequence_duration desde o último frame com a mão"""
+        return (timestamp is not None and self.last_seen_time is not None
+                and timestamp - self.last_seen_time > self.config['sequence_duration'])
+
+    def _reset_movements(self):
+        """Encerra os gestos dos detectores incrementais; retorna os que estavam detectados"""
+        return self.movement_stream.finish() if self.movement_stream else []
+
+    def missing(self, timestamp=None):
+        """Atualiza o estado em um frame sem mão detectada"""
+        self._decay(self._elapsed(timestamp))
+        self.movement_detected = False
+        self.missing_frames += 1
+        self.movement_events = []
+        if self.missing_frames >= self.config['movement_reset_frames'] or self._gap(timestamp):
+            self.movement_events = self._reset_movements()
+        if self.letter_stream:
+            self.letter_events = self.letter_stream.update(None, timestamp)
+
+def handedness_labels(multi_handedness):
+    """Extrai 'Left'/'Right' do multi_handedness do MediaPipe (None se ausente)"""
+    if not multi_handedness:
+        return None
+    return [handedness.classification[0].label for handedness in multi_handedness]
+
+class HandTracker:
+    """Um HandState por mão, identificado pela lateralidade do MediaPipe
+
+    Mãos com a mesma lateralidade no mesmo frame (ex.: dois sinalizadores)
+    recebem chaves 'Right', 'Right#2', ... e são associadas ao estado cuja
+    última posição do punho estiver mais próxima. Estados sem mão por mais de
+    max_missing_frames frames são descartados. A comparação estática das
+    mãos do frame é feita em lote, com uma única chamada a
+    classify_static_batch, só para as mãos que não estão paradas.
+
+    Os LetterEvent emitidos no último frame ficam em letter_events, como
+    (chave, evento), e são passados a on_letter(chave, evento) se informado.
+    """
+
+    def __init__(self, max_missing_frames=30, on_letter=None, **state_options):
+        self.max_missing_frames = max_missing_frames
+        self.on_letter = on_letter
+        self.state_options = state_options
+        self.states = {}
+        self.letter_events = []
+
+    def _assign(self, label, wrists):
+        """Associa cada punho de uma mesma lateralidade a uma chave de estado"""
+        keys = [key for key in self.states if key.split('#')[0] == label]
+        pairs = sorted(
+            (abs(wrist[0] - self.states[key].last_wrist[0]) + abs(wrist[1] - self.states[key].last_wrist[1]), i, key)
+            for i, wrist in enumerate(wrists)
+            for key in keys if self.states[key].last_wrist is not None
+        )
+        assigned = {}
+        used = set()
+        for _, i, key in pairs:
+            if i not in assigned and key not in used:
+                assigned[i] = key
+                used.add(key)
+        for i in range(len(wrists)):
+            if i in assigned:
+                continue
+            key, n = label, 1
+            while key in self.states or key in used:
+                n += 1
+                key = f"{label}#{n}"
+            assigned[i] = key
+            used.add(key)
+        return assigned
+
+    def _classify_static(self, points, template_index):
+        """Comparação estática das mãos (N x 21 x 3) em uma única chamada"""
+        if not len(points):
+            return []
+        config = self.state_options.get('config') or get_runtime_config()
+        monitor = self.state_options.get('monitor')
+        with monitor.stage('static_matching') if monitor else nullcontext():
+            return classify_static_batch(points, template_index, limiar=static_threshold(config))
+
+    def update(self, multi_hand_landmarks, labels=None, template_index=None, timestamp=None):
+        """Classifica as mãos do frame, cada uma com seu próprio estado
+
+        Args:
+            multi_hand_landmarks: Mãos detectadas no frame (pode ser vazio/None)
+            labels: Lateralidade de cada mão ('Left'/'Right'); sem ela todas
+                as mãos são tratadas como 'Hand' e separadas pela posição
+            template_index: TemplateIndex usado na detecção estática
+            timestamp: Momento da captura do frame, em segundos (ativa as
+                janelas de movimento por tempo)
+
+        Returns:
+            Lista de (chave, hand_landmarks, HandResult) na ordem das mãos
+        """
+        hands = list(multi_hand_landmarks or [])
+        labels = labels or ['Hand'] * len(hands)
+
+        keys = [None] * len(hands)
+        for label in set(labels):
+            indices = [i for i, hand_label in enumerate(labels) if hand_label == label]
+            wrists = [(hands[i].landmark[0].x, hands[i].landmark[0].y) for i in indices]
+            for j, key in self._assign(label, wrists).items():
+                keys[indices[j]] = key
+
+        states = []
+        for key in keys:
+            if key not in self.states:
+                self.states[key] = HandState(**self.state_options)
+            states.append(self.states[key])
+
+        points = extract_landmarks_batch(hands)
+        moving = [i for i, state in enumerate(states) if not state.steady(points[i], template_index)]
+        matches = [None] * len(hands)
+        for i, match in zip(moving, self._classify_static(points[moving], template_index)):
+            matches[i] = match
+
+        classified = []
+        for key, state, hand_landmarks, match in zip(keys, states, hands, matches):
+            classified.append((key, hand_landmarks, state.update(hand_landmarks, template_index, match, timestamp)))
+
+        seen = set(keys)
+        for key in list(self.states):
+            if key not in seen:
+                self.states[key].missing(timestamp)
+
+        self.letter_events = [(key, event) for key, state in self.states.items() for event in state.letter_events]
+        if self.on_letter:
+            for key, event in self.letter_events:
+                self.on_letter(key, event)
+        for key in list(self.states):
+            if self.states[key].missing_frames > self.max_missing_frames:
+                del self.states[key]
+        return classified
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Armazenamento das amostras de landmarks
+
+Dois formatos binários:
+
+- Arquivo de amostras (.lbr), append-only: cada amostra é gravada como um
+  registro de tamanho fixo (letra, timestamp e 21 x 3 floats) no fim do
+  arquivo, então salvar custa o mesmo independente do tamanho do dataset. Um
+  registro incompleto no fim do arquivo (processo interrompido no meio da
+  escrita) é simplesmente ignorado na leitura.
+- Arquivo compacto (.lbm), somente leitura: blocos contíguos float32 N x 21 x 3
+  (crus) e N x 21 x 2 (normalizados) mais uma tabela de letras, abertos com
+  numpy.memmap sem nenhum parsing.
+"""
+
+import json
+import os
+import time
+import numpy as np
+
+DEFAULT_STORE_FILE = "landmarks/samples.lbr"
+# Amostras no formato antigo, importadas para DEFAULT_STORE_FILE na primeira vez
+DEFAULT_JSON_FILE = "landmarks/all_landmarks.json"
+STORE_EXTENSION = ".lbr"
+
+MAGIC = b"LBRS"
+VERSION = 1
+HEADER_SIZE = 8
+
+RECORD_DTYPE = np.dtype([
+    ('letra', 'S8'),
+    ('timestamp', '<f8'),
+    ('landmarks', '<f4', (21, 3)),
+])
+
+def _header():
+    return MAGIC + np.array([VERSION, 0], dtype='<u2').tobytes()
+
+def _check_header(header, filename):
+    if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError(f"{filename} não é um arquivo de amostras válido")
+    version = int(np.frombuffer(header[4:6], dtype='<u2')[0])
+    if version != VERSION:
+        raise ValueError(f"Versão {version} de {filename} não suportada")
+
+def is_store_file(filename):
+    return filename.endswith(STORE_EXTENSION)
+
+class SampleStore:
+    """Arquivo de amostras onde novos registros só são acrescentados no fim"""
+
+    def __init__(self, filename=DEFAULT_STORE_FILE):
+        self.filename = filename
+
+    def exists(self):
+        return os.path.exists(self.filename) and os.path.getsize(self.filename) >= HEADER_SIZE
+
+    def _ensure_header(self):
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not self.exists():
+            with open(self.filename, 'wb') as f:
+                f.write(_header())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _truncate_partial_record(self):
+        size = os.path.getsize(self.filename)
+        extra = (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+        if extra:
+            with open(self.filename, 'r+b') as f:
+                f.truncate(size - extra)
+
+    def append(self, letra, landmarks, timestamp=None):
+        """Grava uma amostra (21 x 3) no fim do arquivo e força a ida ao disco"""
+        self._ensure_header()
+        self._truncate_partial_record()
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record['letra'] = letra.encode('utf-8')
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        record['landmarks'] = np.asarray(landmarks, dtype=np.float32).reshape(21, 3)
+        fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+        try:
+            os.write(fd, record.tobytes())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def load(self, offset=0):
+        """Lê os registros completos a partir do registro de número offset
+
+        Retorna um array estruturado com os campos letra, timestamp e
+        landmarks.
+        """
+        if not self.exists():
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        with open(self.filename, 'rb') as f:
+            _check_header(f.read(HEADER_SIZE), self.filename)
+            f.seek(HEADER_SIZE + offset * RECORD_DTYPE.itemsize)
+            data = f.read()
+        count = len(data) // RECORD_DTYPE.itemsize
+        return np.frombuffer(data, dtype=RECORD_DTYPE, count=count)
+
+    def __len__(self):
+        if not self.exists():
+            return 0
+        return (os.path.getsize(self.filename) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+
+    def to_dict(self):
+        """Converte o arquivo para o formato de all_landmarks.json"""
+        all_data = {}
+        for record in self.load():
+            letra = record['letra'].decode('utf-8')
+            all_data.setdefault(letra, []).append(record['landmarks'].astype(float).tolist())
+        return all_data
+
+BINARY_EXTENSION = ".lbm"
+BINARY_MAGIC = b"LBRM"
+BINARY_VERSION = 1
+BINARY_HEADER_SIZE = 64
+
+BINARY_HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('reserved', '<u2'),
+    ('count', '<u8'),
+    ('raw_offset', '<u8'),
+    ('normalized_offset', '<u8'),
+    ('codes_offset', '<u8'),
+    ('names_offset', '<u8'),
+    ('names_size', '<u8'),
+])
+
+def is_binary_file(filename):
+    return filename.endswith(BINARY_EXTENSION)
+
+def write_binary(filename, labels, landmarks, normalized):
+    """Grava um arquivo compacto (.lbm) com amostras cruas e normalizadas
+
+    Args:
+        labels: Letra de cada amostra (N)
+        landmarks: Amostras cruas (N x 21 x 3)
+        normalized: Mesmas amostras já normalizadas (N x 21 x 2)
+    """
+    landmarks = np.ascontiguousarray(landmarks, dtype='<f4').reshape(-1, 21, 3)
+    normalized = np.ascontiguousarray(normalized, dtype='<f4').reshape(-1, 21, 2)
+    names = sorted(set(labels))
+    code_of = {letra: code for code, letra in enumerate(names)}
+    codes = np.array([code_of[letra] for letra in labels], dtype='<u2').reshape(-1)
+    names_bytes = json.dumps(names).encode('utf-8')
+
+    header = np.zeros(1, dtype=BINARY_HEADER_DTYPE)
+    header['magic'] = BINARY_MAGIC
+    header['version'] = BINARY_VERSION
+    header['count'] = len(landmarks)
+    header['raw_offset'] = BINARY_HEADER_SIZE
+    header['normalized_offset'] = BINARY_HEADER_SIZE + landmarks.nbytes
+    header['codes_offset'] = header['normalized_offset'] + normalized.nbytes
+    header['names_offset'] = header['codes_offset'] + codes.nbytes
+    header['names_size'] = len(names_bytes)
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'wb') as f:
+        f.write(header.tobytes().ljust(BINARY_HEADER_SIZE, b'\0'))
+        f.write(landmarks.tobytes())
+        f.write(normalized.tobytes())
+        f.write(codes.tobytes())
+        f.write(names_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+def open_binary(filename):
+    """Abre um arquivo compacto (.lbm) via memmap
+
+    Retorna (labels, landmarks, normalized): os dois arrays de amostras são
+    visões somente leitura do arquivo, sem cópia.
+    """
+    header = np.fromfile(filename, dtype=BINARY_HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != BINARY_MAGIC:
+        raise ValueError(f"{filename} não é um arquivo compacto de landmarks")
+    header = header[0]
+    if header['version'] != BINARY_VERSION:
+        raise ValueError(f"Versão {header['version']} de {filename} não suportada")
+
+    count = int(header['count'])
+    if count == 0:
+        return (np.zeros(0, dtype=object), np.zeros((0, 21, 3), dtype='<f4'),
+                np.zeros((0, 21, 2), dtype='<f4'))
+    landmarks = np.memmap(filename, dtype='<f4', mode='r',
+                          offset=int(header['raw_offset']), shape=(count, 21, 3))
+    normalized = np.memmap(filename, dtype='<f4', mode='r',
+                           offset=int(header['normalized_offset']), shape=(count, 21, 2))
+    codes = np.fromfile(filename, dtype='<u2', count=count, offset=int(header['codes_offset']))
+    with open(filename, 'rb') as f:
+        f.seek(int(header['names_offset']))
+        names = np.array(json.loads(f.read(int(header['names_size'])).decode('utf-8')), dtype=object)
+    return names[codes], landmarks, normalized
+
+def records_labels(records):
+    return np.array([letra.decode('utf-8') for letra in records['letra']], dtype=object)
+
+def import_json(json_filename, store_filename=DEFAULT_STORE_FILE, replace=False):
+    """Cria o arquivo de amostras com todas as amostras de um all_landmarks.json
+
+    Se o arquivo de amostras já tiver registros (ex.: criado por
+    ensure_default_store ou com amostras salvas pela câmera), só o substitui
+    com replace=True; senão levanta ValueError, em vez de duplicar as
+    amostras. O arquivo é escrito em um temporário e renomeado.
+    """
+    if len(SampleStore(store_filename)) and not replace:
+        raise ValueError(f"{store_filename} já tem amostras")
+    with open(json_filename, 'r') as f:
+        all_data = json.load(f)
+    labels = [letra for letra, amostras in all_data.items() for _ in amostras]
+    records = np.zeros(len(labels), dtype=RECORD_DTYPE)
+    records['letra'] = [letra.encode('utf-8') for letra in labels]
+    records['timestamp'] = time.time()
+    records['landmarks'] = np.array([ref for amostras in all_data.values() for ref in amostras],
+                                    dtype=np.float32).reshape(-1, 21, 3)
+
+    directory = os.path.dirname(store_filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_filename = store_filename + ".tmp"
+    with open(tmp_filename, 'wb') as f:
+        f.write(_header())
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, store_filename)
+    return len(records)
+
+def ensure_default_store(filename=DEFAULT_STORE_FILE):
+    """Cria o arquivo de amostras padrão a partir do all_landmarks.json, se ainda não existir
+
+    Só vale para DEFAULT_STORE_FILE: é a fonte de amostras padrão de
+    camera.py, offline.py e evaluation.py, então amostras salvas pela câmera
+    aparecem em todos eles. Retorna filename.
+    """
+    if filename == DEFAULT_STORE_FILE and not SampleStore(filename).exists() and os.path.exists(DEFAULT_JSON_FILE):
+        import_json(DEFAULT_JSON_FILE, filename)
+    return filename
+
+def export_json(store_filename=DEFAULT_STORE_FILE, json_filename=DEFAULT_JSON_FILE):
+    """Gera um all_landmarks.json a partir do arquivo de amostras
+
+    O arquivo é escrito em um temporário e renomeado, então uma interrupção
+    no meio não corrompe o JSON anterior.
+    """
+    all_data = SampleStore(store_filename).to_dict()
+    tmp_filename = json_filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(all_data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, json_filename)
+    return sum(len(amostras) for amostras in all_data.values())
+
+def load_raw(source):
+    """Carrega (labels, amostras cruas N x 21 x 3) de um .json, .lbr ou .lbm
+
+    A ordem é a mesma usada por TemplateIndex.load para o mesmo arquivo.
+    """
+    ensure_default_store(source)
+    if is_binary_file(source):
+        labels, landmarks, _ = open_binary(source)
+        return list(labels), np.asarray(landmarks)
+    if is_store_file(source):
+        records = SampleStore(source).load()
+        return list(records_labels(records)), records['landmarks']
+    with open(source, 'r') as f:
+        all_data = json.load(f)
+    labels = [letra for letra, amostras in all_data.items() for _ in amostras]
+    landmarks = np.array([ref for amostras in all_data.values() for ref in amostras],
+                         dtype=np.float32).reshape(-1, 21, 3)
+    return labels, landmarks
+
+def compact(source, binary_filename):
+    """Gera um arquivo compacto (.lbm) a partir de um .json ou .lbr"""
+    from gestures import normalize_batch
+
+    labels, landmarks = load_raw(source)
+    write_binary(binary_filename, labels, landmarks, normalize_batch(landmarks))
+    return len(labels)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa/exporta amostras de landmarks")
+    parser.add_argument('acao', choices=['importar', 'exportar', 'compactar'])
+    parser.add_argument('--json', default=DEFAULT_JSON_FILE)
+    parser.add_argument('--store', default=DEFAULT_STORE_FILE)
+    parser.add_argument('--saida', default="landmarks/all_landmarks" + BINARY_EXTENSION)
+    parser.add_argument('--substituir', action='store_true',
+                        help="importar: substitui as amostras que já estão em --store")
+    args = parser.parse_args()
+
+    if args.acao == 'compactar':
+        source = args.store if os.path.exists(args.store) else args.json
+        total = compact(source, args.saida)
+        print(f"{total} amostras compactadas de {source} para {args.saida}")
+        return
+
+    if args.acao == 'importar':
+        existing = len(SampleStore(args.store))
+        if existing and not args.substituir:
+            parser.error(f"{args.store} já tem {existing} amostras; "
+                         f"use --substituir para trocá-las pelas de {args.json}")
+        total = import_json(args.json, args.store, replace=args.substituir)
+        print(f"{total} amostras importadas de {args.json} para {args.store}")
+    else:
+        total = export_json(args.store, args.json)
+        print(f"{total} amostras exportadas de {args.store} para {args.json}")
+
+if __name__ == "__main__":
+    main()
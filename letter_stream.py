@@ -0,0 +1,148 @@
+"""
+Saída de letras estável: de uma letra por frame para eventos de letra
+
+O classificador devolve uma letra por frame, que oscila entre letras
+vizinhas e '?'. LetterDebouncer só emite uma letra quando ela domina os
+frames por letter_stable_time segundos, tolera falhas e trocas rápidas por
+até letter_hold_time e, enquanto a letra é mantida, não emite de novo (ou
+repete a cada letter_repeat_time, se configurado). Cada emissão é um
+LetterEvent (letra, início, emissão, confiança), pequeno o bastante para ir
+pela rede no lugar do fluxo de 30 Hz.
+
+O evento sai assim que a letra fica estável, com a letra ainda mantida, então
+emit_time/emit_frame são o momento da emissão e não o fim da letra. start_*
+é o primeiro frame da letra (ou a emissão anterior, em uma repetição).
+
+A confiança é a fração dos frames desde o início da letra em que ela foi a
+letra classificada. Sem timestamps, as durações são contadas em frames
+(letter_*_frames).
+"""
+
+from collections import namedtuple
+from configuracao_avancada import SYSTEM_CONFIG
+
+LetterEvent = namedtuple('LetterEvent', ['letra', 'start_time', 'emit_time', 'confidence', 'start_frame', 'emit_frame'],
+                         defaults=(None, None))
+
+class _Run:
+    """Trecho em que uma letra está ativa"""
+
+    __slots__ = ('letra', 'start', 'start_time', 'start_frame', 'last_seen', 'frames', 'hits', 'emitted',
+                 'emitted_time', 'emitted_frame')
+
+    def __init__(self, letra, now, timestamp, frame):
+        self.letra = letra
+        self.start, self.start_time, self.start_frame = now, timestamp, frame
+        self.last_seen = now
+        self.frames = self.hits = 1
+        self.emitted = None
+
+    @property
+    def confidence(self):
+        return self.hits / self.frames
+
+class LetterDebouncer:
+    """Máquina de estados que transforma a letra de cada frame em eventos
+
+    Args:
+        stable_time: Duração (s) da letra antes da primeira emissão
+        hold_time: Intervalo (s) sem a letra tolerado antes de encerrá-la;
+            uma letra diferente só assume depois disso
+        repeat_time: Com a letra mantida, emite de novo a cada repeat_time s
+            (0 = uma emissão por letra)
+        min_confidence: Fração mínima dos frames com a letra para emiti-la
+        stable_frames, hold_frames, repeat_frames: Mesmos limites em frames,
+            usados quando update não recebe timestamp
+        callback: Chamado com cada LetterEvent emitido
+    """
+
+    def __init__(self, stable_time=SYSTEM_CONFIG['letter_stable_time'], hold_time=SYSTEM_CONFIG['letter_hold_time'],
+                 repeat_time=SYSTEM_CONFIG['letter_repeat_time'],
+                 min_confidence=SYSTEM_CONFIG['letter_min_confidence'],
+                 stable_frames=SYSTEM_CONFIG['letter_stable_frames'], hold_frames=SYSTEM_CONFIG['letter_hold_frames'],
+                 repeat_frames=SYSTEM_CONFIG['letter_repeat_frames'], callback=None):
+        self.timed_limits = (stable_time, hold_time, repeat_time)
+        self.frame_limits = (stable_frames, hold_frames, repeat_frames)
+        self.min_confidence = min_confidence
+        self.callback = callback
+        self.frame = -1
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config, callback=None):
+        return cls(config['letter_stable_time'], config['letter_hold_time'], config['letter_repeat_time'],
+                   config['letter_min_confidence'], config['letter_stable_frames'], config['letter_hold_frames'],
+                   config['letter_repeat_frames'], callback)
+
+    def reset(self):
+        self.run = None
+        self.challenger = None
+
+    @property
+    def letra(self):
+        """Letra ativa já emitida (None se nenhuma)"""
+        return self.run.letra if self.run is not None and self.run.emitted is not None else None
+
+    def update(self, letra, timestamp=None):
+        """Processa a letra de um frame ('?' ou None = sem letra); retorna os eventos emitidos"""
+        self.frame += 1
+        now = self.frame if timestamp is None else timestamp
+        stable, hold, repeat = self.frame_limits if timestamp is None else self.timed_limits
+        letra = None if letra in (None, '?') else letra
+
+        run = self.run
+        if run is not None and now - run.last_seen > hold:
+            # A letra sumiu por mais que hold: a desafiante (se ainda viva) assume
+            challenger = self.challenger
+            run = challenger if challenger is not None and now - challenger.last_seen <= hold else None
+            self.challenger = None
+        for active in (run, self.challenger):
+            if active is not None:
+                active.frames += 1
+        if letra is None:
+            pass
+        elif run is None:
+            run = _Run(letra, now, timestamp, self.frame)
+        elif letra == run.letra:
+            run.last_seen = now
+            run.hits += 1
+        elif self.challenger is not None and self.challenger.letra == letra:
+            self.challenger.last_seen = now
+            self.challenger.hits += 1
+        else:
+            self.challenger = _Run(letra, now, timestamp, self.frame)
+        self.run = run
+
+        events = []
+        if run is not None and run.last_seen == now and run.confidence >= self.min_confidence:
+            if run.emitted is None and now - run.start >= stable:
+                events.append(self._emit(run, run.start_time, run.start_frame, timestamp))
+                run.emitted = now
+            elif run.emitted is not None and repeat and now - run.emitted >= repeat:
+                events.append(self._emit(run, run.emitted_time, run.emitted_frame, timestamp))
+                run.emitted = now
+        return events
+
+    def _emit(self, run, start_time, start_frame, timestamp):
+        event = LetterEvent(run.letra, start_time, timestamp, run.confidence, start_frame, self.frame)
+        run.emitted_time, run.emitted_frame = timestamp, self.frame
+        if self.callback is not None:
+            self.callback(event)
+        return event
+
+def debounce(results, config=None, callback=None):
+    """Gera (chave da mão, LetterEvent) a partir de (frame, timestamp, chave, HandResult)
+
+    Aceita a saída de recording.replay (ou de offline.classify_detections
+    lida de volta), com um LetterDebouncer por mão.
+    """
+    config = config or SYSTEM_CONFIG
+    debouncers = {}
+    for _, timestamp, key, result in results:
+        debouncer = debouncers.get(key)
+        if debouncer is None:
+            debouncer = debouncers[key] = LetterDebouncer.from_config(config)
+        for event in debouncer.update(result.letra, timestamp):
+            if callback is not None:
+                callback(key, event)
+            yield key, event
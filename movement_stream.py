@@ -0,0 +1,325 @@
+"""
+Detectores de movimento incrementais (um objeto por letra)
+
+Os detect_*_movement de gestures.py recebem a sequência inteira e a
+reavaliam a cada frame. Os detectores daqui recebem um frame por vez e
+guardam só o ponto de início do movimento, os extremos do segmento atual e
+a fase do gesto, então cada update é O(1) e a janela pode ser bem maior que
+sequence_length sem custo extra.
+
+O início é reposicionado quando o dedo volta no sentido contrário (além de
+noise_tolerance), quando a janela estoura ou quando um ponto é um começo
+melhor que o atual. Enquanto o deslocamento desde o início satisfaz os
+limiares de *_MOVEMENT_CONFIG, detected é True; quando deixa de ser,
+update devolve um MovementEvent com o primeiro e o último frame do gesto.
+"""
+
+from collections import namedtuple
+from configuracao_avancada import (
+    H_MOVEMENT_CONFIG,
+    J_MOVEMENT_CONFIG,
+    SYSTEM_CONFIG,
+    X_MOVEMENT_CONFIG,
+    Z_MOVEMENT_CONFIG,
+)
+
+MovementEvent = namedtuple('MovementEvent', ['letra', 'start_frame', 'end_frame', 'start_time', 'end_time'],
+                           defaults=(None, None))
+
+# Recuo tolerado (em coordenadas normalizadas) antes de considerar que o
+# movimento mudou de sentido; pode ser sobrescrito por 'noise_tolerance' na config
+NOISE_TOLERANCE = 0.01
+
+class StreamingMovementDetector:
+    """Base dos detectores incrementais
+
+    As subclasses implementam _step(landmarks), que atualiza o estado com o
+    frame atual e retorna se o movimento está completo; _mark() registra o
+    frame (e o timestamp) em que o movimento atual começou.
+
+    Se os frames vierem com timestamp, a janela (window_duration) e a
+    duração mínima ('min_duration' da config) são medidas em segundos, e
+    não em frames, então o resultado não muda com o FPS.
+    """
+
+    letra = None
+
+    def __init__(self, config, window=SYSTEM_CONFIG['movement_window_frames'],
+                 window_duration=SYSTEM_CONFIG['movement_window_duration']):
+        self.config = config
+        self.window = window
+        self.window_duration = window_duration
+        self.tolerance = config.get('noise_tolerance', NOISE_TOLERANCE)
+        self.reset()
+
+    def reset(self):
+        self.frame = -1
+        self.time = None
+        self.start_frame = None
+        self.start_time = None
+        self.detected = False
+        self._event_start = None
+        self._last_time = None
+        self._restart()
+
+    def _mark(self, frame=None, time=None):
+        """Registra o início do movimento (por padrão, o frame atual)"""
+        if frame is None:
+            frame, time = self.frame, self.time
+        self.start_frame, self.start_time = frame, time
+
+    def _timed(self):
+        return self.time is not None and self.start_time is not None
+
+    def _restart(self):
+        """Limpa o estado do gesto (chamado quando o início é reposicionado)"""
+
+    def _expired(self):
+        if self.start_frame is None:
+            return True
+        if self._timed() and self.window_duration:
+            return self.time - self.start_time >= self.window_duration
+        return self.frame - self.start_frame >= self.window
+
+    def _long_enough(self):
+        if self._timed() and 'min_duration' in self.config:
+            return self.frame > self.start_frame and self.time - self.start_time >= self.config['min_duration']
+        return self.frame - self.start_frame + 1 >= self.config['min_sequence_length']
+
+    def update(self, landmarks, timestamp=None):
+        """Processa um frame (21 x 3); retorna um MovementEvent quando um gesto detectado termina"""
+        self.frame += 1
+        self.time = timestamp
+        was_detected = self.detected
+        self.detected = bool(self._step(landmarks))
+
+        event = None
+        if was_detected and (not self.detected or self.start_frame != self._event_start[0]):
+            event = MovementEvent(self.letra, self._event_start[0], self.frame - 1,
+                                  self._event_start[1], self._last_time)
+        if self.detected:
+            self._event_start = (self.start_frame, self.start_time)
+        self._last_time = timestamp
+        return event
+
+    def finish(self):
+        """Encerra o gesto em andamento (ex.: a mão saiu do quadro)"""
+        event = None
+        if self.detected:
+            event = MovementEvent(self.letra, self._event_start[0], self.frame,
+                                  self._event_start[1], self.time)
+        self.reset()
+        return event
+
+class StreamingJDetector(StreamingMovementDetector):
+    """J: mindinho desce e vai para a esquerda a partir do início"""
+
+    letra = 'J'
+
+    def __init__(self, config=J_MOVEMENT_CONFIG, window=SYSTEM_CONFIG['movement_window_frames'],
+                 window_duration=SYSTEM_CONFIG['movement_window_duration']):
+        super().__init__(config, window, window_duration)
+
+    def _restart(self, point=None):
+        self.start = point
+        if point is not None:
+            self._mark()
+            self.max_y, self.min_x = point[1], point[0]
+
+    def _step(self, landmarks):
+        x, y = landmarks[self.config['landmark_index']][:2]
+        start = self.start
+        if (self._expired() or y < self.max_y - self.tolerance or x > self.min_x + self.tolerance
+                or (y <= start[1] and x >= start[0])):
+            self._restart((x, y))
+            return False
+        self.max_y = max(self.max_y, y)
+        self.min_x = min(self.min_x, x)
+        return (y > start[1] + self.config['down_threshold']
+                and x < start[0] - self.config['left_threshold']
+                and self._long_enough())
+
+class StreamingHDetector(StreamingMovementDetector):
+    """H: indicador e médio vão para a esquerda sem variar a altura"""
+
+    letra = 'H'
+
+    def __init__(self, config=H_MOVEMENT_CONFIG, window=SYSTEM_CONFIG['movement_window_frames'],
+                 window_duration=SYSTEM_CONFIG['movement_window_duration']):
+        super().__init__(config, window, window_duration)
+
+    def _restart(self, points=None):
+        self.start = points
+        if points is not None:
+            self._mark()
+            self.min_x = [point[0] for point in points]
+
+    def _step(self, landmarks):
+        points = [tuple(landmarks[idx][:2]) for idx in self.config['landmark_indices']]
+        stability = self.config['vertical_stability']
+        start = self.start
+        if (self._expired()
+                or any(x > min_x + self.tolerance for (x, _), min_x in zip(points, self.min_x))
+                or any(abs(y - y0) >= stability for (_, y), (_, y0) in zip(points, start))
+                or all(x >= x0 for (x, _), (x0, _) in zip(points, start))):
+            self._restart(points)
+            return False
+        self.min_x = [min(x, min_x) for (x, _), min_x in zip(points, self.min_x)]
+        horizontal = self.config['horizontal_threshold']
+        return all(x < x0 - horizontal for (x, _), (x0, _) in zip(points, start)) and self._long_enough()
+
+class StreamingXDetector(StreamingMovementDetector):
+    """X: indicador desce e volta a subir, sem se deslocar na horizontal"""
+
+    letra = 'X'
+
+    def __init__(self, config=X_MOVEMENT_CONFIG, window=SYSTEM_CONFIG['movement_window_frames'],
+                 window_duration=SYSTEM_CONFIG['movement_window_duration']):
+        super().__init__(config, window, window_duration)
+
+    def _restart(self, point=None, frame=None, time=None):
+        self.top = point
+        if point is not None:
+            self.bottom_y = point[1]
+            self.rise = (*point, frame, time)
+            self._mark(frame, time)
+
+    def _step(self, landmarks):
+        x, y = landmarks[self.config['landmark_index']][:2]
+        down = self.config['down_threshold']
+        if self._expired() or abs(x - self.top[0]) >= self.config['horizontal_tolerance']:
+            self._restart((x, y), self.frame, self.time)
+            return False
+
+        if y > self.bottom_y:
+            if self.rise[1] < self.bottom_y - self.tolerance:
+                # Subiu e voltou a descer: um novo gancho começa no ponto mais alto da subida
+                self._restart(self.rise[:2], *self.rise[2:])
+            self.bottom_y = y
+            self.rise = (x, y, self.frame, self.time)
+        elif y < self.rise[1]:
+            self.rise = (x, y, self.frame, self.time)
+        if self.bottom_y <= self.top[1] + down and y <= self.top[1]:
+            self._restart((x, y), self.frame, self.time)
+            return False
+
+        return (self.bottom_y > self.top[1] + down
+                and y < self.bottom_y - self.config['up_threshold']
+                and abs(x - self.top[0]) < self.config['horizontal_tolerance']
+                and self._long_enough())
+
+class StreamingZDetector(StreamingMovementDetector):
+    """Z: diagonal para baixo/direita, horizontal para a esquerda e outra diagonal
+
+    A fase 0 acompanha a primeira diagonal a partir do início do gesto; a
+    fase 1 começa no ponto mais à direita dela e a fase 2 no ponto mais à
+    esquerda da horizontal.
+    """
+
+    letra = 'Z'
+
+    def __init__(self, config=Z_MOVEMENT_CONFIG, window=SYSTEM_CONFIG['movement_window_frames'],
+                 window_duration=SYSTEM_CONFIG['movement_window_duration']):
+        super().__init__(config, window, window_duration)
+
+    def _restart(self, point=None):
+        self.phase = 0
+        self.start = self.segment = self.extreme = point
+        if point is not None:
+            self._mark()
+            self.max_y = point[1]
+
+    def _diagonal(self, origin, point):
+        diagonal = self.config['diagonal_threshold']
+        return point[0] > origin[0] + diagonal and point[1] > origin[1] + diagonal
+
+    def _step(self, landmarks):
+        point = tuple(landmarks[self.config['landmark_index']][:2])
+        x, y = point
+        if self._expired():
+            self._restart(point)
+            return False
+
+        if self.phase == 0:
+            if x < self.extreme[0] - self.tolerance:
+                if not self._diagonal(self.start, self.extreme):
+                    self._restart(point)
+                    return False
+                self.phase = 1
+                self.segment = self.extreme
+                self.extreme = point
+            elif y < self.max_y - self.tolerance or (x <= self.start[0] and y <= self.start[1]):
+                self._restart(point)
+                return False
+            else:
+                if x >= self.extreme[0]:
+                    self.extreme = point
+                self.max_y = max(self.max_y, y)
+                return False
+
+        if self.phase == 1:
+            if abs(y - self.segment[1]) >= self.config['vertical_tolerance'] or x > self.extreme[0] + self.tolerance:
+                if self.segment[0] - self.extreme[0] <= self.config['horizontal_threshold']:
+                    self._restart(point)
+                    return False
+                self.phase = 2
+                self.segment = self.extreme
+                self.extreme = point
+                self.max_y = y
+            else:
+                if x <= self.extreme[0]:
+                    self.extreme = point
+                return False
+
+        if x < self.extreme[0] - self.tolerance or y < self.max_y - self.tolerance:
+            self._restart(point)
+            return False
+        if x >= self.extreme[0]:
+            self.extreme = point
+        self.max_y = max(self.max_y, y)
+        return self._diagonal(self.segment, point) and self._long_enough()
+
+STREAMING_DETECTORS = {
+    'J': StreamingJDetector,
+    'H': StreamingHDetector,
+    'Z': StreamingZDetector,
+    'X': StreamingXDetector,
+}
+
+class MovementStream:
+    """Um detector incremental por letra, alimentados com os mesmos frames
+
+    Args:
+        movement_configs: Dicionário 'movements' da configuração em tempo de
+            execução; sem ele cada detector usa o seu *_MOVEMENT_CONFIG
+        window: Duração máxima de um gesto, em frames
+        window_duration: Duração máxima de um gesto, em segundos (usada
+            quando os frames vêm com timestamp)
+    """
+
+    def __init__(self, movement_configs=None, window=SYSTEM_CONFIG['movement_window_frames'],
+                 window_duration=SYSTEM_CONFIG['movement_window_duration']):
+        movement_configs = movement_configs or {}
+        self.detectors = {
+            letra: (detector(movement_configs[letra], window, window_duration) if letra in movement_configs
+                    else detector(window=window, window_duration=window_duration))
+            for letra, detector in STREAMING_DETECTORS.items()
+        }
+
+    def update(self, landmarks, timestamp=None):
+        """Processa um frame em todos os detectores; retorna os gestos que terminaram"""
+        events = []
+        for detector in self.detectors.values():
+            event = detector.update(landmarks, timestamp)
+            if event:
+                events.append(event)
+        return events
+
+    def detected(self, letra):
+        """True se o movimento da letra está completo no frame atual"""
+        detector = self.detectors.get(letra)
+        return bool(detector and detector.detected)
+
+    def finish(self):
+        """Encerra todos os gestos em andamento"""
+        return [event for event in (detector.finish() for detector in self.detectors.values()) if event]
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Processamento offline (sem interface gráfica) de vídeos gravados
+
+Roda a mesma detecção de mãos e classificação do camera.py sobre um arquivo
+de vídeo ou um diretório de imagens, o mais rápido que a CPU permitir, e
+grava o resultado de cada mão em cada frame em CSV ou JSONL.
+
+Com --processos, o vídeo (ou a lista de imagens) é dividido em segmentos
+processados em paralelo, cada um com sua instância do MediaPipe. Os workers só
+devolvem os landmarks detectados; a classificação roda no processo principal,
+em ordem de timestamp, para que o estado de sequência usado pelos detectores
+de movimento continue correto entre um segmento e outro. Se o vídeo não
+informa o número de frames, a detecção volta a ser sequencial; o último
+segmento sempre vai até o fim do arquivo, mesmo que a contagem esteja errada.
+
+Uma sessão gravada (.lbs, ver recording.py) é reproduzida direto na
+classificação, sem OpenCV nem MediaPipe; com --gravar, as detecções de um
+vídeo são gravadas em uma sessão para as próximas execuções. Com --eventos,
+as letras estáveis de cada mão (LetterEvent, ver letter_stream.py) são
+gravadas em JSONL, uma linha por letra emitida (com o início da letra e o
+momento da emissão).
+
+Uso:
+    python offline.py sessao.mp4 --saida resultados.csv
+    python offline.py pasta_de_frames/ --saida resultados.jsonl --fps 30
+    python offline.py sessao.mp4 --saida resultados.csv --processos 16
+    python offline.py sessao.mp4 --saida resultados.csv --gravar sessao.lbs
+    python offline.py sessao.lbs --saida resultados.csv
+    python offline.py sessao.lbs --saida resultados.csv --eventos letras.jsonl
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from configuracao_avancada import (
+    DEFAULT_STATIC_CALIBRATION_FILE,
+    PROFILES,
+    configure_hands_from_config,
+    load_runtime_config,
+    load_static_calibration,
+)
+from dynamic_gestures import DEFAULT_MOVEMENT_TEMPLATES_FILE, DTWMatcher
+from gestures import DEFAULT_LANDMARKS_FILE, HandLandmarks, extract_landmarks, get_template_index
+from hand_tracking import HandTracker, handedness_labels
+from partial_search import PartialDistanceIndex
+from prototypes import PrototypeIndex
+from recording import SessionRecorder, is_session_file, iter_session, record_detections
+from spatial_index import KDTreeTemplateIndex
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Frames processados antes do início de cada segmento (e descartados) para o
+# rastreamento do MediaPipe já estar estável no primeiro frame do segmento
+SEGMENT_WARMUP_FRAMES = 5
+
+RESULT_FIELDS = ['frame', 'timestamp', 'hand', 'shape', 'letra', 'movimento', 'distancia']
+
+def _image_files(source):
+    return sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+def count_frames(source):
+    """Número de frames da entrada (0 se o vídeo não informa)
+
+    Em vídeos é a contagem do contêiner (CAP_PROP_FRAME_COUNT), que pode ser
+    estimada pela duração; serve só para dividir o trabalho.
+    """
+    if os.path.isdir(source):
+        return len(_image_files(source))
+    import cv2
+    cap = cv2.VideoCapture(source)
+    try:
+        return max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    finally:
+        cap.release()
+
+def _seek(cap, start):
+    """Posiciona o vídeo no frame start, lendo a posição real depois do seek
+
+    Se o seek não cai exatamente em start (contêineres sem índice, seek por
+    keyframe), volta ao início quando passou do ponto e avança frame a frame.
+    Retorna o índice do próximo frame lido.
+    """
+    import cv2
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if position < 0 or position > start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        position = max(0, int(cap.get(cv2.CAP_PROP_POS_FRAMES)))
+    while position < start and cap.grab():
+        position += 1
+    return position
+
+def iter_frames(source, fps=30.0, start=0, end=None):
+    """Gera (índice, timestamp em segundos, frame BGR) de um vídeo ou diretório de imagens
+
+    start/end limitam o intervalo de frames (end exclusivo, None = até o fim).
+    Em vídeos, o índice é a posição real lida depois do seek.
+    """
+    import cv2
+    if os.path.isdir(source):
+        files = _image_files(source)
+        for frame_idx in range(start, len(files) if end is None else min(end, len(files))):
+            frame = cv2.imread(os.path.join(source, files[frame_idx]))
+            if frame is not None:
+                yield frame_idx, frame_idx / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Não foi possível abrir {source}")
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    try:
+        frame_idx = _seek(cap, start) if start else 0
+        while end is None or frame_idx < end:
+            success, frame = cap.read()
+            if not success:
+                break
+            yield frame_idx, frame_idx / video_fps, frame
+            frame_idx += 1
+    finally:
+        cap.release()
+
+class ResultWriter:
+    """Grava linhas de resultado em CSV ou JSONL, conforme a extensão do arquivo"""
+
+    def __init__(self, filename):
+        self.file = open(filename, 'w', newline='')
+        self.jsonl = filename.endswith('.jsonl')
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.file.write(json.dumps(row) + '\n')
+        else:
+            self.csv.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def result_row(frame_idx, timestamp, hand, result):
+    return {
+        'frame': frame_idx,
+        'timestamp': round(timestamp, 6),
+        'hand': hand,
+        'shape': result.hand_shape or '',
+        'letra': result.letra,
+        'movimento': result.movement_detected,
+        'distancia': '' if result.distancia is None else round(result.distancia, 6),
+    }
+
+def event_row(hand, event):
+    return {
+        'hand': hand,
+        'letra': event.letra,
+        'inicio': event.start_time,
+        'emissao': event.emit_time,
+        'confianca': round(event.confidence, 3),
+        'frame_inicio': event.start_frame,
+        'frame_emissao': event.emit_frame,
+    }
+
+def detect_frames(frames, hands):
+    """Roda o MediaPipe em cada frame
+
+    Gera (índice, timestamp, mãos como listas 21 x 3, lateralidade de cada mão).
+    """
+    import cv2
+    for frame_idx, timestamp, frame in frames:
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        points = [extract_landmarks(hand) for hand in (results.multi_hand_landmarks or [])]
+        yield frame_idx, timestamp, points, handedness_labels(results.multi_handedness)
+
+def classify_detections(detections, writer, template_index, config=None, movement_matcher=None, on_letter=None):
+    """Classifica as mãos detectadas em ordem, gravando uma linha por mão
+
+    on_letter(chave, LetterEvent) recebe as letras estáveis de cada mão.
+    """
+    tracker = HandTracker(on_letter=on_letter, config=config, movement_matcher=movement_matcher)
+    total = 0
+    for frame_idx, timestamp, points, labels in detections:
+        hands = [HandLandmarks(hand_points) for hand_points in points]
+        for key, _, result in tracker.update(hands, labels, template_index, timestamp):
+            writer.write(result_row(frame_idx, timestamp, key, result))
+        total += 1
+    return total
+
+def _detect_segment(args):
+    source, fps, start, end, profile = args
+    warmup_start = max(0, start - SEGMENT_WARMUP_FRAMES)
+    hands = configure_hands_from_config(load_runtime_config(profile))
+    try:
+        return [detection for detection in detect_frames(iter_frames(source, fps, warmup_start, end), hands)
+                if detection[0] >= start]
+    finally:
+        hands.close()
+
+def split_segments(total_frames, num_segments):
+    """Divide [0, total_frames) em até num_segments intervalos contíguos
+
+    O último intervalo termina em None (até o fim da entrada), para não perder
+    frames quando total_frames é menor que o real. Sem frames, não há
+    intervalos.
+    """
+    if total_frames <= 0:
+        return []
+    num_segments = max(1, min(num_segments, total_frames))
+    bounds = [round(i * total_frames / num_segments) for i in range(num_segments + 1)]
+    segments = [(bounds[i], bounds[i + 1]) for i in range(num_segments) if bounds[i] < bounds[i + 1]]
+    segments[-1] = (segments[-1][0], None)
+    return segments
+
+def detect_parallel(source, fps=30.0, processes=None, segments_per_process=4, profile=None):
+    """Detecta as mãos em paralelo, segmento por segmento, devolvendo em ordem
+
+    Mais segmentos que processos equilibram a carga quando alguns trechos do
+    vídeo têm mais mãos que outros.
+    """
+    processes = processes or os.cpu_count() or 1
+    segments = split_segments(count_frames(source), processes * segments_per_process)
+    if len(segments) <= 1:
+        # Sem contagem de frames (ou um frame só) não há como dividir: sequencial
+        hands = configure_hands_from_config(load_runtime_config(profile))
+        try:
+            yield from detect_frames(iter_frames(source, fps), hands)
+        finally:
+            hands.close()
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        tasks = [(source, fps, start, end, profile) for start, end in segments]
+        for detections in executor.map(_detect_segment, tasks):
+            yield from detections
+
+def process_frames(frames, writer, template_index, hands=None, config=None, movement_matcher=None):
+    """Detecta e classifica as mãos de cada frame, gravando uma linha por mão"""
+    own_hands = hands is None
+    if own_hands:
+        hands = configure_hands_from_config(config)
+    try:
+        return classify_detections(detect_frames(frames, hands), writer, template_index, config,
+                                   movement_matcher)
+    finally:
+        if own_hands:
+            hands.close()
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Processa vídeos gravados sem interface gráfica")
+    parser.add_argument('entrada', help="Arquivo de vídeo, diretório de imagens ou sessão gravada (.lbs)")
+    parser.add_argument('--saida', default="resultados.csv", help="Arquivo .csv ou .jsonl")
+    parser.add_argument('--templates', default=DEFAULT_LANDMARKS_FILE)
+    parser.add_argument('--fps', type=float, default=30.0,
+                        help="FPS usado para os timestamps de diretórios de imagens")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Número de processos de detecção (0 = todos os núcleos)")
+    parser.add_argument('--kdtree', action='store_true',
+                        help="Usa KD-tree (scipy) na busca de letras estáticas")
+    parser.add_argument('--prototipos', type=int, default=0,
+                        help="Compara primeiro com N protótipos por letra (0 = desligado)")
+    parser.add_argument('--busca-parcial', action='store_true',
+                        help="Busca estática por distâncias parciais, com saída antecipada")
+    parser.add_argument('--limiares-por-letra', nargs='?', const=DEFAULT_STATIC_CALIBRATION_FILE,
+                        help="Usa os limiares por letra calibrados (evaluation.py --gravar-limiares)")
+    parser.add_argument('--dtw', nargs='?', const=DEFAULT_MOVEMENT_TEMPLATES_FILE,
+                        help="Compara os movimentos com os modelos gravados por DTW")
+    parser.add_argument('--gravar', help="Grava as detecções em uma sessão (.lbs) para reprodução")
+    parser.add_argument('--eventos', help="Grava as letras estáveis de cada mão em JSONL")
+    parser.add_argument('--perfil', choices=list(PROFILES),
+                        help="Perfil de configuração (padrão: variável LIBRAS_PERFIL ou 'padrao')")
+    args = parser.parse_args()
+    config = load_runtime_config(args.perfil)
+    if args.limiares_por_letra:
+        config['static_thresholds'] = load_static_calibration(args.limiares_por_letra).get('static_thresholds')
+
+    template_index = get_template_index(args.templates)
+    if args.prototipos > 0:
+        template_index = PrototypeIndex(template_index, args.prototipos, cache_file=args.templates + ".prototipos")
+    elif args.busca_parcial:
+        template_index = PartialDistanceIndex(template_index, args.templates + ".parcial")
+    elif args.kdtree:
+        template_index = KDTreeTemplateIndex(template_index, args.templates + ".kdtree")
+    movement_matcher = DTWMatcher.load(args.dtw) if args.dtw else None
+    recorder = SessionRecorder(args.gravar) if args.gravar else None
+    events = open(args.eventos, 'w') if args.eventos else None
+    on_letter = (lambda key, event: events.write(json.dumps(event_row(key, event)) + '\n')) if events else None
+    hands = None
+    start = time.perf_counter()
+    try:
+        with ResultWriter(args.saida) as writer:
+            if is_session_file(args.entrada):
+                detections = iter_session(args.entrada)
+            elif args.processos == 1:
+                hands = configure_hands_from_config(config)
+                detections = detect_frames(iter_frames(args.entrada, args.fps), hands)
+            else:
+                detections = detect_parallel(args.entrada, args.fps, args.processos or None,
+                                             profile=config['profile'])
+            if recorder is not None:
+                detections = record_detections(detections, recorder)
+            total = classify_detections(detections, writer, template_index, config, movement_matcher,
+                                        on_letter)
+    finally:
+        if hands is not None:
+            hands.close()
+        if recorder is not None:
+            recorder.close()
+        if events is not None:
+            events.close()
+    elapsed = time.perf_counter() - start
+    print(f"{total} frames processados em {elapsed:.1f}s "
+          f"({total / elapsed if elapsed > 0 else 0:.1f} fps) -> {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Busca estática com distâncias parciais e saída antecipada
+
+A distância de compare_landmarks é uma soma de termos não negativos (um por
+ponto), então a soma de só alguns pontos já é um limite inferior da
+distância completa. A busca calcula primeiro os pontas dos dedos (os pontos
+que mais variam entre letras) para todas as amostras, completa a distância
+de poucas sementes (as de menor soma parcial) e, a cada bloco de pontos,
+descarta as amostras cuja soma parcial já passa da melhor distância
+completa. O resultado é o mesmo da busca completa.
+
+Saída antecipada: se a melhor semente estiver dentro do raio de saída da sua
+letra (metade da menor distância entre uma amostra da letra e uma de outra
+letra, como em calibrate_static_thresholds) e abaixo do limiar da letra, nenhuma
+amostra de outra letra pode estar mais perto e a busca para ali.
+"""
+
+import json
+import os
+import numpy as np
+from configuracao_avancada import SYSTEM_CONFIG
+from gestures import TemplateMatch, letter_threshold, template_distances, template_fingerprint
+from spatial_index import _cKDTree
+
+# Pontos em ordem de avaliação: pontas dos dedos, articulações e, por fim, a base da mão
+POINT_ORDER = [4, 8, 12, 16, 20, 3, 7, 11, 15, 19, 2, 6, 10, 14, 18, 0, 1, 5, 9, 13, 17]
+POINT_BLOCKS = (5, 5, 5, 6)
+
+# Amostras comparadas com todas as outras de uma vez no cálculo dos raios de saída
+GAP_CHUNK_SIZE = 256
+
+def _block_distances(templates, query, start, end):
+    diff = templates[:, start:end] - query[start:end]
+    return np.sqrt((diff ** 2).sum(axis=2)).sum(axis=1)
+
+class PartialDistanceIndex:
+    """Busca exata por distâncias parciais, com saída antecipada por letra
+
+    Pode ser passado como index para detect_letra/match_templates. A letra é
+    sempre a da busca completa. Sem saída antecipada a distância também é a
+    mesma (a menos de arredondamento); com ela, é a de uma amostra da letra
+    certa dentro do raio de saída, não necessariamente a mais próxima. A
+    margem usa as somas parciais das amostras descartadas, então é um limite
+    inferior da margem real.
+
+    Os raios de saída custam O(N²) para N amostras. Eles vêm do cache em
+    disco quando o conteúdo do índice é o mesmo (como o da KD-tree), e
+    amostras acrescentadas depois só são comparadas com as demais (O(N) por
+    amostra). Assim salvar uma amostra durante o uso não trava o vídeo.
+
+    Args:
+        template_index: TemplateIndex com todas as amostras
+        cache_file: Arquivo de cache dos raios de saída (opcional)
+        seeds: Amostras com a distância completa calculada logo após o
+            primeiro bloco de pontos
+        early_exit: Calcula os raios de saída
+    """
+
+    def __init__(self, template_index, cache_file=None, seeds=4, early_exit=True):
+        self.base = template_index
+        self.cache_file = cache_file
+        self.seeds = seeds
+        self.early_exit = early_exit
+        self._built_version = None
+        self._built_generation = None
+        self._built_count = 0
+        self._ordered = np.zeros((0, 21, 2))
+        self._gaps = {}
+        self._ensure_layout()
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def labels(self):
+        return self.base.labels
+
+    @property
+    def templates(self):
+        return self.base.templates
+
+    @property
+    def version(self):
+        return self.base.version
+
+    def refresh(self, force=False):
+        """Repassa para o TemplateIndex; a reorganização é refeita na próxima consulta se mudar"""
+        return self.base.refresh(force)
+
+    def _load_cache(self, fingerprint):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('fingerprint') != fingerprint:
+            return None
+        return cached['gaps']
+
+    def _save_cache(self, fingerprint):
+        if not self.cache_file:
+            return
+        tmp_filename = self.cache_file + ".tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'gaps': self._gaps}, f)
+        os.replace(tmp_filename, self.cache_file)
+
+    def _update_gaps(self, start):
+        """Menor distância entre letras diferentes, considerando as amostras a partir de start"""
+        labels = self.base.labels
+        templates = np.asarray(self.base.templates, dtype=np.float64)
+        for letra in dict.fromkeys(labels[start:]):
+            self._gaps.setdefault(letra, float('inf'))
+        for chunk in range(start, len(labels), GAP_CHUNK_SIZE):
+            new_labels = labels[chunk:chunk + GAP_CHUNK_SIZE]
+            dists = template_distances(templates[chunk:chunk + GAP_CHUNK_SIZE], templates)
+            dists[new_labels[:, None] == labels[None, :]] = np.inf
+            # Cada par (amostra nova, amostra de outra letra) vale para as duas letras
+            for letra, gap in zip(new_labels, dists.min(axis=1)):
+                self._gaps[letra] = min(self._gaps[letra], float(gap))
+            for letra in self._gaps:
+                columns = dists[:, labels == letra]
+                if columns.size:
+                    self._gaps[letra] = min(self._gaps[letra], float(columns.min()))
+
+    def _build_gaps(self):
+        """Menor distância entre letras diferentes, com uma KD-tree por letra (se houver scipy)
+
+        Para cada ponto, |dx| + |dy| <= sqrt(2) * distância, então a distância
+        L1 dos vetores de 42 dimensões dividida por sqrt(2) nunca passa da soma
+        por ponto (e fica bem mais perto dela que a euclidiana): a vizinha L1
+        de outra letra dá um raio, e só as amostras dentro dele são comparadas.
+        """
+        cKDTree = _cKDTree()
+        if cKDTree is None:
+            self._gaps = {}
+            self._update_gaps(0)
+            return
+        labels = self.base.labels
+        templates = np.asarray(self.base.templates, dtype=np.float64)
+        vectors = templates.reshape(len(templates), 42)
+        self._gaps = {}
+        for letra in dict.fromkeys(labels):
+            rows = np.flatnonzero(labels == letra)
+            others = np.flatnonzero(labels != letra)
+            if not len(others):
+                self._gaps[letra] = float('inf')
+                continue
+            tree = cKDTree(vectors[others])
+            manhattan, nn = tree.query(vectors[rows], p=1)
+            diff = templates[rows] - templates[others[nn]]
+            gap = float(np.sqrt((diff ** 2).sum(axis=2)).sum(axis=1).min())
+            order = np.argsort(manhattan)
+            for row, bound in zip(rows[order], manhattan[order] / np.sqrt(2)):
+                if bound > gap:
+                    break
+                radius = gap * np.sqrt(2) * (1 + 1e-9) + 1e-12
+                candidates = others[tree.query_ball_point(vectors[row], radius, p=1)]
+                if len(candidates):
+                    gap = min(gap, float(template_distances(templates[row], templates[candidates]).min()))
+            self._gaps[letra] = gap
+
+    def _ensure_layout(self):
+        if self._built_version == self.base.version:
+            return
+        appended = self._built_generation == self.base.generation and len(self.base) >= self._built_count
+        start = self._built_count if appended else 0
+        self._built_version = self.base.version
+        self._built_generation = self.base.generation
+        self._built_count = len(self.base)
+
+        templates = np.asarray(self.base.templates[start:], dtype=np.float64)
+        self._ordered = np.concatenate([self._ordered[:start], templates[:, POINT_ORDER]])
+        self._radius = np.zeros(len(self.base))
+        if not self.early_exit or not len(self.base):
+            return
+        if not appended:
+            fingerprint = template_fingerprint(self.base)
+            self._gaps = self._load_cache(fingerprint)
+            if self._gaps is None:
+                self._build_gaps()
+                self._save_cache(fingerprint)
+        else:
+            self._update_gaps(start)
+        # Raio de saída: metade da menor distância até outra letra (ver calibrate_static_thresholds)
+        radius = {letra: gap / 2 if np.isfinite(gap) else 0.0 for letra, gap in self._gaps.items()}
+        self._radius = np.array([radius[letra] for letra in self.base.labels])
+
+    def nearest(self, current, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+        """Amostra mais próxima de uma mão normalizada (21 x 2)"""
+        self._ensure_layout()
+        if len(self.base) == 0:
+            return TemplateMatch('?', float('inf'), float('inf'))
+
+        labels = self.base.labels
+        query = np.asarray(current, dtype=np.float64).reshape(21, 2)[POINT_ORDER]
+        end = POINT_BLOCKS[0]
+        partial = _block_distances(self._ordered, query, 0, end)
+
+        count = min(self.seeds, len(partial))
+        seeds = np.argpartition(partial, count - 1)[:count]
+        seed_dists = partial[seeds] + _block_distances(self._ordered[seeds], query, end, 21)
+        best_seed = int(np.argmin(seed_dists))
+        best = float(seed_dists[best_seed])
+        best_label = labels[seeds[best_seed]]
+        radius = self._radius[seeds[best_seed]]
+        if best < radius and best < letter_threshold(limiar, best_label):
+            # Qualquer amostra de outra letra está a pelo menos 2 * radius - best da mão
+            return TemplateMatch(best_label, best, 2 * (radius - best))
+
+        # Folga para o arredondamento da soma em blocos não descartar as próprias sementes
+        bound = best * (1 + 1e-9)
+        # Limite inferior da distância de cada amostra (a completa, para as que sobrarem)
+        lower = partial
+        alive = np.flatnonzero(partial <= bound)
+        sums = partial[alive]
+        for block in POINT_BLOCKS[1:]:
+            start, end = end, end + block
+            sums = sums + _block_distances(self._ordered[alive], query, start, end)
+            lower[alive] = sums
+            keep = sums <= bound
+            alive, sums = alive[keep], sums[keep]
+
+        best_pos = int(np.argmin(sums))
+        min_dist = float(sums[best_pos])
+        best_label = labels[alive[best_pos]]
+        others = lower[labels != best_label]
+        margem = float(others.min()) - min_dist if len(others) else float('inf')
+        letra = best_label if min_dist < letter_threshold(limiar, best_label) else '?'
+        return TemplateMatch(letra, min_dist, margem)
+
+    def match(self, current, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+        """Mesma interface de match_templates: uma mão (21 x 2) ou várias (N x 21 x 2)"""
+        queries = np.asarray(current, dtype=np.float64)
+        if queries.ndim == 2:
+            return self.nearest(queries, limiar)
+        return [self.nearest(query, limiar) for query in queries.reshape(-1, 21, 2)]
@@ -0,0 +1,188 @@
+"""
+Pipeline da câmera: captura -> inferência -> exibição
+
+CaptureThread lê a câmera e InferenceThread roda o MediaPipe e os
+classificadores, cada uma em sua thread, ligadas por filas de um item só
+(put_latest), para que a exibição sempre mostre o resultado mais recente.
+
+Se uma das threads falhar, ela guarda a exceção em error e sinaliza
+stop_event, então as outras e a exibição param em vez de mostrar o último
+resultado congelado; raise_worker_error relança a exceção na thread principal.
+
+O OpenCV só é importado ao preparar o frame, e o MediaPipe só por
+configure_hands_from_config, então o módulo pode ser testado com câmera e
+mãos falsas (cap.read() e hands.process()).
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from configuracao_avancada import configure_hands_from_config, load_runtime_config
+from gestures import extract_landmarks_batch
+from hand_tracking import HandTracker, handedness_labels
+
+# Letras estáveis (LetterEvent) mostradas no canto da tela
+TEXT_LENGTH = 24
+
+def put_latest(q, item):
+    """Coloca item na fila limitada, descartando o mais antigo se estiver cheia"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+def prepare_frame(frame, scale=1.0):
+    """Frame BGR da câmera -> RGB para o MediaPipe, reduzido por scale"""
+    import cv2
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+class WorkerThread(threading.Thread):
+    """Thread do pipeline que sinaliza stop_event ao terminar, inclusive por erro
+
+    As subclasses implementam work(); uma exceção levantada nele fica em
+    error (ver raise_worker_error).
+    """
+
+    def __init__(self, stop_event):
+        super().__init__(daemon=True)
+        self.stop_event = stop_event
+        self.error = None
+
+    def run(self):
+        try:
+            self.work()
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.stop_event.set()
+
+    def work(self):
+        raise NotImplementedError
+
+class CaptureThread(WorkerThread):
+    """Lê frames da câmera continuamente, mantendo só o mais recente na fila"""
+
+    def __init__(self, cap, frames, stop_event, monitor):
+        super().__init__(stop_event)
+        self.cap = cap
+        self.frames = frames
+        self.monitor = monitor
+
+    def work(self):
+        frame_id = 0
+        while not self.stop_event.is_set() and self.cap.isOpened():
+            with self.monitor.stage('capture'):
+                success, frame = self.cap.read()
+            if not success:
+                time.sleep(0.005)
+                continue
+            put_latest(self.frames, (frame_id, time.monotonic(), frame))
+            frame_id += 1
+
+class InferenceThread(WorkerThread):
+    """Roda o MediaPipe e os classificadores sobre o frame mais recente
+
+    Com um recorder (SessionRecorder), as detecções de cada frame processado
+    também são gravadas para reprodução posterior (recording.py).
+
+    As letras estáveis emitidas pelo rastreamento (LetterEvent) vão para
+    text, que acompanha cada resultado.
+
+    hands_factory(config) cria o detector de mãos (por padrão o MediaPipe) e
+    prepare(frame, scale) converte o frame da câmera para ele.
+    """
+
+    def __init__(self, frames, results, stop_event, template_index, template_lock, monitor, config,
+                 governor=None, movement_matcher=None, recorder=None,
+                 hands_factory=configure_hands_from_config, prepare=prepare_frame):
+        super().__init__(stop_event)
+        self.frames = frames
+        self.results = results
+        self.template_index = template_index
+        self.template_lock = template_lock
+        self.monitor = monitor
+        self.config = config
+        self.governor = governor
+        self.movement_matcher = movement_matcher
+        self.recorder = recorder
+        self.hands_factory = hands_factory
+        self.prepare = prepare
+        self.text = deque(maxlen=TEXT_LENGTH)
+        self.tracker = HandTracker(on_letter=self._on_letter, config=config, monitor=monitor,
+                                   movement_matcher=movement_matcher)
+
+    def _on_letter(self, key, event):
+        self.text.append(event.letra)
+
+    def _apply_governor_profile(self, hands):
+        """Troca de perfil pedida pelo governador: recria o MediaPipe e o rastreamento"""
+        static_thresholds = self.config.get('static_thresholds')
+        self.config = load_runtime_config(self.governor.profile)
+        self.config['static_thresholds'] = static_thresholds
+        hands.close()
+        self.tracker = HandTracker(on_letter=self._on_letter, config=self.config, monitor=self.monitor,
+                                   movement_matcher=self.movement_matcher)
+        return self.hands_factory(self.config)
+
+    def work(self):
+        hands = self.hands_factory(self.config)
+        classified = []
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    frame_id, captured_at, frame = self.frames.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+                start = time.perf_counter()
+                if self.governor is None or self.governor.should_infer():
+                    with self.monitor.stage('color_convert'):
+                        rgb_frame = self.prepare(frame, self.governor.scale if self.governor else 1.0)
+                    with self.monitor.stage('hands_process'):
+                        results = hands.process(rgb_frame)
+                    labels = handedness_labels(results.multi_handedness)
+                    if self.recorder is not None:
+                        self.recorder.write(frame_id, captured_at,
+                                            extract_landmarks_batch(results.multi_hand_landmarks), labels)
+
+                    with self.template_lock:
+                        self.template_index.refresh()
+                        classified = self.tracker.update(results.multi_hand_landmarks, labels,
+                                                         self.template_index, captured_at)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.monitor.record_detection_time(elapsed_ms)
+                self.monitor.frame_count += 1
+
+                if self.governor is not None and self.governor.update(elapsed_ms):
+                    if self.governor.profile != self.config['profile']:
+                        hands = self._apply_governor_profile(hands)
+                        classified = []
+                put_latest(self.results, (frame_id, captured_at, frame, classified, ''.join(self.text)))
+        finally:
+            hands.close()
+
+def stop_workers(stop_event, workers, timeout=1.0):
+    """Para as threads do pipeline e espera cada uma por até timeout segundos
+
+    Returns:
+        True se todas terminaram (só então é seguro liberar a câmera e fechar
+        a gravação que elas usam)
+    """
+    stop_event.set()
+    for worker in workers:
+        worker.join(timeout)
+    return not any(worker.is_alive() for worker in workers)
+
+def raise_worker_error(workers):
+    """Relança na thread atual a primeira exceção guardada por uma das threads"""
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
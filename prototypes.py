@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Compressão das amostras em protótipos por letra (k-medoids)
+
+Muitas amostras de uma mesma letra são quase iguais. build_prototypes escolhe,
+para cada letra, poucas amostras representativas (medoides, usando a mesma
+distância de compare_landmarks). PrototypeIndex compara a mão primeiro com os
+protótipos e só refina contra as amostras originais das letras mais
+próximas, então o custo cresce com o número de letras e não com o número de
+amostras coletadas.
+
+A escolha dos medoides é a parte cara (segundos com milhares de amostras).
+Ela vem de um cache em disco quando o conteúdo do índice é o mesmo (como o
+da KD-tree), e uma amostra acrescentada refaz só os protótipos da sua letra.
+
+Uso (gera o cache lido por camera.py/offline.py --prototipos 3):
+    python prototypes.py landmarks/samples.lbr --por-letra 3
+"""
+
+import json
+import os
+import zlib
+import numpy as np
+from configuracao_avancada import SYSTEM_CONFIG
+from gestures import TemplateIndex, TemplateMatch, letter_threshold, template_distances, template_fingerprint
+
+# Membros usados na atualização de cada medoide (limita o custo quadrático)
+MAX_MEDOID_CANDIDATES = 500
+
+def _kmedoids(samples, k, rng, iterations=10):
+    """Índices de k medoides de samples (n x 21 x 2)"""
+    n = len(samples)
+    if n <= k:
+        return np.arange(n)
+
+    medoids = [int(rng.integers(n))]
+    closest = template_distances(samples[medoids[0]], samples)[0]
+    while len(medoids) < k:
+        weights = closest ** 2
+        if weights.sum() == 0:
+            break
+        medoids.append(int(rng.choice(n, p=weights / weights.sum())))
+        closest = np.minimum(closest, template_distances(samples[medoids[-1]], samples)[0])
+    medoids = np.array(medoids)
+
+    for _ in range(iterations):
+        assignment = template_distances(samples[medoids], samples).argmin(axis=0)
+        updated = medoids.copy()
+        for cluster in range(len(medoids)):
+            members = np.flatnonzero(assignment == cluster)
+            if len(members) == 0:
+                continue
+            if len(members) > MAX_MEDOID_CANDIDATES:
+                members = rng.choice(members, MAX_MEDOID_CANDIDATES, replace=False)
+            costs = template_distances(samples[members], samples[members]).sum(axis=1)
+            updated[cluster] = members[int(costs.argmin())]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    return np.sort(medoids)
+
+def build_prototypes(template_index, per_letter=3, seed=0, letters=None):
+    """Escolhe até per_letter medoides por letra
+
+    Cada letra tem seu próprio gerador (derivado de seed e da letra), então
+    refazer só algumas letras (letters) dá os mesmos medoides que refazer
+    todas.
+
+    Returns:
+        Array com as posições (em template_index) das amostras escolhidas,
+        na ordem original
+    """
+    labels = template_index.labels
+    templates = np.asarray(template_index.templates, dtype=np.float64)
+    chosen = []
+    for letra in (dict.fromkeys(labels) if letters is None else letters):
+        rng = np.random.default_rng([seed, zlib.crc32(str(letra).encode())])
+        rows = np.flatnonzero(labels == letra)
+        chosen.extend(rows[_kmedoids(templates[rows], per_letter, rng)])
+    return np.sort(np.array(chosen, dtype=np.intp))
+
+class PrototypeIndex:
+    """Busca em duas etapas: protótipos por letra e refinamento nas amostras
+
+    Pode ser passado como index para detect_letra/match_templates. O
+    resultado é igual ao da busca completa sempre que a letra da amostra
+    mais próxima estiver entre as top_letters letras de protótipo mais
+    próximo; a margem é calculada só entre essas letras.
+
+    Args:
+        template_index: TemplateIndex com todas as amostras
+        per_letter: Protótipos por letra
+        top_letters: Letras refinadas contra as amostras originais
+        cache_file: Arquivo de cache dos protótipos (opcional; camera.py e
+            offline.py usam <arquivo de amostras>.prototipos)
+    """
+
+    def __init__(self, template_index, per_letter=3, top_letters=2, seed=0, cache_file=None):
+        self.base = template_index
+        self.per_letter = per_letter
+        self.top_letters = top_letters
+        self.seed = seed
+        self.cache_file = cache_file
+        self._built_version = None
+        self._built_generation = None
+        self._built_count = 0
+        self._rows = np.zeros(0, dtype=np.intp)
+        self._ensure_prototypes()
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def labels(self):
+        return self.base.labels
+
+    @property
+    def templates(self):
+        return self.base.templates
+
+    @property
+    def version(self):
+        return self.base.version
+
+    def refresh(self, force=False):
+        """Repassa para o TemplateIndex; os protótipos são refeitos na próxima consulta se mudar"""
+        return self.base.refresh(force)
+
+    def _load_cache(self, fingerprint):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (cached.get('fingerprint'), cached.get('per_letter'), cached.get('seed')) != \
+                (fingerprint, self.per_letter, self.seed):
+            return None
+        return np.array(cached['rows'], dtype=np.intp)
+
+    def _save_cache(self, fingerprint):
+        if not self.cache_file:
+            return
+        tmp_filename = self.cache_file + ".tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'per_letter': self.per_letter, 'seed': self.seed,
+                       'rows': self._rows.tolist()}, f)
+        os.replace(tmp_filename, self.cache_file)
+
+    def _ensure_prototypes(self):
+        if self._built_version == self.base.version:
+            return
+        appended = self._built_generation == self.base.generation and len(self.base) >= self._built_count
+        start = self._built_count if appended else 0
+        self._built_version = self.base.version
+        self._built_generation = self.base.generation
+        self._built_count = len(self.base)
+
+        fingerprint = template_fingerprint(self.base)
+        if appended:
+            # Só as letras das amostras novas mudam de medoides
+            changed = list(dict.fromkeys(self.base.labels[start:]))
+            kept = self._rows[~np.isin(self.base.labels[self._rows], changed)]
+            self._rows = np.sort(np.concatenate([kept, build_prototypes(self.base, self.per_letter, self.seed,
+                                                                        changed)]))
+            self._save_cache(fingerprint)
+        else:
+            self._rows = self._load_cache(fingerprint)
+            if self._rows is None:
+                self._rows = build_prototypes(self.base, self.per_letter, self.seed)
+                self._save_cache(fingerprint)
+        rows = self._rows
+        self.prototypes = TemplateIndex(self.base.labels[rows], self.base.templates[rows])
+        self._letter_rows = {
+            letra: np.flatnonzero(self.base.labels == letra) for letra in dict.fromkeys(self.base.labels)
+        }
+
+    def nearest(self, current, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+        """Amostra mais próxima de uma mão normalizada (21 x 2), em duas etapas"""
+        self._ensure_prototypes()
+        if len(self.base) == 0:
+            return TemplateMatch('?', float('inf'), float('inf'))
+
+        query = np.asarray(current, dtype=np.float64).reshape(21, 2)
+        proto_dists = template_distances(query, self.prototypes.templates)[0]
+        letter_best = {}
+        for letra, dist in zip(self.prototypes.labels, proto_dists):
+            if dist < letter_best.get(letra, float('inf')):
+                letter_best[letra] = dist
+        candidates = sorted(letter_best, key=letter_best.get)[:self.top_letters]
+
+        rows = np.sort(np.concatenate([self._letter_rows[letra] for letra in candidates]))
+        dists = template_distances(query, self.base.templates[rows])[0]
+        best_pos = int(np.argmin(dists))
+        min_dist = float(dists[best_pos])
+        best_label = self.base.labels[rows[best_pos]]
+        others = dists[self.base.labels[rows] != best_label]
+        margem = float(others.min()) - min_dist if len(others) else float('inf')
+        letra = best_label if min_dist < letter_threshold(limiar, best_label) else '?'
+        return TemplateMatch(letra, min_dist, margem)
+
+    def match(self, current, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+        """Mesma interface de match_templates: uma mão (21 x 2) ou várias (N x 21 x 2)"""
+        queries = np.asarray(current, dtype=np.float64)
+        if queries.ndim == 2:
+            return self.nearest(queries, limiar)
+        return [self.nearest(query, limiar) for query in queries.reshape(-1, 21, 2)]
+
+def main():
+    import argparse
+    from gestures import DEFAULT_LANDMARKS_FILE
+
+    parser = argparse.ArgumentParser(description="Gera o cache de protótipos (medoides) por letra")
+    parser.add_argument('entrada', nargs='?', default=DEFAULT_LANDMARKS_FILE,
+                        help="Arquivo de amostras (.json, .lbr ou .lbm)")
+    parser.add_argument('--por-letra', type=int, default=3)
+    parser.add_argument('--saida', help="Arquivo de cache (padrão: <entrada>.prototipos)")
+    args = parser.parse_args()
+
+    index = TemplateIndex.load(args.entrada)
+    output = args.saida or args.entrada + ".prototipos"
+    prototypes = PrototypeIndex(index, args.por_letra, cache_file=output)
+    print(f"{len(prototypes.prototypes)} protótipos de {len(index)} amostras gravados em {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Gravação e reprodução das detecções do MediaPipe (sessões .lbs)
+
+Uma sessão guarda, frame a frame, o timestamp, a lateralidade e os 21 x 3
+landmarks de cada mão detectada, no mesmo estilo append-only do arquivo de
+amostras (.lbr): um registro de tamanho fixo por mão, com o número de mãos do
+frame em cada registro. Frames sem mão também geram um registro (com 0 mãos),
+para que a reprodução veja as mesmas ausências que o rastreamento ao vivo. Um
+frame incompleto no fim do arquivo (processo interrompido no meio da
+escrita) é ignorado na leitura.
+
+Os landmarks do MediaPipe já são float32, então a sessão guarda exatamente o
+que a classificação recebeu ao vivo. A reprodução (iter_session, replay)
+não precisa de câmera, OpenCV nem MediaPipe e roda tão rápido quanto a
+classificação permitir, com o mesmo resultado a cada execução.
+
+Uso:
+    python camera.py --gravar sessao.lbs                 # grava durante o uso normal
+    python offline.py sessao.mp4 --gravar sessao.lbs     # grava a partir de um vídeo
+    python offline.py sessao.lbs --saida resultados.csv  # reproduz sem MediaPipe
+"""
+
+import os
+import numpy as np
+from gestures import HandLandmarks
+from hand_tracking import HandTracker
+
+SESSION_EXTENSION = ".lbs"
+
+SESSION_MAGIC = b"LBSS"
+SESSION_VERSION = 1
+SESSION_HEADER_SIZE = 8
+
+SESSION_RECORD_DTYPE = np.dtype([
+    ('frame', '<u4'),
+    ('timestamp', '<f8'),
+    ('hands', 'u1'),
+    ('hand', 'S8'),
+    ('landmarks', '<f4', (21, 3)),
+])
+
+def _session_header():
+    return SESSION_MAGIC + np.array([SESSION_VERSION, 0], dtype='<u2').tobytes()
+
+def _check_session_header(header, filename):
+    if len(header) < SESSION_HEADER_SIZE or header[:4] != SESSION_MAGIC:
+        raise ValueError(f"{filename} não é uma sessão gravada válida")
+    version = int(np.frombuffer(header[4:6], dtype='<u2')[0])
+    if version != SESSION_VERSION:
+        raise ValueError(f"Versão {version} de {filename} não suportada")
+
+def is_session_file(filename):
+    return filename.endswith(SESSION_EXTENSION)
+
+class SessionRecorder:
+    """Acrescenta as detecções de cada frame ao fim de uma sessão .lbs
+
+    As escritas passam pelo buffer do arquivo (uma sessão longa não faz um
+    fsync por frame); close() descarrega o que faltar.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(filename) or os.path.getsize(filename) < SESSION_HEADER_SIZE:
+            with open(filename, 'wb') as f:
+                f.write(_session_header())
+        else:
+            # Descarta o frame incompleto deixado por uma gravação interrompida
+            complete = SESSION_HEADER_SIZE + len(load_session(filename)) * SESSION_RECORD_DTYPE.itemsize
+            if os.path.getsize(filename) > complete:
+                with open(filename, 'r+b') as f:
+                    f.truncate(complete)
+        self.file = open(filename, 'ab')
+        self.frames = 0
+
+    def write(self, frame_idx, timestamp, points, labels=None):
+        """Grava um frame
+
+        Args:
+            frame_idx: Índice do frame na captura
+            timestamp: Momento da captura, em segundos
+            points: Mãos detectadas (N x 21 x 3, N pode ser 0)
+            labels: Lateralidade de cada mão (None = 'Hand')
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 21, 3)
+        if len(points) > 255:
+            raise ValueError(f"Frame {frame_idx} com {len(points)} mãos (máximo 255)")
+        records = np.zeros(max(1, len(points)), dtype=SESSION_RECORD_DTYPE)
+        records['frame'] = frame_idx
+        records['timestamp'] = timestamp
+        records['hands'] = len(points)
+        if len(points):
+            records['hand'] = [label.encode('utf-8') for label in (labels or ['Hand'] * len(points))]
+            records['landmarks'] = points
+        self.file.write(records.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_session(filename):
+    """Lê os registros completos de uma sessão (array estruturado, via memmap)
+
+    Registros de um frame que ficou incompleto no fim do arquivo são
+    descartados.
+    """
+    with open(filename, 'rb') as f:
+        _check_session_header(f.read(SESSION_HEADER_SIZE), filename)
+    count = (os.path.getsize(filename) - SESSION_HEADER_SIZE) // SESSION_RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=SESSION_RECORD_DTYPE)
+    records = np.memmap(filename, dtype=SESSION_RECORD_DTYPE, mode='r',
+                        offset=SESSION_HEADER_SIZE, shape=(count,))
+
+    starts = _frame_starts(records)
+    last = int(starts[-1])
+    if count - last < max(1, int(records['hands'][last])):
+        records = records[:last]
+    return records
+
+def _frame_starts(records):
+    """Posição do primeiro registro de cada frame"""
+    frames = records['frame']
+    return np.flatnonzero(np.concatenate([[True], frames[1:] != frames[:-1]]))
+
+def iter_session(filename):
+    """Gera (índice, timestamp, mãos como listas 21 x 3, lateralidade de cada mão)
+
+    Mesmo formato de offline.detect_frames, então uma sessão gravada pode ir
+    direto para offline.classify_detections no lugar do MediaPipe.
+    """
+    records = load_session(filename)
+    if len(records) == 0:
+        return
+    starts = _frame_starts(records)
+    ends = np.append(starts[1:], len(records))
+    landmarks = np.asarray(records['landmarks'], dtype=np.float64)
+    for start, end in zip(starts, ends):
+        record = records[start]
+        if record['hands'] == 0:
+            yield int(record['frame']), float(record['timestamp']), [], None
+            continue
+        labels = [label.decode('utf-8') for label in records['hand'][start:end]]
+        yield int(record['frame']), float(record['timestamp']), landmarks[start:end].tolist(), labels
+
+def record_detections(detections, recorder):
+    """Repassa as detecções (formato de iter_session), gravando cada frame no recorder"""
+    for frame_idx, timestamp, points, labels in detections:
+        recorder.write(frame_idx, timestamp, points, labels)
+        yield frame_idx, timestamp, points, labels
+
+def replay(source, template_index=None, config=None, movement_matcher=None, monitor=None, on_letter=None):
+    """Reproduz uma sessão (arquivo .lbs ou detecções) no pipeline de classificação
+
+    Gera (frame, timestamp, chave da mão, HandResult) para cada mão de cada
+    frame, com o mesmo HandTracker usado pela câmera; on_letter(chave,
+    LetterEvent) recebe as letras estáveis.
+    """
+    detections = iter_session(source) if isinstance(source, str) else source
+    tracker = HandTracker(on_letter=on_letter, config=config, monitor=monitor, movement_matcher=movement_matcher)
+    for frame_idx, timestamp, points, labels in detections:
+        hands = [HandLandmarks(hand_points) for hand_points in points]
+        for key, _, result in tracker.update(hands, labels, template_index, timestamp):
+            yield frame_idx, timestamp, key, result
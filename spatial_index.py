@@ -0,0 +1,132 @@
+"""
+Índice espacial (KD-tree) opcional para a busca de letras estáticas
+
+As amostras normalizadas viram vetores de 42 dimensões (x, y de 21 pontos).
+A distância usada em compare_landmarks é a soma das distâncias por ponto, que
+é sempre maior ou igual à distância euclidiana entre os vetores. Por isso a
+busca é exata: a amostra euclidiana mais próxima dá um raio que certamente
+contém a amostra mais próxima pela soma por ponto, e só os candidatos dentro
+desse raio são comparados com a métrica original.
+
+Depende do scipy (scipy.spatial.cKDTree). Sem ele, o índice cai para a
+comparação vetorizada de match_templates sobre todas as amostras.
+"""
+
+import os
+import pickle
+import numpy as np
+from configuracao_avancada import SYSTEM_CONFIG
+from gestures import TemplateMatch, letter_threshold, match_templates, template_distances, template_fingerprint
+
+def _cKDTree():
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return None
+    return cKDTree
+
+class KDTreeTemplateIndex:
+    """KD-tree sobre um TemplateIndex, com resultado idêntico à busca completa
+
+    Pode ser passado como index para detect_letra/match_templates. Se o
+    TemplateIndex mudar (amostras novas ou arquivo recarregado, ver
+    TemplateIndex.version), a árvore é reconstruída na próxima consulta.
+    """
+
+    def __init__(self, template_index, cache_file=None, leafsize=16):
+        self.base = template_index
+        self.cache_file = cache_file
+        self.leafsize = leafsize
+        self.tree = None
+        self._built_version = None
+        self._ensure_tree()
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def labels(self):
+        return self.base.labels
+
+    @property
+    def templates(self):
+        return self.base.templates
+
+    @property
+    def version(self):
+        return self.base.version
+
+    def refresh(self, force=False):
+        """Repassa para o TemplateIndex; a árvore é refeita na próxima consulta se mudar"""
+        return self.base.refresh(force)
+
+    def _load_cache(self, fingerprint):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if cached.get('fingerprint') != fingerprint:
+            return None
+        return cached['tree']
+
+    def _save_cache(self, fingerprint, tree):
+        if not self.cache_file:
+            return
+        tmp_filename = self.cache_file + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint, 'tree': tree}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, self.cache_file)
+
+    def _ensure_tree(self):
+        if self._built_version == self.base.version:
+            return
+        self._built_version = self.base.version
+        cKDTree = _cKDTree()
+        if cKDTree is None or len(self.base) == 0:
+            self.tree = None
+            return
+        fingerprint = template_fingerprint(self.base)
+        tree = self._load_cache(fingerprint)
+        if tree is None:
+            vectors = np.asarray(self.base.templates, dtype=np.float64).reshape(len(self.base), 42)
+            tree = cKDTree(vectors, leafsize=self.leafsize)
+            self._save_cache(fingerprint, tree)
+        self.tree = tree
+
+    def nearest(self, current, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+        """Amostra mais próxima de uma mão normalizada (21 x 2)
+
+        A letra e a distância são idênticas às de match_templates. A margem é
+        calculada só entre os candidatos dentro do raio de busca (inf se
+        nenhum deles for de outra letra), então pode ser maior que a margem
+        da busca completa.
+        """
+        self._ensure_tree()
+        if self.tree is None:
+            return match_templates(current, self.base, limiar)
+
+        query = np.asarray(current, dtype=np.float64).reshape(42)
+        _, nn = self.tree.query(query)
+        radius = template_distances(query, self.base.templates[nn:nn + 1])[0, 0]
+        candidates = np.sort(np.asarray(self.tree.query_ball_point(query, radius * (1 + 1e-9) + 1e-12),
+                                        dtype=np.intp))
+
+        dists = template_distances(query, self.base.templates[candidates])[0]
+        best_pos = int(np.argmin(dists))
+        best = int(candidates[best_pos])
+        min_dist = float(dists[best_pos])
+        labels = self.base.labels[candidates]
+        others = dists[labels != self.base.labels[best]]
+        margem = float(others.min()) - min_dist if len(others) else float('inf')
+        letra = self.base.labels[best] if min_dist < letter_threshold(limiar, self.base.labels[best]) else '?'
+        return TemplateMatch(letra, min_dist, margem)
+
+    def match(self, current, limiar=SYSTEM_CONFIG['static_detection_threshold']):
+        """Mesma interface de match_templates: uma mão (21 x 2) ou várias (N x 21 x 2)"""
+        queries = np.asarray(current, dtype=np.float64)
+        if queries.ndim == 2:
+            return self.nearest(queries, limiar)
+        return [self.nearest(query, limiar) for query in queries.reshape(-1, 21, 2)]
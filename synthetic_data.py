@@ -0,0 +1,82 @@
+"""
+Dados sintéticos de mãos e movimentos, usados pelos testes e pelo benchmark
+
+Gera landmarks (21 x 3) sem câmera: uma mão parada com alguns pontos
+posicionados, a mão em H usada nos testes de rastreamento, gestos com a
+trajetória de cada letra com movimento e índices de amostras em torno das
+amostras reais.
+"""
+
+import numpy as np
+from gestures import HandLandmarks, TemplateIndex
+from landmark_store import DEFAULT_JSON_FILE
+
+# Forma (abertura dos pontos) de cada letra nos gestos sintéticos
+SHAPES = {'H': 1.0, 'J': 2.0, 'X': 3.0, 'Z': 1.5, 'K': 2.5}
+
+def create_mock_landmarks(positions):
+    """Cria landmarks simulados para teste"""
+    landmarks = [[0.5, 0.5, 0.0] for _ in range(21)]
+
+    for landmark_idx, pos in positions.items():
+        landmarks[landmark_idx] = pos
+
+    return landmarks
+
+def h_hand(x_pos):
+    """Mão em forma de H (indicador e médio estendidos) na posição x"""
+    return HandLandmarks(create_mock_landmarks({
+        0: [x_pos, 0.7, 0.0],
+        6: [x_pos, 0.3, 0.0],
+        8: [x_pos, 0.2, 0.0],
+        10: [x_pos, 0.3, 0.0],
+        12: [x_pos, 0.2, 0.0],
+        14: [x_pos, 0.5, 0.0],
+        16: [x_pos, 0.6, 0.0],
+        18: [x_pos, 0.5, 0.0],
+        20: [x_pos, 0.6, 0.0],
+    }))
+
+def trajectory(letra, t):
+    """Posição da mão no instante t (0 a 1) do movimento de cada letra"""
+    if letra == 'H':
+        return 0.6 - 0.2 * t, 0.5
+    if letra == 'J':
+        return (0.6, 0.3 + 0.6 * t) if t < 0.5 else (0.6 - 0.4 * (t - 0.5), 0.6)
+    if letra == 'X':
+        return 0.5, 0.4 + 0.1 * np.sin(np.pi * t)
+    if letra == 'Z':
+        s = 3 * t
+        if s < 1:
+            return 0.3 + 0.1 * s, 0.3 + 0.1 * s
+        if s < 2:
+            return 0.4 - 0.1 * (s - 1), 0.4
+        return 0.3 + 0.1 * (s - 2), 0.4 + 0.1 * (s - 2)
+    if letra == 'K':
+        return 0.5 + 0.1 * np.cos(2 * np.pi * t), 0.5 + 0.1 * np.sin(2 * np.pi * t)
+    return 0.5, 0.5
+
+def gesture(letra, frames, rng, noise=0.003, shape=None):
+    """Sequência sintética (frames x 21 x 3) de uma mão fazendo o movimento da letra"""
+    shape = SHAPES.get(letra, 1.0) if shape is None else shape
+    sequence = []
+    for t in np.linspace(0, 1, frames):
+        x, y = trajectory(letra, t)
+        hand = create_mock_landmarks({
+            i: [x + 0.05 * np.cos(i + shape), y + 0.05 * np.sin(i * shape), 0.0] for i in range(21)
+        })
+        sequence.append(np.asarray(hand) + rng.normal(0, noise, (21, 3)))
+    return np.array(sequence)
+
+def gesture_templates(rng, per_letter=5, letters="HJXZ"):
+    """Modelos de movimento no formato de load_movement_templates, per_letter por letra"""
+    return {letra: [{'landmarks': gesture(letra, int(rng.integers(20, 40)), rng).tolist(), 'timestamps': None}
+                    for _ in range(per_letter)]
+            for letra in letters}
+
+def clustered_index(rng, count=3000):
+    """Índice sintético com amostras em torno das amostras reais"""
+    base = TemplateIndex.load(DEFAULT_JSON_FILE)
+    picks = rng.integers(0, len(base), count)
+    templates = base.templates[picks] + rng.normal(0, 0.02, (count, 21, 2))
+    return base, TemplateIndex(base.labels[picks], templates)
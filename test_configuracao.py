@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Teste das configurações avançadas e do monitor de performance
+"""
+
+import json
+import os
+import tempfile
+from configuracao_avancada import PROFILE_ENV_VAR, SYSTEM_CONFIG, PerformanceMonitor, load_runtime_config
+from hand_tracking import HandState
+
+def test_monitor_por_etapa():
+    """Testa a janela circular e os percentis por etapa"""
+    print("Testando monitor por etapa...")
+    monitor = PerformanceMonitor(window_size=50)
+    for i in range(200):
+        monitor.record_stage_time('hands_process', float(i))
+        monitor.record_detection_time(float(i))
+    with monitor.stage('drawing'):
+        pass
+
+    stats = monitor.get_stage_stats()
+    assert stats['hands_process']['count'] == 50
+    assert stats['hands_process']['p50_ms'] == 174.5
+    assert stats['hands_process']['max_ms'] == 199.0
+    assert stats['drawing']['count'] == 1
+    assert monitor.detection_times == [float(i) for i in range(100, 200)]
+    assert monitor.get_stats()['min_detection_time_ms'] == 100.0
+    assert len(monitor.overlay_lines()) == 2
+    print("Monitor por etapa: PASSOU")
+
+def test_monitor_dump_jsonl():
+    """Testa a gravação periódica das estatísticas em JSONL"""
+    print("Testando dump JSONL...")
+    monitor = PerformanceMonitor()
+    monitor.record_stage_time('capture', 1.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "performance.jsonl")
+        monitor.dump_jsonl(filename)
+        monitor.dump_jsonl(filename)
+        with open(filename) as f:
+            lines = [json.loads(line) for line in f]
+    assert len(lines) == 2
+    assert lines[0]['stages']['capture']['p50_ms'] == 1.0
+    print("Dump JSONL: PASSOU")
+
+def test_perfis_de_configuracao():
+    """Testa a seleção de perfil por argumento e por variável de ambiente"""
+    print("Testando perfis de configuração...")
+    try:
+        config = load_runtime_config('performance')
+        assert config['sequence_length'] == 10
+        assert config['movements']['J']['down_threshold'] == 0.05
+        state = HandState()
+        assert state.sequence_length == 10
+        assert state.landmarks_sequence.capacity == config['max_sequence_frames']
+        assert state.confirmation_frames == 3
+        assert config['sequence_duration'] < SYSTEM_CONFIG['sequence_duration']
+
+        os.environ[PROFILE_ENV_VAR] = 'precisao'
+        assert load_runtime_config()['sequence_length'] == 20
+        del os.environ[PROFILE_ENV_VAR]
+
+        try:
+            load_runtime_config('inexistente')
+            assert False, "perfil inválido deveria gerar erro"
+        except ValueError:
+            pass
+    finally:
+        os.environ.pop(PROFILE_ENV_VAR, None)
+        load_runtime_config('padrao')
+    print("Perfis de configuração: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DAS CONFIGURAÇÕES AVANÇADAS ===\n")
+    test_monitor_por_etapa()
+    test_monitor_dump_jsonl()
+    test_perfis_de_configuracao()
+
+if __name__ == "__main__":
+    main()
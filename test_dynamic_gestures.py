@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Teste do reconhecimento de movimentos por DTW
+"""
+
+import os
+import tempfile
+import numpy as np
+from dynamic_gestures import (
+    DTWMatcher,
+    dtw_distances,
+    load_movement_templates,
+    save_movement_template,
+    sequence_features,
+)
+from gestures import HandLandmarks, TemplateIndex
+from hand_tracking import HandTracker
+from landmark_store import DEFAULT_JSON_FILE
+from synthetic_data import gesture, gesture_templates
+
+def test_reconhece_movimentos():
+    """Testa se cada movimento é reconhecido e uma mão parada não"""
+    print("Testando reconhecimento por DTW...")
+    rng = np.random.default_rng(0)
+    matcher = DTWMatcher(gesture_templates(rng))
+    for letra in "HJXZ":
+        for _ in range(3):
+            result = matcher.match(gesture(letra, int(rng.integers(15, 45)), rng, 0.005))
+            assert result.letra == letra and result.margem > 0
+    assert matcher.match(gesture('parada', 30, rng, 0.005, shape=1.0)).letra == '?'
+    print("Reconhecimento por DTW: PASSOU")
+
+def test_podas_sao_exatas():
+    """Testa se LB_Keogh e o abandono antecipado não mudam o resultado"""
+    print("Testando podas do DTW...")
+    rng = np.random.default_rng(1)
+    matcher = DTWMatcher(gesture_templates(rng, per_letter=20))
+    for letra in "HJXZK":
+        query = gesture(letra, 30, rng, 0.01)
+        full = dtw_distances(sequence_features(query, matcher.length), matcher.features, matcher.radius)
+        result = matcher.match(query, limiar=float('inf'))
+        assert result.letra == matcher.labels[int(np.argmin(full))]
+        assert abs(result.distancia - np.sqrt(full.min() / matcher.length)) < 1e-9
+
+    # Lotes de um modelo e consultas ruidosas com outra forma: modelos abandonados
+    # em lotes posteriores não podem empatar com o melhor
+    for batch_size in (1, 8):
+        matcher = DTWMatcher(gesture_templates(rng, per_letter=10), batch_size=batch_size)
+        for letra in "HJXZ" * 5:
+            query = gesture(letra, 30, rng, 0.03, shape=float(rng.uniform(0.5, 3.0)))
+            full = dtw_distances(sequence_features(query, matcher.length), matcher.features, matcher.radius)
+            result = matcher.match(query, limiar=float('inf'))
+            assert result.letra == matcher.labels[int(np.argmin(full))]
+            assert abs(result.distancia - np.sqrt(full.min() / matcher.length)) < 1e-9
+            assert result.margem >= 0
+
+    # Com faixa larga o DTW em lote coincide com a programação dinâmica completa
+    a, b = rng.normal(size=(2, 12, 3))
+    reference = np.full((13, 13), np.inf)
+    reference[0, 0] = 0.0
+    for i in range(12):
+        for j in range(12):
+            reference[i + 1, j + 1] = ((a[i] - b[j]) ** 2).sum() + min(
+                reference[i, j], reference[i, j + 1], reference[i + 1, j])
+    assert abs(dtw_distances(a, b[None], 12)[0] - reference[12, 12]) < 1e-9
+    assert dtw_distances(a, b[None], 12, best_so_far=reference[12, 12] / 10)[0] == float('inf')
+    print("Podas do DTW: PASSOU")
+
+def test_nova_letra_gravada():
+    """Testa uma letra nova só com modelos gravados, a FPS diferentes, no HandTracker"""
+    print("Testando letra nova gravada...")
+    rng = np.random.default_rng(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "movement_templates.json")
+        for _ in range(3):
+            frames = gesture('K', 15, rng)
+            save_movement_template('K', frames, np.arange(15) / 30, filename)
+        assert len(load_movement_templates(filename)['K']) == 3
+        matcher = DTWMatcher.load(filename)
+
+    frames = gesture('K', 30, rng)
+    tracker = HandTracker(movement_matcher=matcher)
+    index = TemplateIndex.load(DEFAULT_JSON_FILE)
+    detected = []
+    for i, frame in enumerate(frames):
+        (_, _, result), = tracker.update([HandLandmarks(frame)], ['Right'], index, i / 60)
+        detected.append(result.letra if result.movement_detected else None)
+    assert 'K' in detected
+    print("Letra nova gravada: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DOS MOVIMENTOS POR DTW ===\n")
+    test_reconhece_movimentos()
+    test_podas_sao_exatas()
+    test_nova_letra_gravada()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Teste da avaliação de precisão x latência
+"""
+
+import numpy as np
+from configuracao_avancada import PerformanceMonitor
+from evaluation import Evaluation, evaluate_movements, evaluate_static, fastest_without_loss, fold_indices
+from gestures import load_all_landmarks, normalize_batch, template_distances
+from synthetic_data import gesture_templates
+
+def dataset():
+    all_landmarks = load_all_landmarks()
+    labels = [letra for letra, amostras in all_landmarks.items() for _ in amostras]
+    landmarks = np.array([ref for amostras in all_landmarks.values() for ref in amostras])
+    return labels, landmarks
+
+def test_metricas():
+    """Testa precisão, recall e matriz de confusão em um caso conhecido"""
+    print("Testando métricas...")
+    evaluation = Evaluation()
+    for expected, predicted in [('A', 'A'), ('A', 'B'), ('A', '?'), ('B', 'B'), ('B', 'B'), ('C', 'A')]:
+        evaluation.add(expected, predicted, 0.1)
+
+    letters, matrix = evaluation.confusion_matrix()
+    assert letters == ['A', 'B', 'C']
+    assert matrix.tolist() == [[1, 1, 0, 1], [0, 2, 0, 0], [1, 0, 0, 0]]
+    metrics = evaluation.per_letter()
+    assert np.isclose(metrics['A']['precision'], 1 / 2) and np.isclose(metrics['A']['recall'], 1 / 3)
+    assert np.isclose(metrics['B']['precision'], 2 / 3) and metrics['B']['recall'] == 1.0
+    assert metrics['C'] == {'precision': 0.0, 'recall': 0.0, 'support': 1}
+    assert np.isclose(evaluation.accuracy, 3 / 6) and np.isclose(evaluation.rejected, 1 / 6)
+    print("Métricas: PASSOU")
+
+def test_folds_estratificados():
+    """Testa se os folds cobrem cada amostra uma vez e espalham cada letra"""
+    print("Testando folds...")
+    labels, _ = dataset()
+    assert len(fold_indices(labels)) == len(labels)
+    folds = fold_indices(labels, 3)
+    assert sorted(np.concatenate(folds).tolist()) == list(range(len(labels)))
+    for fold in folds:
+        for letra in set(labels):
+            # Cada letra tem pelo menos 3 amostras, então aparece em todos os folds, em partes iguais
+            assert abs(sum(labels[i] == letra for i in fold) - labels.count(letra) / 3) < 1
+    print("Folds: PASSOU")
+
+def test_leave_one_out_igual_a_busca_completa():
+    """Testa o leave-one-out contra a busca exaustiva sem a própria amostra e alimenta o monitor"""
+    print("Testando leave-one-out...")
+    labels, landmarks = dataset()
+    normalized = normalize_batch(landmarks)
+    dists = template_distances(normalized, normalized)
+    np.fill_diagonal(dists, np.inf)
+    nearest = dists.argmin(axis=1)
+    expected = [labels[j] if dists[i, j] < 1.5 else '?' for i, j in enumerate(nearest)]
+
+    monitor = PerformanceMonitor()
+    evaluation = evaluate_static(labels, landmarks, 'completo', 1.5, monitor=monitor)
+    assert evaluation.predicted == expected
+    assert monitor.true_positives == sum(e == p for e, p in zip(labels, expected))
+    assert monitor.true_positives + monitor.false_positives == len(labels)
+
+    kdtree = evaluate_static(labels, landmarks, 'kdtree', 1.5)
+    assert kdtree.predicted == expected
+    print("Leave-one-out: PASSOU")
+
+def test_movimentos_e_escolha():
+    """Testa a avaliação por DTW em k-fold e a escolha da configuração mais rápida"""
+    print("Testando avaliação de movimentos...")
+    rng = np.random.default_rng(0)
+    sequences = gesture_templates(rng, per_letter=4)
+    dtw = evaluate_movements(sequences, 'dtw', 0.5, folds=2)
+    assert len(dtw) == 16
+    assert dtw.accuracy == 1.0
+    regras = evaluate_movements(sequences, 'regras')
+    assert len(regras) == 16
+
+    slow, fast = Evaluation('lenta'), Evaluation('rapida')
+    for letra in 'AB':
+        slow.add(letra, letra, 2.0)
+        fast.add(letra, letra if letra == 'A' else '?', 1.0)
+    assert fastest_without_loss([slow, fast]).name == 'lenta'
+    assert fastest_without_loss([slow, fast], tolerance=0.5).name == 'rapida'
+    print("Avaliação de movimentos: PASSOU")
+
+def main():
+    print("=== TESTE DA AVALIAÇÃO ===\n")
+    test_metricas()
+    print()
+    test_folds_estratificados()
+    print()
+    test_leave_one_out_igual_a_busca_completa()
+    print()
+    test_movimentos_e_escolha()
+    print("\n=== TESTES CONCLUÍDOS ===")
+
+if __name__ == "__main__":
+    main()
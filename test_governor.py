@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Teste do governador adaptativo de qualidade
+"""
+
+from governor import DEFAULT_LEVELS, FrameGovernor
+
+def run(governor, frame_times):
+    """Alimenta o governador com tempos por frame e retorna os níveis visitados"""
+    levels = []
+    for frame_time in frame_times:
+        governor.update(frame_time)
+        levels.append(governor.level)
+    return levels
+
+def test_degrada_e_recupera():
+    """Testa a subida de nível com frames lentos e a volta com frames rápidos"""
+    print("Testando degradação e recuperação...")
+    governor = FrameGovernor(target_fps=30, window=5)
+    run(governor, [60.0] * 50)
+    assert governor.level == len(DEFAULT_LEVELS) - 1
+    assert governor.current.frame_step > 1
+    assert governor.profile == 'performance'
+
+    run(governor, [5.0] * 50)
+    assert governor.level == 0
+    assert governor.profile == 'precisao'
+    print("Degradação e recuperação: PASSOU")
+
+def test_histerese():
+    """Testa que tempos entre 60% e 100% do orçamento não mudam o nível"""
+    governor = FrameGovernor(target_fps=30, window=5)
+    run(governor, [25.0] * 100)
+    assert governor.level == 1
+    print("Histerese: PASSOU")
+
+def test_deterministico():
+    """Testa que a mesma sequência de tempos sempre gera os mesmos níveis"""
+    times = [10.0 + (i * 37 % 50) for i in range(300)]
+    first = run(FrameGovernor(target_fps=30, window=10), times)
+    second = run(FrameGovernor(target_fps=30, window=10), times)
+    assert first == second
+    print("Determinismo: PASSOU")
+
+def test_pulo_de_frames():
+    """Testa quais frames passam pelo MediaPipe em um nível que pula frames"""
+    governor = FrameGovernor(target_fps=30, start_level=len(DEFAULT_LEVELS) - 1, window=1000)
+    inferred = []
+    for _ in range(9):
+        inferred.append(governor.should_infer())
+        governor.update(1.0)
+    assert inferred == [True, False, False] * 3
+    print("Pulo de frames: PASSOU")
+
+def test_nivel_estavel_pulando_frames():
+    """Testa que frames pulados (quase 0 ms) não fazem o nível oscilar"""
+    print("Testando estabilidade com frames pulados...")
+    governor = FrameGovernor(target_fps=30, start_level=3, window=15)
+    levels = []
+    for _ in range(900):
+        governor.update(36.0 if governor.should_infer() else 0.1)
+        levels.append(governor.level)
+    assert levels[-1] == 4
+    assert all(level == 4 for level in levels[15:])
+    print("Estabilidade com frames pulados: PASSOU")
+
+def test_volta_desfeita_espera_mais():
+    """Testa que uma volta de nível desfeita logo em seguida adia a próxima"""
+    print("Testando espera após volta desfeita...")
+    governor = FrameGovernor(target_fps=30, start_level=2, window=5, min_windows=2)
+    changes = []
+    for i in range(400):
+        # O nível 1 custa mais do que a escala prevê (troca de perfil)
+        frame_time = 40.0 if governor.level <= 1 else 8.0
+        if governor.update(frame_time if governor.should_infer() else 0.1):
+            changes.append(i)
+    gaps = [b - a for a, b in zip(changes[1::2], changes[2::2])]
+    assert len(changes) < 20
+    assert gaps == sorted(gaps)
+    assert governor.upgrade_windows == governor.max_windows
+    print("Espera após volta desfeita: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DO GOVERNADOR ADAPTATIVO ===\n")
+    test_degrada_e_recupera()
+    test_histerese()
+    test_deterministico()
+    test_pulo_de_frames()
+    test_nivel_estavel_pulando_frames()
+    test_volta_desfeita_espera_mais()
+
+if __name__ == "__main__":
+    main()
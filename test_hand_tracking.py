@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste do rastreamento separado por mão
+"""
+
+import numpy as np
+from configuracao_avancada import get_runtime_config
+from gestures import HandLandmarks, TemplateIndex, load_all_landmarks
+from hand_tracking import HandTracker
+from spatial_index import KDTreeTemplateIndex
+from synthetic_data import h_hand
+
+def test_duas_maos_independentes():
+    """Testa se o movimento de uma mão não é contaminado pela outra"""
+    print("Testando duas mãos no mesmo frame...")
+    index = TemplateIndex.from_dict(load_all_landmarks())
+    tracker = HandTracker()
+
+    detected = False
+    for i in range(15):
+        moving = h_hand(0.8 - i * 0.02)
+        still = h_hand(0.2)
+        classified = tracker.update([moving, still], ['Right', 'Left'], index)
+        keys = [key for key, _, _ in classified]
+        assert keys == ['Right', 'Left']
+        detected = detected or classified[0][2].movement_detected
+        assert not classified[1][2].movement_detected
+
+    assert detected
+    assert len(tracker.states['Right'].landmarks_sequence) == 15
+    print("Duas mãos independentes: PASSOU")
+
+def test_mesma_lateralidade():
+    """Testa duas mãos com a mesma lateralidade separadas pela posição do punho"""
+    print("Testando duas mãos direitas...")
+    tracker = HandTracker()
+    index = TemplateIndex.from_dict(load_all_landmarks())
+
+    first = tracker.update([h_hand(0.2), h_hand(0.8)], ['Right', 'Right'], index)
+    assert [key for key, _, _ in first] == ['Right', 'Right#2']
+    swapped = tracker.update([h_hand(0.79), h_hand(0.21)], ['Right', 'Right'], index)
+    assert [key for key, _, _ in swapped] == ['Right#2', 'Right']
+
+    for _ in range(tracker.max_missing_frames + 1):
+        tracker.update([], None, index)
+    assert not tracker.states
+    print("Mesma lateralidade: PASSOU")
+
+def test_confirmacao_por_tempo():
+    """Testa se o mesmo gesto é confirmado no mesmo tempo a 15, 30 e 60 fps"""
+    print("Testando confirmação por tempo...")
+    index = TemplateIndex.from_dict(load_all_landmarks())
+    for streaming in (True, False):
+        confirmed_at = []
+        for fps in (15, 30, 60):
+            tracker = HandTracker(config={**get_runtime_config(), 'streaming_movements': streaming})
+            first = None
+            for i in range(int(0.6 * fps)):
+                timestamp = i / fps
+                (_, _, result), = tracker.update([h_hand(0.8 - 0.6 * timestamp)], ['Right'], index, timestamp)
+                if result.movement_detected and first is None:
+                    first = timestamp
+            confirmed_at.append(first)
+        assert None not in confirmed_at
+        assert max(confirmed_at) - min(confirmed_at) <= 1 / 15 + 1e-9
+    print("Confirmação por tempo: PASSOU")
+
+def test_portao_de_movimento():
+    """Testa o reaproveitamento da letra estática com a mão parada e a reclassificação ao mexer"""
+    print("Testando portão de movimento...")
+    all_landmarks = load_all_landmarks()
+    index = TemplateIndex.from_dict(all_landmarks)
+    rng = np.random.default_rng(0)
+    still = np.array(next(iter(all_landmarks.values()))[0])
+    hands = [HandLandmarks((still + rng.normal(0, 0.001, still.shape)).tolist()) for _ in range(60)]
+
+    gated = HandTracker()
+    full = HandTracker(config={**get_runtime_config(), 'motion_gate': False})
+    for i, hand in enumerate(hands):
+        (_, _, result), = gated.update([hand], ['Right'], index, i / 30)
+        (_, _, expected), = full.update([hand], ['Right'], index, i / 30)
+        assert result.letra == expected.letra and result.hand_shape == expected.hand_shape
+    state = gated.states['Right']
+    max_reuse = state.config['motion_gate_max_reuse']
+    # Uma comparação completa a cada max_reuse + 1 frames
+    assert state.static_reused == len(hands) - len(range(0, len(hands), max_reuse + 1))
+    assert full.states['Right'].static_reused == 0
+
+    # Um dedo que se mexe além da tolerância ou uma amostra nova refazem a comparação
+    moved = still.copy()
+    moved[8, 1] -= 0.05
+    reused = state.static_reused
+    gated.update([HandLandmarks(moved.tolist())], ['Right'], index, 2.0)
+    assert state.static_reused == reused
+    gated.update([HandLandmarks(moved.tolist())], ['Right'], index, 2.04)
+    assert state.static_reused == reused + 1
+    index._extend(['Q'], [index.templates[0]])
+    gated.update([HandLandmarks(moved.tolist())], ['Right'], index, 2.08)
+    assert state.static_reused == reused + 1
+
+    # Uma recarga com o mesmo número de amostras também refaz a comparação,
+    # inclusive através de um índice que envolve o TemplateIndex
+    tree = KDTreeTemplateIndex(index)
+    gated.update([HandLandmarks(moved.tolist())], ['Right'], tree, 2.12)
+    assert state.static_reused == reused + 2
+    count = len(index)
+    index._replace_with(TemplateIndex(index.labels, index.templates))
+    assert len(tree) == count and tree.version == index.version
+    gated.update([HandLandmarks(moved.tolist())], ['Right'], tree, 2.16)
+    assert state.static_reused == reused + 2
+    gated.update([HandLandmarks(moved.tolist())], ['Right'], tree, 2.20)
+    assert state.static_reused == reused + 3
+    print("Portão de movimento: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DO RASTREAMENTO POR MÃO ===\n")
+    test_duas_maos_independentes()
+    test_mesma_lateralidade()
+    test_confirmacao_por_tempo()
+    test_portao_de_movimento()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Teste dos formatos de armazenamento de amostras
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from gestures import DEFAULT_LANDMARKS_FILE, TemplateIndex, load_all_landmarks, match_templates
+from landmark_store import (
+    DEFAULT_JSON_FILE,
+    HEADER_SIZE,
+    RECORD_DTYPE,
+    SampleStore,
+    compact,
+    export_json,
+    import_json,
+    load_raw,
+    open_binary,
+)
+
+def test_importar_exportar():
+    """Testa a ida e volta entre all_landmarks.json e o arquivo de amostras"""
+    print("Testando importação/exportação...")
+    all_landmarks = load_all_landmarks()
+    with tempfile.TemporaryDirectory() as tmp:
+        store_file = os.path.join(tmp, "samples.lbr")
+        json_file = os.path.join(tmp, "all_landmarks.json")
+
+        total = import_json("landmarks/all_landmarks.json", store_file)
+        assert total == sum(len(v) for v in all_landmarks.values())
+        export_json(store_file, json_file)
+        with open(json_file) as f:
+            exported = json.load(f)
+
+        assert list(exported) == list(all_landmarks)
+        for letra, amostras in all_landmarks.items():
+            assert np.allclose(exported[letra], amostras, atol=1e-6)
+
+        # Importar de novo não duplica as amostras: só substitui com replace=True
+        store = SampleStore(store_file)
+        store.append('Q', np.zeros((21, 3)))
+        try:
+            import_json("landmarks/all_landmarks.json", store_file)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a importação sobre um arquivo com amostras não foi recusada")
+        assert len(store) == total + 1
+        assert import_json("landmarks/all_landmarks.json", store_file, replace=True) == total
+        assert len(store) == total and store.to_dict() == exported
+        assert not os.path.exists(store_file + ".tmp")
+
+        # O mesmo pela linha de comando: sem --substituir, o arquivo fica como está
+        command = [sys.executable, "landmark_store.py", "importar", "--store", store_file]
+        assert subprocess.run(command, capture_output=True).returncode != 0
+        assert len(store) == total
+        assert subprocess.run(command + ["--substituir"], capture_output=True).returncode == 0
+        assert len(store) == total
+    print("Importação/exportação: PASSOU")
+
+def test_registro_incompleto_ignorado():
+    """Testa se um registro cortado no fim do arquivo é ignorado e sobrescrito"""
+    print("Testando registro incompleto...")
+    sample = np.random.default_rng(1).random((21, 3))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SampleStore(os.path.join(tmp, "samples.lbr"))
+        store.append('A', sample)
+        with open(store.filename, 'ab') as f:
+            f.write(b'\x00' * (RECORD_DTYPE.itemsize // 2))
+        assert len(store.load()) == 1
+
+        store.append('B', sample)
+        records = store.load()
+        assert [r.decode() for r in records['letra']] == ['A', 'B']
+        assert os.path.getsize(store.filename) == HEADER_SIZE + 2 * RECORD_DTYPE.itemsize
+    print("Registro incompleto: PASSOU")
+
+def test_indice_incremental_do_store():
+    """Testa se o índice lê só os registros novos do arquivo de amostras"""
+    print("Testando atualização incremental do índice...")
+    rng = np.random.default_rng(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SampleStore(os.path.join(tmp, "samples.lbr"))
+        store.append('A', rng.random((21, 3)))
+        index = TemplateIndex.load(store.filename)
+        assert len(index) == 1
+
+        for _ in range(3):
+            store.append('B', rng.random((21, 3)))
+        assert index.refresh(force=True)
+        assert list(index.labels) == ['A', 'B', 'B', 'B']
+    print("Atualização incremental: PASSOU")
+
+def test_carga_de_100k_amostras():
+    """Testa o tempo de leitura de um arquivo com 100 mil amostras"""
+    print("Testando carga de 100k amostras...")
+    records = np.zeros(100000, dtype=RECORD_DTYPE)
+    records['letra'] = b'A'
+    records['landmarks'] = np.random.default_rng(3).random((100000, 21, 3))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SampleStore(os.path.join(tmp, "samples.lbr"))
+        store.append('A', records['landmarks'][0])
+        with open(store.filename, 'ab') as f:
+            f.write(records[1:].tobytes())
+
+        start = time.perf_counter()
+        loaded = store.load()
+        elapsed = time.perf_counter() - start
+        assert len(loaded) == 100000
+        assert elapsed < 1.0
+    print(f"Carga de 100k amostras: PASSOU ({elapsed * 1000:.1f} ms)")
+
+def test_arquivo_compacto_memmap():
+    """Testa o arquivo compacto aberto via memmap contra o índice do JSON"""
+    print("Testando arquivo compacto...")
+    json_index = TemplateIndex.load("landmarks/all_landmarks.json")
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_file = os.path.join(tmp, "all_landmarks.lbm")
+        compact("landmarks/all_landmarks.json", binary_file)
+
+        labels, landmarks, normalized = open_binary(binary_file)
+        assert isinstance(normalized, np.memmap)
+        assert landmarks.shape == (len(json_index), 21, 3)
+        assert list(labels) == list(json_index.labels)
+
+        index = TemplateIndex.load(binary_file)
+        assert isinstance(index.templates, np.memmap)
+        assert np.allclose(index.templates, json_index.templates, atol=1e-6)
+        for query in json_index.templates:
+            assert match_templates(query, index).letra == match_templates(query, json_index).letra
+
+        index.add_sample('Z', landmarks[0])
+        assert len(index) == len(json_index) + 1
+        del labels, landmarks, normalized, index
+    print("Arquivo compacto: PASSOU")
+
+def test_fonte_padrao():
+    """Testa se a fonte padrão importa o all_landmarks.json uma vez e inclui as amostras salvas depois"""
+    print("Testando fonte de amostras padrão...")
+    all_landmarks = load_all_landmarks()
+    total = sum(len(v) for v in all_landmarks.values())
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "landmarks"))
+        shutil.copy(DEFAULT_JSON_FILE, os.path.join(tmp, DEFAULT_JSON_FILE))
+        os.chdir(tmp)
+        try:
+            assert len(TemplateIndex.load()) == total
+            assert SampleStore(DEFAULT_LANDMARKS_FILE).exists()
+
+            SampleStore(DEFAULT_LANDMARKS_FILE).append('Q', all_landmarks['A'][0])
+            labels, landmarks = load_raw(DEFAULT_LANDMARKS_FILE)
+            assert len(labels) == total + 1 and labels[-1] == 'Q'
+            assert len(TemplateIndex.load()) == total + 1
+        finally:
+            os.chdir(cwd)
+    print("Fonte de amostras padrão: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DO ARMAZENAMENTO DE AMOSTRAS ===\n")
+    test_importar_exportar()
+    test_registro_incompleto_ignorado()
+    test_indice_incremental_do_store()
+    test_carga_de_100k_amostras()
+    test_arquivo_compacto_memmap()
+    test_fonte_padrao()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Teste da saída de letras estável (LetterDebouncer)
+"""
+
+from gestures import HandLandmarks, TemplateIndex, load_all_landmarks
+from hand_tracking import HandTracker
+from letter_stream import LetterDebouncer, debounce
+
+FPS = 30.0
+
+def feed(debouncer, letters, fps=FPS):
+    """Passa uma letra por frame, com timestamps a fps; devolve todos os eventos"""
+    events = []
+    for i, letra in enumerate(letters):
+        events += debouncer.update(letra, i / fps)
+    return events
+
+def test_letra_estavel_emitida_uma_vez():
+    """Testa se uma letra com oscilações curtas é emitida uma única vez"""
+    print("Testando letra estável...")
+    debouncer = LetterDebouncer(stable_time=0.3, hold_time=0.2, min_confidence=0.6)
+    letters = ['A', 'A', '?', 'A', 'B', 'A', 'A', 'A', 'A', 'A', 'A', 'A'] + ['A'] * 30
+    events = feed(debouncer, letters)
+    assert [event.letra for event in events] == ['A']
+    event = events[0]
+    assert event.start_time == 0.0 and event.start_frame == 0
+    assert event.emit_frame == 9 and abs(event.emit_time - 0.3) < 1e-9
+    assert event.confidence == 8 / 10
+    assert debouncer.letra == 'A'
+
+    # Letra curta demais ou que não domina os frames não é emitida
+    assert feed(LetterDebouncer(stable_time=0.3), ['C'] * 8) == []
+    assert feed(LetterDebouncer(stable_time=0.3, min_confidence=0.6), ['C', '?'] * 10) == []
+    print("Letra estável: PASSOU")
+
+def test_troca_e_repeticao():
+    """Testa a troca de letra depois de hold_time e a repetição da letra mantida"""
+    print("Testando troca e repetição...")
+    debouncer = LetterDebouncer(stable_time=0.3, hold_time=0.2)
+    events = feed(debouncer, ['A'] * 15 + ['B'] * 15)
+    assert [event.letra for event in events] == ['A', 'B']
+    # B assume só depois de hold_time sem A, mas começa no seu primeiro frame
+    assert events[1].start_frame == 15 and events[1].emit_frame == 24
+
+    # Soltar a letra por mais que hold_time e repetir gera um novo evento
+    events = feed(LetterDebouncer(stable_time=0.3, hold_time=0.2), ['A'] * 12 + ['?'] * 8 + ['A'] * 12)
+    assert [event.letra for event in events] == ['A', 'A']
+
+    events = feed(LetterDebouncer(stable_time=0.3, repeat_time=0.5), ['L'] * 40)
+    assert [event.letra for event in events] == ['L', 'L', 'L']
+    assert events[1].start_frame == events[0].emit_frame and events[1].emit_frame == 24
+
+    # Sem timestamps os limites são contados em frames
+    debouncer = LetterDebouncer(stable_frames=5, hold_frames=2)
+    events = [event for letra in 'AAAAAA??BBBBBB' for event in debouncer.update(letra)]
+    assert [(event.letra, event.start_frame, event.emit_frame) for event in events] == [('A', 0, 5), ('B', 8, 13)]
+    assert events[0].start_time is None
+    print("Troca e repetição: PASSOU")
+
+def test_rastreamento_emite_letras():
+    """Testa os eventos do HandTracker (callback e letter_events) e o gerador debounce"""
+    print("Testando eventos do rastreamento...")
+    all_landmarks = load_all_landmarks()
+    index = TemplateIndex.from_dict(all_landmarks)
+    letra = next(iter(all_landmarks))
+    hand = HandLandmarks(all_landmarks[letra][0])
+
+    received = []
+    tracker = HandTracker(on_letter=lambda key, event: received.append((key, event)))
+    results = []
+    for i in range(30):
+        timestamp = i / FPS
+        for key, _, result in tracker.update([hand], ['Right'], index, timestamp):
+            results.append((i, timestamp, key, result))
+        if tracker.letter_events:
+            assert tracker.letter_events == received[-len(tracker.letter_events):]
+
+    assert [(key, event.letra) for key, event in received] == [('Right', letra)]
+    assert tracker.states['Right'].letter_stream.letra == letra
+    assert [(key, event) for key, event in debounce(results)] == received
+    print("Eventos do rastreamento: PASSOU")
+
+def main():
+    print("=== TESTE DA SAÍDA DE LETRAS ESTÁVEL ===\n")
+    test_letra_estavel_emitida_uma_vez()
+    print()
+    test_troca_e_repeticao()
+    print()
+    test_rastreamento_emite_letras()
+    print("\n=== TESTES CONCLUÍDOS ===")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Teste dos detectores de movimento incrementais
+"""
+
+import numpy as np
+from configuracao_avancada import get_runtime_config
+from gestures import TemplateIndex
+from hand_tracking import HandState, HandTracker
+from landmark_store import DEFAULT_JSON_FILE
+from movement_stream import MovementEvent, MovementStream
+from synthetic_data import create_mock_landmarks, h_hand
+
+def finger_frames(landmark_idx, path):
+    """Frames com só um landmark se movendo pelos pontos (x, y) de path"""
+    return [create_mock_landmarks({landmark_idx: [x, y, 0.0]}) for x, y in path]
+
+def still(landmark_idx, point, count, rng=None):
+    """Frames parados (com ruído pequeno opcional) em um ponto"""
+    noise = rng.normal(0, 0.002, (count, 2)) if rng is not None else np.zeros((count, 2))
+    return finger_frames(landmark_idx, [(point[0] + dx, point[1] + dy) for dx, dy in noise])
+
+def run(frames, letra):
+    stream = MovementStream()
+    events = []
+    detected = []
+    for i, frame in enumerate(frames):
+        events.extend(event for event in stream.update(frame) if event.letra == letra)
+        if stream.detected(letra):
+            detected.append(i)
+    events.extend(event for event in stream.finish() if event.letra == letra)
+    return events, detected
+
+def test_gestos_isolados():
+    """Testa cada letra com o início e o fim do gesto"""
+    print("Testando detectores incrementais...")
+    j_path = [(0.6, 0.3)] * 3 + [(0.6, 0.4), (0.6, 0.5), (0.6, 0.6), (0.55, 0.6), (0.5, 0.6)]
+    events, _ = run(finger_frames(20, j_path), 'J')
+    assert events == [MovementEvent('J', 2, 7)]
+
+    h_frames = [create_mock_landmarks({8: [0.7 - i * 0.02, 0.4, 0.0], 12: [0.7 - i * 0.02, 0.5, 0.0]})
+                for i in range(8)]
+    events, detected = run(h_frames, 'H')
+    assert events == [MovementEvent('H', 0, 7)] and detected == [5, 6, 7]
+
+    z_path = ([(0.3 + i * 0.02, 0.3 + i * 0.02) for i in range(4)]
+              + [(0.36 - i * 0.03, 0.36) for i in range(1, 4)]
+              + [(0.27 + i * 0.02, 0.36 + i * 0.02) for i in range(1, 3)])
+    events, _ = run(finger_frames(8, z_path), 'Z')
+    assert events == [MovementEvent('Z', 0, 8)]
+
+    x_path = [(0.5, 0.4), (0.5, 0.45), (0.5, 0.47), (0.5, 0.43), (0.5, 0.41)]
+    events, _ = run(finger_frames(8, x_path), 'X')
+    assert events == [MovementEvent('X', 0, 4)]
+    print("Gestos isolados: PASSOU")
+
+def test_janela_longa():
+    """Testa um gesto no meio de um fluxo longo parado, sem falsos positivos"""
+    print("Testando fluxo longo...")
+    rng = np.random.default_rng(0)
+    frames = still(8, (0.7, 0.4), 500, rng)
+    frames += [create_mock_landmarks({8: [0.7 - i * 0.02, 0.4, 0.0], 12: [0.7 - i * 0.02, 0.5, 0.0]})
+               for i in range(8)]
+    frames += still(8, (0.3, 0.4), 500, rng)
+
+    stream = MovementStream()
+    events = []
+    for frame in frames:
+        events.extend(stream.update(frame))
+    assert [event.letra for event in events] == ['H']
+    assert 495 <= events[0].start_frame <= 500
+    assert events[0].end_frame >= 507
+    print("Fluxo longo: PASSOU")
+
+def test_eventos_com_timestamp():
+    """Testa se com timestamps o gesto precisa durar min_duration, em qualquer FPS"""
+    print("Testando detectores incrementais com timestamps...")
+    for fps in (30, 120):
+        stream = MovementStream()
+        first = None
+        for i in range(int(0.4 * fps)):
+            timestamp = i / fps
+            x_pos = 0.7 - 0.6 * timestamp
+            stream.update(create_mock_landmarks({8: [x_pos, 0.4, 0.0], 12: [x_pos, 0.5, 0.0]}), timestamp)
+            if stream.detected('H') and first is None:
+                first = timestamp
+        assert 0.13 <= first <= 0.13 + 2 / fps + 1e-9
+        event, = stream.finish()
+        assert event.start_time == 0.0 and abs(event.end_time - (int(0.4 * fps) - 1) / fps) < 1e-9
+    print("Eventos com timestamp: PASSOU")
+
+def test_hand_state_nos_dois_modos():
+    """Testa se o HandState detecta o H com os detectores incrementais e com a janela"""
+    print("Testando HandState com e sem detectores incrementais...")
+    index = TemplateIndex.load(DEFAULT_JSON_FILE)
+    for streaming in (True, False):
+        config = {**get_runtime_config(), 'streaming_movements': streaming}
+        tracker = HandTracker(config=config)
+        detected = False
+        for i in range(15):
+            (_, _, result), = tracker.update([h_hand(0.8 - i * 0.02)], ['Right'], index)
+            detected = detected or result.letra == 'H' and result.movement_detected
+        assert detected
+    print("HandState nos dois modos: PASSOU")
+
+def test_mao_some_no_meio_do_gesto():
+    """Testa se o começo de um gesto antes de a mão sumir não se completa depois"""
+    print("Testando falha da mão no meio do gesto...")
+    config = {**get_runtime_config(), 'streaming_movements': True}
+    index = TemplateIndex.load(DEFAULT_JSON_FILE)
+
+    def h_halves(state, gap, timestamps=False, pause=0.0):
+        """Metade de um H, gap frames sem a mão (ou uma pausa em segundos) e a outra metade"""
+        detected = []
+        for i in range(6):
+            if i == 3:
+                for j in range(gap):
+                    state.missing((i + j) / 30 if timestamps else None)
+            timestamp = (i + (gap if i >= 3 else 0)) / 30 + (pause if i >= 3 else 0) if timestamps else None
+            state.update(h_hand(0.8 - i * 0.02), index, timestamp=timestamp)
+            detected.append(state.movement_stream.detected('H'))
+        return any(detected)
+
+    # Uma falha curta não interrompe o gesto; mais que movement_reset_frames, sim
+    assert h_halves(HandState(config), gap=0)
+    assert h_halves(HandState(config), gap=1)
+    assert not h_halves(HandState(config), gap=config['movement_reset_frames'])
+
+    # Com timestamps, voltar depois de mais que sequence_duration também recomeça
+    assert h_halves(HandState(config), gap=0, timestamps=True)
+    assert not h_halves(HandState(config), gap=0, timestamps=True, pause=config['sequence_duration'])
+
+    # Um gesto detectado antes da falha é encerrado com o seu evento
+    state = HandState(config)
+    for i in range(6):
+        state.update(h_hand(0.8 - i * 0.02), index)
+    assert state.movement_stream.detected('H')
+    events = []
+    for _ in range(config['movement_reset_frames']):
+        state.missing()
+        events += state.movement_events
+    assert [(event.letra, event.start_frame) for event in events] == [('H', 0)]
+    assert not state.movement_stream.detected('H')
+    print("Falha da mão no meio do gesto: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DOS DETECTORES INCREMENTAIS ===\n")
+    test_gestos_isolados()
+    test_janela_longa()
+    test_eventos_com_timestamp()
+    test_hand_state_nos_dois_modos()
+    test_mao_some_no_meio_do_gesto()
+
+if __name__ == "__main__":
+    main()
@@ -10,17 +10,12 @@ from gestures import (
     detect_z_movement, 
     detect_x_movement,
     get_hand_shape_for_movement,
-    detect_movement_letter
+    detect_movement_letter,
+    hand_shape_batch,
+    HandLandmarks,
+    LandmarkRingBuffer
 )
-
-def create_mock_landmarks(positions):
-    """Cria landmarks simulados para teste"""
-    landmarks = [[0.5, 0.5, 0.0] for _ in range(21)]
-    
-    for landmark_idx, pos in positions.items():
-        landmarks[landmark_idx] = pos
-    
-    return landmarks
+from synthetic_data import create_mock_landmarks
 
 def test_j_movement():
     """Testa detecção do movimento da letra J"""
@@ -192,6 +187,60 @@ def test_hand_shapes():
     h_shape = get_hand_shape_for_movement(mock_h)
     print(f"Forma H: {'PASSOU' if h_shape == 'H' else 'FALHOU'} (detectado: {h_shape})")
 
+def test_ring_buffer():
+    """Testa o buffer circular da sequência de landmarks"""
+    print("\nTestando buffer circular...")
+    buffer = LandmarkRingBuffer(15)
+    frames = []
+    for i in range(40):
+        x_pos = 0.7 - (i * 0.005)
+        landmarks = create_mock_landmarks({
+            8: [x_pos, 0.4, 0.0],
+            12: [x_pos, 0.5, 0.0],
+        })
+        frames.append(landmarks)
+        buffer.push(landmarks)
+
+    ordered = np.allclose(buffer.view(), np.array(frames[-15:]), atol=1e-6)
+    trajectory = np.allclose(buffer.trajectory(8), np.array(frames[-15:])[:, 8], atol=1e-6)
+    same_result = detect_h_movement(buffer) == detect_h_movement(frames[-15:])
+    result = len(buffer) == 15 and ordered and trajectory and same_result
+    print(f"Buffer circular: {'PASSOU' if result else 'FALHOU'}")
+    assert result
+
+def test_janela_por_tempo():
+    """Testa os timestamps do buffer e a duração mínima por tempo"""
+    print("\nTestando janela por tempo...")
+    timed_buffer = LandmarkRingBuffer(60)
+    frame_buffer = LandmarkRingBuffer(60)
+    for i in range(60):
+        x_pos = 0.9 - (i * 0.03)
+        landmarks = create_mock_landmarks({8: [x_pos, 0.4, 0.0], 12: [x_pos, 0.5, 0.0]})
+        timed_buffer.push(landmarks, i / 60)
+        frame_buffer.push(landmarks)
+
+    window = timed_buffer.since(59 / 60 - 0.25)
+    timed = len(window) == 16 and abs(window.duration - 0.25) < 1e-9 and window.index_at(0.5) == 8
+    # 4 frames a 60 fps já deslocam o bastante, mas duram menos que min_duration
+    short = timed_buffer.since(59 / 60 - 0.05)
+    duration_gate = detect_h_movement(window) and len(short) == 4 and not detect_h_movement(short)
+    frame_mode = frame_buffer.last(5).duration is None and detect_h_movement(frame_buffer.last(5))
+    result = timed and duration_gate and frame_mode
+    print(f"Janela por tempo: {'PASSOU' if result else 'FALHOU'}")
+    assert result
+
+def test_hand_shape_batch():
+    """Testa se a identificação em lote concorda com a função por mão"""
+    print("\nTestando formas da mão em lote...")
+    rng = np.random.default_rng(0)
+    hands = rng.uniform(0, 1, (500, 21, 3))
+    hands[:10, :, 1] = 0.5
+    expected = [get_hand_shape_for_movement(HandLandmarks(hand)) for hand in hands]
+    shapes = list(hand_shape_batch(hands))
+    result = shapes == expected and {'J', 'H', 'Z', None} <= set(shapes)
+    print(f"Formas em lote: {'PASSOU' if result else 'FALHOU'}")
+    assert result
+
 def main():
     """Executa todos os testes"""
     print("=== TESTE DO SISTEMA DE DETECÇÃO DE MOVIMENTOS ===\n")
@@ -212,6 +261,9 @@ def main():
         print()
     
     test_hand_shapes()
+    test_hand_shape_batch()
+    test_ring_buffer()
+    test_janela_por_tempo()
     
     print(f"\n=== RESULTADO FINAL ===")
     print(f"Testes de movimento: {tests_passed}/{len(movement_tests)} passaram")
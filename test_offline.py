@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Teste do processamento offline (divisão em segmentos, classificação e saída)
+"""
+
+import csv
+import json
+import os
+import tempfile
+from gestures import TemplateIndex, load_all_landmarks
+from landmark_store import DEFAULT_JSON_FILE
+from offline import RESULT_FIELDS, ResultWriter, classify_detections, count_frames, event_row, split_segments
+
+FPS = 30.0
+
+def test_divisao_em_segmentos():
+    """Testa se os segmentos cobrem a entrada inteira, com o último até o fim"""
+    print("Testando divisão em segmentos...")
+    assert split_segments(100, 4) == [(0, 25), (25, 50), (50, 75), (75, None)]
+    assert split_segments(10, 3) == [(0, 3), (3, 7), (7, None)]
+
+    # Mais segmentos que frames: um frame por segmento
+    assert split_segments(3, 8) == [(0, 1), (1, 2), (2, None)]
+    assert split_segments(1, 8) == [(0, None)]
+
+    # Sem contagem de frames (vídeo que não informa): nenhum segmento, e
+    # detect_parallel volta ao processamento sequencial
+    assert split_segments(0, 8) == []
+    assert split_segments(-1, 8) == []
+    print("Divisão em segmentos: PASSOU")
+
+def test_contagem_de_imagens():
+    """Testa a contagem de frames de um diretório de imagens"""
+    print("Testando contagem de imagens...")
+    with tempfile.TemporaryDirectory() as tmp:
+        assert count_frames(tmp) == 0
+        for name in ('frame_001.png', 'frame_002.JPG', 'notas.txt'):
+            open(os.path.join(tmp, name), 'wb').close()
+        assert count_frames(tmp) == 2
+    print("Contagem de imagens: PASSOU")
+
+def canned_detections(letra, frames=20):
+    """Detecções prontas, como as de detect_frames: uma amostra da letra parada e um frame sem mãos"""
+    hand = load_all_landmarks(DEFAULT_JSON_FILE)[letra][0]
+    detections = [(i, i / FPS, [hand], ['Right']) for i in range(frames)]
+    detections.append((frames, frames / FPS, [], None))
+    return detections
+
+def read_rows(filename):
+    with open(filename, newline='') as f:
+        if filename.endswith('.jsonl'):
+            return [json.loads(line) for line in f]
+        return list(csv.DictReader(f))
+
+def test_classificacao_e_saida():
+    """Testa a classificação das detecções e as linhas gravadas em CSV e JSONL"""
+    print("Testando classificação e saída...")
+    index = TemplateIndex.load(DEFAULT_JSON_FILE)
+    letra = index.labels[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("resultados.csv", "resultados.jsonl"):
+            filename = os.path.join(tmp, name)
+            events = []
+            with ResultWriter(filename) as writer:
+                total = classify_detections(canned_detections(letra), writer, index,
+                                            on_letter=lambda key, event: events.append(event_row(key, event)))
+            # Uma linha por mão: o frame sem mãos conta como processado, mas não gera linha
+            assert total == 21
+            rows = read_rows(filename)
+            assert len(rows) == 20 and list(rows[0]) == RESULT_FIELDS
+            assert {row['hand'] for row in rows} == {'Right'}
+            assert all(row['letra'] == letra for row in rows)
+            if name.endswith('.jsonl'):
+                assert rows[3]['frame'] == 3 and rows[3]['timestamp'] == round(3 / FPS, 6)
+                assert rows[3]['movimento'] is False and isinstance(rows[3]['distancia'], float)
+            else:
+                assert rows[3]['frame'] == '3' and rows[3]['movimento'] == 'False'
+
+            # Uma letra estável emitida, com o início da letra e o momento da emissão
+            event, = events
+            assert (event['hand'], event['letra'], event['inicio'], event['frame_inicio']) == ('Right', letra, 0.0, 0)
+            assert event['emissao'] >= event['inicio'] and event['frame_emissao'] >= event['frame_inicio']
+            assert 0 < event['confianca'] <= 1
+    print("Classificação e saída: PASSOU")
+
+def main():
+    print("=== TESTE DO PROCESSAMENTO OFFLINE ===\n")
+    test_divisao_em_segmentos()
+    print()
+    test_contagem_de_imagens()
+    print()
+    test_classificacao_e_saida()
+    print("\n=== TESTES CONCLUÍDOS ===")
+
+if __name__ == "__main__":
+    main()
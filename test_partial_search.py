@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Teste dos limiares por letra e da busca por distâncias parciais
+"""
+
+import os
+import tempfile
+import numpy as np
+import partial_search
+from configuracao_avancada import SYSTEM_CONFIG, auto_calibrate_from_landmarks, calibrate_static_thresholds
+from gestures import TemplateIndex, match_templates, template_distances
+from landmark_store import DEFAULT_JSON_FILE
+from partial_search import PartialDistanceIndex
+from synthetic_data import clustered_index
+
+def test_calibracao_por_letra():
+    """Testa os limiares e raios de saída calculados a partir das amostras"""
+    print("Testando calibração por letra...")
+    base = TemplateIndex.load(DEFAULT_JSON_FILE)
+    labels = np.append(base.labels, 'Q')
+    templates = np.concatenate([base.templates, base.templates[:1] + 5.0])
+    calibration = calibrate_static_thresholds(labels, templates)
+    thresholds, radius = calibration['static_thresholds'], calibration['static_exit_radius']
+    default = SYSTEM_CONFIG['static_detection_threshold']
+
+    assert set(thresholds) == set(labels)
+    assert thresholds['Q'] == default
+    assert all(0.5 * default <= limiar <= 2.0 * default for limiar in thresholds.values())
+
+    dists = template_distances(templates, templates)
+    for letra, raio in radius.items():
+        rows = labels == letra
+        assert np.isclose(raio, dists[np.ix_(rows, ~rows)].min() / 2)
+
+    calibrated = auto_calibrate_from_landmarks([], (labels, templates))
+    assert calibrated['static_thresholds'] == thresholds
+    assert calibrated['sequence_length'] == SYSTEM_CONFIG['sequence_length']
+    print("Calibração por letra: PASSOU")
+
+def test_limiar_por_letra():
+    """Testa se cada letra é aceita ou rejeitada pelo seu próprio limiar"""
+    print("Testando limiar por letra...")
+    base = TemplateIndex.load(DEFAULT_JSON_FILE)
+    query = base.templates[0] + 0.01
+    expected = match_templates(query, base, 10.0)
+    loose = match_templates(query, base, {expected.letra: expected.distancia + 0.01})
+    tight = match_templates(query, base, {expected.letra: expected.distancia - 0.01})
+    assert loose.letra == expected.letra
+    assert tight.letra == '?'
+    assert tight.distancia == expected.distancia
+    print("Limiar por letra: PASSOU")
+
+def test_busca_parcial_igual_busca_completa():
+    """Testa se a busca parcial (com e sem saída antecipada) dá a mesma letra da busca completa"""
+    print("Testando busca parcial contra busca completa...")
+    rng = np.random.default_rng(0)
+    base, index = clustered_index(rng, 1000)
+    thresholds = calibrate_static_thresholds(index.labels, index.templates)['static_thresholds']
+    partial = PartialDistanceIndex(index)
+    exact = PartialDistanceIndex(index, early_exit=False)
+
+    exits = 0
+    for noise in (0.0, 0.02, 0.1):
+        queries = base.templates[rng.integers(0, len(base), 20)] + rng.normal(0, noise, (20, 21, 2))
+        for limiar in (SYSTEM_CONFIG['static_detection_threshold'], thresholds):
+            expected = match_templates(queries, index, limiar)
+            for want, fast, full in zip(expected, partial.match(queries, limiar), exact.match(queries, limiar)):
+                assert fast.letra == full.letra == want.letra
+                assert abs(full.distancia - want.distancia) < 1e-9
+                assert full.margem <= want.margem + 1e-9
+                assert fast.distancia >= want.distancia - 1e-9
+                exits += fast.distancia > want.distancia + 1e-9
+    assert exits > 0
+    print("Busca parcial exata: PASSOU")
+
+def test_busca_parcial_acompanha_indice():
+    """Testa se amostras novas do índice entram na busca e nos raios de saída"""
+    print("Testando atualização da busca parcial...")
+    base = TemplateIndex.load(DEFAULT_JSON_FILE)
+    index = TemplateIndex(base.labels, base.templates)
+    partial = PartialDistanceIndex(index)
+    query = base.templates[0] + 3.0
+    assert partial.match(query, 100.0).letra == base.labels[0]
+
+    index._extend(['Q'], [query])
+    assert partial.match(query, 100.0).letra == 'Q'
+    assert partial.match(base.templates[0], 100.0).letra == base.labels[0]
+
+    # Os raios atualizados só com as amostras novas são os da calibração completa
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(base), 20)
+    index._extend(base.labels[picks], base.templates[picks] + rng.normal(0, 0.05, (20, 21, 2)))
+    partial.match(query, 100.0)
+    radius = calibrate_static_thresholds(index.labels, index.templates)['static_exit_radius']
+    assert np.allclose(partial._radius, [radius[letra] for letra in index.labels])
+    print("Atualização da busca parcial: PASSOU")
+
+def test_cache_dos_raios():
+    """Testa se os raios de saída vêm do cache em disco quando o conteúdo é o mesmo"""
+    print("Testando cache dos raios de saída...")
+    base = TemplateIndex.load(DEFAULT_JSON_FILE)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, "amostras.parcial")
+        built = PartialDistanceIndex(base, cache_file)
+        assert os.path.exists(cache_file)
+
+        def no_build(self, start):
+            raise AssertionError("os raios deviam vir do cache")
+
+        original = PartialDistanceIndex._update_gaps
+        PartialDistanceIndex._update_gaps = no_build
+        try:
+            cached = PartialDistanceIndex(base, cache_file)
+        finally:
+            PartialDistanceIndex._update_gaps = original
+        assert np.array_equal(cached._radius, built._radius)
+
+        noise = np.random.default_rng(0).normal(0, 0.05, base.templates.shape)
+        other = TemplateIndex(base.labels, base.templates + noise)
+        assert not np.array_equal(PartialDistanceIndex(other, cache_file)._radius, built._radius)
+
+    # Sem scipy, os raios saem da comparação de todas as amostras, com o mesmo valor
+    original = partial_search._cKDTree
+    partial_search._cKDTree = lambda: None
+    try:
+        assert np.allclose(PartialDistanceIndex(base)._radius, built._radius)
+    finally:
+        partial_search._cKDTree = original
+    print("Cache dos raios de saída: PASSOU")
+
+def main():
+    print("=== TESTE DE LIMIARES POR LETRA E BUSCA PARCIAL ===\n")
+    test_calibracao_por_letra()
+    print()
+    test_limiar_por_letra()
+    print()
+    test_busca_parcial_igual_busca_completa()
+    print()
+    test_busca_parcial_acompanha_indice()
+    print()
+    test_cache_dos_raios()
+    print("\n=== TESTES CONCLUÍDOS ===")
+
+if __name__ == "__main__":
+    main()
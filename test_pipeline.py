@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Teste do pipeline da câmera (filas e encerramento das threads)
+"""
+
+import os
+import queue
+import tempfile
+import threading
+from collections import namedtuple
+import numpy as np
+from configuracao_avancada import PerformanceMonitor, get_runtime_config
+from gestures import TemplateIndex
+from landmark_store import DEFAULT_JSON_FILE
+from pipeline import CaptureThread, InferenceThread, put_latest, raise_worker_error, stop_workers
+from recording import SessionRecorder, load_session
+from synthetic_data import h_hand
+
+MediaPipeResults = namedtuple('MediaPipeResults', ['multi_hand_landmarks', 'multi_handedness'])
+
+class FakeCapture:
+    """Câmera falsa: frames pretos, ou uma exceção no frame fail_at"""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.reads = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.reads == self.fail_at:
+            raise RuntimeError("câmera desconectada")
+        self.reads += 1
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+class FakeHands:
+    """MediaPipe Hands falso: uma mão em H por frame, uma exceção ou um travamento"""
+
+    def __init__(self, fail=False, block=None):
+        self.fail = fail
+        self.block = block
+        self.processed = 0
+        self.closed = False
+        self.blocked = threading.Event()
+
+    def process(self, rgb_frame):
+        if self.fail:
+            raise RuntimeError("falha no MediaPipe")
+        if self.block is not None:
+            self.blocked.set()
+            self.block.wait()
+        self.processed += 1
+        return MediaPipeResults([h_hand(0.5)], None)
+
+    def close(self):
+        self.closed = True
+
+def start_pipeline(cap, hands, recorder=None):
+    """Sobe as threads de captura e inferência com câmera e mãos falsas"""
+    frames = queue.Queue(maxsize=1)
+    results = queue.Queue(maxsize=2)
+    stop_event = threading.Event()
+    monitor = PerformanceMonitor()
+    workers = [
+        CaptureThread(cap, frames, stop_event, monitor),
+        InferenceThread(frames, results, stop_event, TemplateIndex.load(DEFAULT_JSON_FILE), threading.Lock(),
+                        monitor, get_runtime_config(), recorder=recorder,
+                        hands_factory=lambda config: hands, prepare=lambda frame, scale: frame),
+    ]
+    for worker in workers:
+        worker.start()
+    return results, stop_event, workers
+
+def test_fila_com_o_mais_recente():
+    """Testa se put_latest descarta os itens mais antigos com a fila cheia"""
+    print("Testando fila com o item mais recente...")
+    q = queue.Queue(maxsize=1)
+    for item in range(5):
+        put_latest(q, item)
+    assert q.get_nowait() == 4 and q.empty()
+
+    q = queue.Queue(maxsize=2)
+    for item in range(5):
+        put_latest(q, item)
+    assert [q.get_nowait(), q.get_nowait()] == [3, 4]
+    print("Fila com o mais recente: PASSOU")
+
+def test_encerramento_normal():
+    """Testa se as threads param com stop_event e a gravação é fechada depois"""
+    print("Testando encerramento normal...")
+    hands = FakeHands()
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = SessionRecorder(os.path.join(tmp, "sessao.lbs"))
+        results, stop_event, workers = start_pipeline(FakeCapture(), hands, recorder)
+        frame_id, _, frame, classified, text = results.get(timeout=5.0)
+        assert [key for key, _, _ in classified] == ['Hand'] and frame.shape == (48, 64, 3)
+
+        assert stop_workers(stop_event, workers)
+        raise_worker_error(workers)
+        recorder.close()
+        assert hands.closed and hands.processed > 0
+        assert len(load_session(recorder.filename)) >= 1
+    print("Encerramento normal: PASSOU")
+
+def test_erro_para_o_pipeline():
+    """Testa se uma exceção em uma thread para as outras e é relançada na principal"""
+    print("Testando erro nas threads...")
+    for cap, hands, message in [(FakeCapture(), FakeHands(fail=True), "falha no MediaPipe"),
+                                (FakeCapture(fail_at=3), FakeHands(), "câmera desconectada")]:
+        _, stop_event, workers = start_pipeline(cap, hands)
+        assert stop_event.wait(5.0)
+        assert stop_workers(stop_event, workers)
+        assert hands.closed
+        try:
+            raise_worker_error(workers)
+        except RuntimeError as error:
+            assert str(error) == message
+        else:
+            raise AssertionError("a exceção da thread não foi relançada")
+    print("Erro nas threads: PASSOU")
+
+def test_thread_travada():
+    """Testa se stop_workers avisa que uma thread não terminou (recursos ainda em uso)"""
+    print("Testando thread travada...")
+    block = threading.Event()
+    hands = FakeHands(block=block)
+    _, stop_event, workers = start_pipeline(FakeCapture(), hands)
+    try:
+        assert hands.blocked.wait(5.0)
+        assert not stop_workers(stop_event, workers, timeout=0.2)
+        assert not hands.closed
+    finally:
+        block.set()
+    assert stop_workers(stop_event, workers)
+    assert hands.closed
+    raise_worker_error(workers)
+    print("Thread travada: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DO PIPELINE DA CÂMERA ===\n")
+    test_fila_com_o_mais_recente()
+    test_encerramento_normal()
+    test_erro_para_o_pipeline()
+    test_thread_travada()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Teste dos protótipos por letra (busca em duas etapas)
+"""
+
+import os
+import tempfile
+import numpy as np
+from gestures import TemplateIndex, load_all_landmarks, match_templates
+from landmark_store import DEFAULT_JSON_FILE
+from prototypes import PrototypeIndex, build_prototypes
+
+def test_medoides_por_letra():
+    """Testa se cada letra fica com no máximo N protótipos, todos amostras reais"""
+    print("Testando escolha dos protótipos...")
+    index = TemplateIndex.load(DEFAULT_JSON_FILE)
+    rows = build_prototypes(index, per_letter=2)
+    labels = list(index.labels[rows])
+    for letra in set(index.labels):
+        assert 1 <= labels.count(letra) <= 2
+    assert len(set(rows)) == len(rows)
+    assert list(build_prototypes(index, per_letter=2)) == list(rows)
+    print("Protótipos por letra: PASSOU")
+
+def test_duas_etapas_igual_busca_completa():
+    """Testa se o refinamento nas letras candidatas dá a mesma letra da busca completa"""
+    print("Testando busca por protótipos contra busca completa...")
+    rng = np.random.default_rng(0)
+    base = TemplateIndex.load(DEFAULT_JSON_FILE)
+    picks = rng.integers(0, len(base), 2000)
+    index = TemplateIndex(base.labels[picks], base.templates[picks] + rng.normal(0, 0.02, (2000, 21, 2)))
+    prototypes = PrototypeIndex(index, per_letter=3, top_letters=2)
+    assert len(prototypes.prototypes) <= 3 * len(set(index.labels))
+
+    queries = base.templates + rng.normal(0, 0.01, base.templates.shape)
+    for expected, result in zip(match_templates(queries, index), match_templates(queries, prototypes)):
+        assert result.letra == expected.letra
+        assert abs(result.distancia - expected.distancia) < 1e-9
+
+    index.add_sample('B', load_all_landmarks()['B'][0])
+    match_templates(base.templates[0], prototypes)
+    assert prototypes._built_version == index.version
+    print("Busca em duas etapas: PASSOU")
+
+def test_cache_de_prototipos():
+    """Testa se o cache gerado pela linha de comando é usado e acompanha as amostras novas"""
+    print("Testando cache dos protótipos...")
+    import sys
+    import prototypes
+
+    index = TemplateIndex.load(DEFAULT_JSON_FILE)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "samples.lbr.prototipos")
+        argv = sys.argv
+        sys.argv = ["prototypes.py", DEFAULT_JSON_FILE, "--por-letra", "2", "--saida", output]
+        try:
+            prototypes.main()
+        finally:
+            sys.argv = argv
+        assert os.path.exists(output)
+
+        def build_fails(*args):
+            raise AssertionError("protótipos recalculados apesar do cache")
+        build = prototypes.build_prototypes
+        prototypes.build_prototypes = build_fails
+        try:
+            cached = PrototypeIndex(index, per_letter=2, cache_file=output)
+        finally:
+            prototypes.build_prototypes = build
+        assert list(cached._rows) == list(build_prototypes(index, per_letter=2))
+
+        # Outro número de protótipos por letra não usa o cache
+        assert len(PrototypeIndex(index, per_letter=1, cache_file=os.path.join(tmp, "outro")).prototypes) \
+            < len(cached.prototypes)
+
+        # Amostra nova: só a letra dela é refeita, com o mesmo resultado da escolha completa
+        index.add_sample('B', load_all_landmarks(DEFAULT_JSON_FILE)['A'][0])
+        match_templates(index.templates[0], cached)
+        assert list(cached._rows) == list(build_prototypes(index, per_letter=2))
+        prototypes.build_prototypes = build_fails
+        try:
+            reloaded = PrototypeIndex(index, per_letter=2, cache_file=output)
+        finally:
+            prototypes.build_prototypes = build
+        assert list(reloaded._rows) == list(cached._rows)
+    print("Cache dos protótipos: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DOS PROTÓTIPOS ===\n")
+    test_medoides_por_letra()
+    test_duas_etapas_igual_busca_completa()
+    test_cache_de_prototipos()
+
+if __name__ == "__main__":
+    main()
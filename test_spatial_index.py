@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Teste do índice espacial (KD-tree) para letras estáticas
+"""
+
+import json
+import os
+import tempfile
+import numpy as np
+import spatial_index
+from gestures import TemplateIndex, load_all_landmarks, match_templates
+from partial_search import PartialDistanceIndex
+from prototypes import PrototypeIndex
+from spatial_index import KDTreeTemplateIndex
+from synthetic_data import clustered_index
+
+def test_kdtree_igual_busca_completa():
+    """Testa se a KD-tree dá a mesma letra e distância que a busca completa"""
+    print("Testando KD-tree contra busca completa...")
+    rng = np.random.default_rng(0)
+    base, index = clustered_index(rng)
+    kdtree = KDTreeTemplateIndex(index)
+    assert kdtree.tree is not None
+
+    for noise in (0.0, 0.02, 0.1):
+        queries = base.templates[rng.integers(0, len(base), 20)] + rng.normal(0, noise, (20, 21, 2))
+        for expected, result in zip(match_templates(queries, index), match_templates(queries, kdtree)):
+            assert result.letra == expected.letra
+            assert abs(result.distancia - expected.distancia) < 1e-9
+            assert result.margem >= expected.margem - 1e-9
+    print("KD-tree exata: PASSOU")
+
+def test_cache_em_disco():
+    """Testa se a árvore é reaproveitada do cache e invalidada quando o índice muda"""
+    print("Testando cache da KD-tree...")
+    rng = np.random.default_rng(1)
+    _, index = clustered_index(rng, 500)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, "templates.kdtree")
+        KDTreeTemplateIndex(index, cache_file)
+        assert os.path.exists(cache_file)
+
+        def no_build(*args, **kwargs):
+            raise AssertionError("a árvore devia vir do cache")
+
+        original = spatial_index._cKDTree
+        spatial_index._cKDTree = lambda: no_build
+        try:
+            cached = KDTreeTemplateIndex(index, cache_file)
+        finally:
+            spatial_index._cKDTree = original
+        assert cached.tree is not None
+
+        index.add_sample('A', rng.random((21, 3)).tolist())
+        rebuilt = KDTreeTemplateIndex(index, cache_file)
+        assert rebuilt.tree.n == len(index)
+    print("Cache da KD-tree: PASSOU")
+
+def test_sem_scipy():
+    """Testa a volta para a busca completa quando o scipy não está instalado"""
+    rng = np.random.default_rng(2)
+    base, index = clustered_index(rng, 200)
+    original = spatial_index._cKDTree
+    spatial_index._cKDTree = lambda: None
+    try:
+        kdtree = KDTreeTemplateIndex(index)
+        assert kdtree.tree is None
+        query = base.templates[0]
+        assert match_templates(query, kdtree) == match_templates(query, index)
+    finally:
+        spatial_index._cKDTree = original
+    print("Sem scipy: PASSOU")
+
+def test_arquivo_recarregado_com_mesmo_tamanho():
+    """Testa se os índices derivados se refazem quando o arquivo muda sem mudar o número de amostras"""
+    print("Testando recarga com o mesmo número de amostras...")
+    all_landmarks = load_all_landmarks()
+    letters = list(all_landmarks)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "all_landmarks.json")
+        with open(filename, 'w') as f:
+            json.dump(all_landmarks, f)
+        index = TemplateIndex.load(filename)
+        wrappers = [KDTreeTemplateIndex(index), PrototypeIndex(index), PartialDistanceIndex(index)]
+
+        # Letras em ordem inversa e mãos espelhadas: o número de amostras não muda
+        swapped = {letra: [[[1.0 - x, y, z] for x, y, z in ref] for ref in all_landmarks[letra]]
+                   for letra in reversed(letters)}
+        with open(filename, 'w') as f:
+            json.dump(swapped, f)
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        version = index.version
+        assert index.refresh(force=True)
+        assert index.version != version and len(index) == sum(map(len, swapped.values()))
+
+        for wrapper in wrappers:
+            for query in index.templates:
+                assert match_templates(query, wrapper, 10.0).letra == match_templates(query, index, 10.0).letra
+    print("Recarga com o mesmo número de amostras: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DO ÍNDICE ESPACIAL ===\n")
+    test_kdtree_igual_busca_completa()
+    test_cache_em_disco()
+    test_sem_scipy()
+    test_arquivo_recarregado_com_mesmo_tamanho()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Teste do índice de amostras e da comparação vetorizada de letras estáticas
+"""
+
+import json
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+import gestures
+from gestures import (
+    TemplateIndex,
+    classify_static_batch,
+    compare_landmarks,
+    get_template_index,
+    load_all_landmarks,
+    match_templates,
+    normalize_batch,
+    normalize_landmarks,
+    notify_sample_saved,
+    template_distances,
+)
+from synthetic_data import clustered_index
+
+def loop_match(current, all_landmarks, limiar=1.2):
+    """Implementação original, amostra por amostra, usada como referência"""
+    min_dist = float('inf')
+    letra_detectada = '?'
+    for letra, amostras in all_landmarks.items():
+        for ref in amostras:
+            dist = compare_landmarks(current, normalize_landmarks(ref))
+            if dist < min_dist and dist < limiar:
+                min_dist = dist
+                letra_detectada = letra
+    return letra_detectada
+
+def test_match_templates_igual_ao_loop():
+    """Testa se a comparação vetorizada dá as mesmas letras que o loop"""
+    print("Testando comparação vetorizada contra o loop original...")
+    all_landmarks = load_all_landmarks()
+    index = TemplateIndex.from_dict(all_landmarks)
+    rng = np.random.default_rng(0)
+
+    for amostras in all_landmarks.values():
+        for ref in amostras:
+            for noise in (0.0, 0.02, 0.08):
+                sample = np.asarray(ref) + rng.normal(0, noise, (21, 3))
+                current = normalize_landmarks(sample.tolist())
+                assert match_templates(current, index).letra == loop_match(current, all_landmarks)
+    print("Comparação vetorizada: PASSOU")
+
+def test_match_templates_em_lote():
+    """Testa a comparação de várias mãos em uma única chamada"""
+    print("Testando comparação em lote...")
+    index = TemplateIndex.from_dict(load_all_landmarks())
+    queries = index.templates[:4]
+    results = match_templates(queries, index)
+
+    assert len(results) == 4
+    for result, label in zip(results, index.labels[:4]):
+        assert result.letra == label
+        assert result.distancia == 0.0
+        assert result.margem > 0.0
+    print("Comparação em lote: PASSOU")
+
+def test_classificacao_em_lote():
+    """Testa a normalização e a classificação de um array de mãos cruas"""
+    print("Testando classificação em lote de arrays...")
+    all_landmarks = load_all_landmarks()
+    index = TemplateIndex.from_dict(all_landmarks)
+    rng = np.random.default_rng(1)
+    hands = np.array([ref for amostras in all_landmarks.values() for ref in amostras])
+    hands = hands + rng.normal(0, 0.03, hands.shape)
+
+    normalized = normalize_batch(hands)
+    for hand, batch in zip(hands, normalized):
+        assert np.allclose(batch, normalize_landmarks(hand.tolist()))
+
+    results = classify_static_batch(hands, index)
+    assert len(results) == len(hands)
+    for hand, result in zip(hands, results):
+        assert result == match_templates(normalize_landmarks(hand.tolist()), index)
+    assert classify_static_batch(np.zeros((0, 21, 3)), index) == []
+    print("Classificação em lote: PASSOU")
+
+def test_lote_grande_em_blocos():
+    """Testa se muitas mãos são comparadas em blocos, com memória limitada e o mesmo resultado"""
+    print("Testando lote grande de mãos...")
+    rng = np.random.default_rng(2)
+    base, index = clustered_index(rng, 1000)
+    noisy = base.templates[rng.integers(0, len(base), 3000)] + rng.normal(0, 0.01, (3000, 21, 2))
+    hands = np.concatenate([noisy, np.zeros((3000, 21, 1))], axis=2)
+    normalized = normalize_batch(hands)
+
+    # Antes dos blocos por pares, 3000 x 1000 passava de 2 GB de temporários
+    tracemalloc.start()
+    try:
+        results = classify_static_batch(hands, index)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(results) == 3000 and peak < 100e6
+
+    dists = template_distances(normalized[:50], index.templates)
+    assert np.allclose(template_distances(normalized[:50], index.templates, block_pairs=7), dists)
+    assert np.allclose(dists[0], [compare_landmarks(normalized[0], template) for template in index.templates])
+    for row, result in zip(dists, results):
+        best = int(np.argmin(row))
+        assert result.distancia == row[best]
+        assert result.margem == row[index.labels != index.labels[best]].min() - row[best]
+
+    # Blocos de mãos em match_templates dão o mesmo resultado
+    block = gestures.MATCH_BLOCK_DISTANCES
+    gestures.MATCH_BLOCK_DISTANCES = 7 * len(index)
+    try:
+        assert match_templates(normalized[:50], index) == results[:50]
+    finally:
+        gestures.MATCH_BLOCK_DISTANCES = block
+    print("Lote grande de mãos: PASSOU")
+
+def test_indice_vazio():
+    """Testa o índice sem nenhuma amostra"""
+    index = TemplateIndex.from_dict({})
+    result = match_templates(np.zeros((21, 2)), index)
+    assert result.letra == '?'
+    print("Índice vazio: PASSOU")
+
+def test_recarga_do_indice():
+    """Testa o acréscimo incremental e a recarga quando o arquivo muda"""
+    print("Testando recarga do índice...")
+    all_landmarks = load_all_landmarks()
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "all_landmarks.json")
+        with open(filename, 'w') as f:
+            json.dump({'A': all_landmarks['A']}, f)
+
+        index = get_template_index(filename)
+        assert len(index) == len(all_landmarks['A'])
+        novas = all_landmarks['C'] * 2
+        for ref in novas:
+            notify_sample_saved('C', ref, filename)
+        assert len(index) == len(all_landmarks['A']) + len(novas)
+        assert index.labels[-1] == 'C'
+        assert match_templates(normalize_landmarks(novas[0]), index).letra == 'C'
+
+        with open(filename, 'w') as f:
+            json.dump(all_landmarks, f)
+        assert index.refresh(force=True)
+        assert len(index) == sum(len(v) for v in all_landmarks.values())
+        assert not index.refresh(force=True)
+    print("Recarga do índice: PASSOU")
+
+def main():
+    """Executa todos os testes"""
+    print("=== TESTE DO ÍNDICE DE AMOSTRAS ===\n")
+    test_match_templates_igual_ao_loop()
+    test_match_templates_em_lote()
+    test_classificacao_em_lote()
+    test_lote_grande_em_blocos()
+    test_indice_vazio()
+    test_recarga_do_indice()
+
+if __name__ == "__main__":
+    main()